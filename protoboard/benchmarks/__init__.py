@@ -0,0 +1,4 @@
+# Benchmarks of the firmware, run on a PC through the simulator (sim/).
+# Run them from the protoboard directory, e.g.:
+#
+#   python -m benchmarks.bench_transports
@@ -0,0 +1,125 @@
+# Full-matrix updates through src/genericAPI/Functions.py: the previous
+# controller_neopixel() (dict per map_numbers() call, split() and int()
+# per pixel, kept below as reference) against the one-pass parser with the
+# PIXEL_MAP table and the binary controller_neopixel_frame().
+#
+#   python -m benchmarks.bench_neopixel_api [--frames N] [-o file]
+
+# Imports
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+FIRMWARE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FIRMWARE_DIR)
+
+import sim
+from benchmarks.common import summarize_ms, write_results
+
+GENERIC_API = os.path.join(FIRMWARE_DIR, "..", "src", "genericAPI", "Functions.py")
+
+# Previous implementation, for comparison
+def legacy_map_numbers(num=25):
+    swap_map = {
+        0: 4, 4: 0,
+        1: 3, 3: 1,
+        10: 14, 14: 10,
+        11: 13, 13: 11,
+        20: 24, 24: 20,
+        21: 23, 23: 21
+    }
+    return swap_map.get(num, num)
+
+def legacy_controller_neopixel(np, string):
+    instructions = string.split(';')
+    for instruction in instructions:
+        if not instruction:
+            continue
+        try:
+            pos_str, cor_str = instruction.split(':')
+            pos = int(pos_str)
+            mapped_pos = legacy_map_numbers(pos)
+            r, g, b = map(int, cor_str.split(','))
+            np[mapped_pos] = (r, g, b)
+        except Exception as e:
+            print(f"Erro ao processar instrução '{instruction}': {e}")
+    np.write()
+
+# Functions.py imports "ssd1306" from the board's root, here in lib/
+def load_functions():
+    sys.path.insert(0, os.path.join(FIRMWARE_DIR, "lib"))
+    spec = importlib.util.spec_from_file_location("Functions", GENERIC_API)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Seeded full-matrix images, as text and as 75 raw bytes each
+def make_frames(count, seed=3):
+    rng = random.Random(seed)
+    texts, raws = [], []
+    for _ in range(count):
+        raw = bytes(rng.randrange(256) for _ in range(75))
+        raws.append(raw)
+        texts.append(";".join(f"{p}:{raw[p * 3]},{raw[p * 3 + 1]},{raw[p * 3 + 2]}" for p in range(25)))
+    return texts, raws
+
+# Heap needed at peak by one call, minus what np.write() alone needs
+def peak_alloc(func, *args):
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    func(*args)
+    return tracemalloc.get_traced_memory()[1] - before
+
+# Times every call and measures the heap it needs
+def measure(func, np, frames):
+    samples = []
+    for frame in frames:
+        start = time.perf_counter()
+        func(np, frame)
+        samples.append(time.perf_counter() - start)
+    result = summarize_ms(samples)
+    result["frames_per_s"] = round(len(frames) / sum(samples), 1)
+    result["peak_alloc_bytes"] = max(0, peak_alloc(func, np, frames[0]) - peak_alloc(np.write))
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Functions.py Neopixel paths")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("-o", "--output", help="JSON file (default benchmarks/results/neopixel_api.json)")
+    args = parser.parse_args(argv)
+
+    sim.install()
+    import neopixel
+    from machine import Pin
+    functions = load_functions()
+    texts, raws = make_frames(args.frames)
+
+    # Both text paths must light the same LEDs
+    np_legacy = neopixel.NeoPixel(Pin(7), 25)
+    np_new = neopixel.NeoPixel(Pin(7), 25)
+    for text in texts[:20]:
+        legacy_controller_neopixel(np_legacy, text)
+        functions.controller_neopixel(np_new, text)
+        assert np_legacy.buf == np_new.buf, "text paths differ"
+        functions.controller_neopixel_frame(np_new, raws[texts.index(text)])
+        assert np_legacy.buf == np_new.buf, "binary path differs"
+
+    np = neopixel.NeoPixel(Pin(7), 25)
+    results = {
+        "legacy_text": measure(legacy_controller_neopixel, np, texts),
+        "text": measure(functions.controller_neopixel, np, texts),
+        "binary": measure(functions.controller_neopixel_frame, np, raws),
+    }
+    base = results["legacy_text"]["frames_per_s"]
+    print(f"{'path':<12} {'frames/s':>9} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'peak B':>8}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['frames_per_s']:>9} {r['frames_per_s'] / base:>7.2f}x "
+              f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['peak_alloc_bytes']:>8}")
+    write_results("neopixel_api", {"frames": args.frames, "paths": results}, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# I2C transactions of the SSD1306 driver (lib/ssd1306.py): one transaction
+# per command byte, as before, against the batched command streams and the
+# single window + pixels transaction of show(). Also compares animations
+# drawn in the framebuffer with the controller's own scroll and fade.
+#
+# The OLED is a fake SSD1306 on the simulated I2C bus that decodes the
+# control bytes and keeps its own display RAM, which must match the
+# framebuffer after every scenario.
+#
+#   python -m benchmarks.bench_oled_i2c [--frames N] [-o file]
+
+# Imports
+import argparse
+import os
+import random
+import sys
+
+FIRMWARE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FIRMWARE_DIR)
+
+import sim
+from benchmarks.common import write_results
+
+ADDR = 0x3C
+
+# Parameter bytes taken by the commands used by the driver
+COMMAND_ARGS = {
+    0x20: 1, 0x21: 2, 0x22: 2, 0x81: 1, 0x8D: 1, 0xA8: 1, 0xAD: 1,
+    0xD3: 1, 0xD5: 1, 0xD9: 1, 0xDA: 1, 0xDB: 1,
+    0x23: 1, 0x26: 6, 0x27: 6, 0x29: 5, 0x2A: 5, 0xA3: 2,
+}
+
+# SSD1306 seen from the bus, in horizontal addressing mode
+class FakeSSD1306:
+
+    def __init__(self, width=128, pages=8):
+        self.width = width
+        self.pages = pages
+        self.ram = bytearray(width * pages)
+        self.col0, self.col1 = 0, width - 1
+        self.page0, self.page1 = 0, pages - 1
+        self.col, self.page = 0, 0
+        self.command = []  # command waiting for its parameters
+
+    def __call__(self, data):
+        i = 0
+        while i < len(data):
+            control = data[i]
+            i += 1
+            if control & 0x80:
+                # Co=1: a single byte, then another control byte
+                self.byte(data[i], control & 0x40)
+                i += 1
+            else:
+                # Co=0: the rest of the transaction
+                for b in data[i:]:
+                    self.byte(b, control & 0x40)
+                return
+
+    def byte(self, b, is_data):
+        if is_data:
+            self.ram[self.page * self.width + self.col] = b
+            self.col += 1
+            if self.col > self.col1:
+                self.col = self.col0
+                self.page = self.page + 1 if self.page < self.page1 else self.page0
+            return
+        command = self.command
+        command.append(b)
+        if len(command) <= COMMAND_ARGS.get(command[0], 0):
+            return
+        if command[0] == 0x21:
+            self.col0, self.col1 = command[1], command[2]
+            self.col = self.col0
+        elif command[0] == 0x22:
+            self.page0, self.page1 = command[1], command[2]
+            self.page = self.page0
+        command.clear()
+
+# The driver as it was: every command byte in its own transaction
+def legacy_driver():
+    from lib.ssd1306 import SSD1306, SSD1306_I2C
+
+    class LegacySSD1306_I2C(SSD1306_I2C):
+        write_cmds = SSD1306.write_cmds
+        send_window = SSD1306.send_window
+
+        def write_data_parts(self, parts):
+            size = 0
+            for part in parts:
+                size += len(part)
+            parts.insert(0, b"\x40")
+            self.i2c.writevto(self.addr, parts)
+            self.bytes_sent += 1 + size
+
+    return LegacySSD1306_I2C
+
+# Bus cost of one scenario: draw(oled, k) then show(), frames times
+def run(oled, i2c, draw, frames):
+    i2c.reset_stats()
+    sim.reset_bus_time()
+    for k in range(frames):
+        draw(oled, k)
+        oled.show()
+    return {
+        "transactions_per_show": round(i2c.transactions / frames, 2),
+        "bytes_per_show": round(i2c.bytes / frames, 1),
+        "bus_ms_per_show": round(sim.bus_time().get("i2c", 0) * 1000 / frames, 3),
+    }
+
+def full_frame(oled, k):
+    oled.fill(k & 1)
+    oled.text(f"frame {k}", 0, 28)
+
+def text_row(oled, k):
+    oled.fill_rect(0, 24, 128, 8, 0)
+    oled.text(f"Score: {k}", 0, 24)
+
+# A snake step: one 8x8 cell drawn, another erased
+def snake_cell(oled, k):
+    rng = random.Random(k)
+    oled.fill_rect(rng.randrange(16) * 8, rng.randrange(8) * 8, 8, 8, 1)
+    oled.fill_rect(rng.randrange(16) * 8, rng.randrange(8) * 8, 8, 8, 0)
+
+SCENARIOS = {
+    "full_frame": full_frame,
+    "text_row": text_row,
+    "snake_cell": snake_cell,
+}
+
+# Bus bytes of a 32-step animation: shifting the framebuffer and sending
+# it at every step against controller commands (and, for the scroll, the
+# frame sent once it stops)
+def animations(oled, i2c):
+    oled.fill(0)
+    oled.text("== MENU ==", 0, 0)
+    oled.text("> WiFi", 0, 16)
+    oled.show()
+    costs = {}
+    i2c.reset_stats()
+    for _ in range(32):
+        oled.scroll(4, 0)
+        oled.show()
+    costs["framebuffer_scroll"] = i2c.bytes
+    i2c.reset_stats()
+    oled.start_scroll(frames=2)
+    oled.stop_scroll()
+    # The scrolled display RAM no longer matches the framebuffer: the
+    # next show() sends the whole screen again
+    oled.show()
+    costs["controller_scroll"] = i2c.bytes
+    i2c.reset_stats()
+    oled.contrast_ramp(255, 0, 0, 32)
+    costs["contrast_fade"] = i2c.bytes
+    oled.contrast(255)
+    oled.show()
+    return costs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SSD1306 I2C transactions")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("-o", "--output", help="JSON file (default benchmarks/results/oled_i2c.json)")
+    args = parser.parse_args(argv)
+
+    sim.install()
+    from machine import I2C, Pin
+    from lib.ssd1306 import SSD1306_I2C
+
+    results = {}
+    for name, driver in (("legacy", legacy_driver()), ("batched", SSD1306_I2C)):
+        i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400000)
+        display = FakeSSD1306()
+        i2c.attach(ADDR, display)
+        oled = driver(128, 64, i2c)
+        result = {"init_transactions": i2c.transactions, "init_bytes": i2c.bytes}
+        for scenario, draw in SCENARIOS.items():
+            result[scenario] = run(oled, i2c, draw, args.frames)
+            assert display.ram == oled.buffer, f"{name}: display RAM differs after {scenario}"
+        results[name] = result
+    results["batched"]["animation_bytes"] = animations(oled, i2c)
+
+    print(f"{'driver':<8} {'init tx':>8} " + " ".join(f"{s + ' tx/ms':>22}" for s in SCENARIOS))
+    for name, r in results.items():
+        cells = " ".join(
+            f"{r[s]['transactions_per_show']:>12} /{r[s]['bus_ms_per_show']:>8.3f}" for s in SCENARIOS
+        )
+        print(f"{name:<8} {r['init_transactions']:>8} {cells}")
+    print("32-step animation, bus bytes:", results["batched"]["animation_bytes"])
+    write_results("oled_i2c", {"frames": args.frames, "drivers": results}, args.output)
+
+if __name__ == "__main__":
+    main()
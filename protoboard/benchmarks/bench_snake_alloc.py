@@ -0,0 +1,177 @@
+# Checks that a steady-state Snake frame allocates nothing.
+#
+# Plays 1000 ticks (update, render and the oled.show() transfer) of
+# games/snake_game.py with an autopilot steering the snake:
+#   - on the board (mpremote run benchmarks/bench_snake_alloc.py), with the
+#     GC disabled, gc.mem_free() must be the same before and after, so
+#     even memory allocated and dropped within a tick is caught;
+#   - on a PC, through the simulator, tracemalloc's peak above the start
+#     of each tick must stay under HOST_PEAK_BYTES, and the memory it
+#     attributes to the firmware (games/, lib/, hardware.py, inputs.py)
+#     must be the same before and after, give or take HOST_KEPT_BYTES.
+#     CPython allocates its own ints and range iterators where
+#     MicroPython does not, so the host peak is never zero: the limit is
+#     what those cost, well under one copy of a window or a few slices
+#     of the framebuffer.
+#
+#   python -m benchmarks.bench_snake_alloc [--ticks N] [-o file]
+
+# Imports
+import sys
+import gc
+import time
+
+ON_BOARD = sys.implementation.name == "micropython"
+
+TICKS = 1000
+# Long enough for the autopilot to die and restart once, so every code
+# path has run before measuring
+WARMUP_TICKS = 500
+
+# Largest tracemalloc peak of one tick on the host (bytes)
+HOST_PEAK_BYTES = 768
+
+# Firmware memory the host run may gain or lose overall: counters and
+# timestamps kept in the game state are CPython int objects, replaced by
+# ones of another size now and then (a frame keeping anything would add
+# up to kilobytes over the run)
+HOST_KEPT_BYTES = 64
+
+if not ON_BOARD:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import sim
+    import tracemalloc
+    sim.install()
+
+from games import snake_game
+from games.snake_game import NEXT_CELL, GRID_CELLS
+from games.runtime import Game
+from hardware import oled
+
+# Grid distance between two cells, with the wrap-around
+def distance(a, b):
+    dx = abs(a % snake_game.SEGMENTS_WIDE - b % snake_game.SEGMENTS_WIDE)
+    dy = abs(a // snake_game.SEGMENTS_WIDE - b // snake_game.SEGMENTS_WIDE)
+    return min(dx, snake_game.SEGMENTS_WIDE - dx) + min(dy, snake_game.SEGMENTS_HIGH - dy)
+
+# Steers towards the food through free cells (no U-turns)
+def autopilot(player, food):
+    best = -1
+    best_distance = GRID_CELLS
+    for d in range(4):
+        if (d ^ 1) == player.dir:
+            continue
+        cell = NEXT_CELL[d * GRID_CELLS + player.head]
+        if player.occupied[cell]:
+            continue
+        dist = distance(cell, food)
+        if dist < best_distance:
+            best = d
+            best_distance = dist
+    if best >= 0:
+        player.dir = best
+
+# Runs n ticks, recording the render time of each one in samples and,
+# on the host, the tracemalloc peak of each one in peaks
+def run_ticks(game, n, samples=None, peaks=None):
+    play = snake_game.play
+    for i in range(n):
+        autopilot(play.player, play.food)
+        if peaks is not None:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        game.step()
+        start = time.ticks_us()
+        # Scene render and oled.show(), then the background transfer
+        game.render()
+        oled.wait()
+        if peaks is not None:
+            peaks[i] = tracemalloc.get_traced_memory()[1] - base
+        if samples is not None:
+            samples[i] = time.ticks_diff(time.ticks_us(), start)
+        if game.scene is not play:
+            # Died: next game (not a steady-state frame)
+            game.switch(play)
+            game.step()
+
+def new_game():
+    game = Game("Snake", snake_game.play, snake_game.SNAKE_FPS)
+    game.next_scene = game.first_scene
+    game._enter_next()
+    return game
+
+def run_board(ticks):
+    game = new_game()
+    run_ticks(game, WARMUP_TICKS)
+    gc.collect()
+    gc.disable()
+    try:
+        before = gc.mem_free()
+        run_ticks(game, ticks)
+        after = gc.mem_free()
+    finally:
+        gc.enable()
+    print(f"{ticks} ticks: mem_free {before} -> {after}, size {snake_game.play.player.size()}")
+    assert before == after, f"frame allocated {before - after} bytes"
+
+def run_host(argv):
+    import argparse
+    import os
+    from benchmarks.common import summarize_ms, write_results, FIRMWARE_DIR
+
+    parser = argparse.ArgumentParser(description="Snake allocation check")
+    parser.add_argument("--ticks", type=int, default=TICKS)
+    parser.add_argument("-o", "--output", help="JSON file (default benchmarks/results/snake_alloc.json)")
+    args = parser.parse_args(argv)
+
+    firmware = [
+        tracemalloc.Filter(True, os.path.join(FIRMWARE_DIR, "games", "*")),
+        tracemalloc.Filter(True, os.path.join(FIRMWARE_DIR, "lib", "*")),
+        tracemalloc.Filter(True, os.path.join(FIRMWARE_DIR, "hardware.py")),
+        tracemalloc.Filter(True, os.path.join(FIRMWARE_DIR, "inputs.py")),
+    ]
+
+    def firmware_bytes():
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(firmware)
+        return sum(stat.size for stat in snapshot.statistics("filename"))
+
+    game = new_game()
+    run_ticks(game, WARMUP_TICKS)
+    before = firmware_bytes()
+    render_us = [0] * args.ticks
+    peaks = [0] * args.ticks
+    game.stats.reset()
+    run_ticks(game, args.ticks, render_us, peaks)
+    after = firmware_bytes()
+    peak = max(peaks)
+
+    stats = game.stats
+    result = {
+        "ticks": args.ticks,
+        "firmware_bytes_before": before,
+        "firmware_bytes_after": after,
+        "tick_peak_bytes_max": peak,
+        "tick_peak_bytes_p50": sorted(peaks)[len(peaks) // 2],
+        "snake_size": snake_game.play.player.size(),
+        "update_avg_ms": round(stats.update_us / stats.updates / 1000, 4),
+        "update_max_ms": round(stats.update_max_us / 1000, 4),
+        "render": summarize_ms([us / 1000000 for us in render_us]),
+    }
+    print(f"{args.ticks} ticks: firmware heap {before} -> {after} bytes, snake size {result['snake_size']}")
+    print(f"peak per tick: p50 {result['tick_peak_bytes_p50']}, max {peak} bytes (limit {HOST_PEAK_BYTES})")
+    print(f"update avg {result['update_avg_ms']} ms, render p50 {result['render']['p50_ms']} ms")
+    write_results("snake_alloc", result, args.output)
+    if abs(after - before) > HOST_KEPT_BYTES:
+        gc.collect()
+        for stat in tracemalloc.take_snapshot().filter_traces(firmware).statistics("lineno")[:5]:
+            print(stat)
+    assert abs(after - before) <= HOST_KEPT_BYTES, f"frame kept {after - before} bytes"
+    assert peak <= HOST_PEAK_BYTES, f"a tick allocated up to {peak} bytes"
+
+if __name__ == "__main__":
+    if ON_BOARD:
+        run_board(TICKS)
+    else:
+        run_host(sys.argv[1:])
@@ -0,0 +1,158 @@
+# Cost of a Snake step against the length of the snake.
+#
+# Times Snake.move() and Snake.random_free_cell() of games/snake_game.py
+# (occupancy grid + free-cell list) at several lengths, next to the list
+# of segments the game used before: moving shifted every segment, the
+# crash check searched the list and new food was picked from a list of
+# every free cell. The snake follows a cycle through all the cells, so
+# it keeps its length and never crashes while being timed.
+#
+#   python -m benchmarks.bench_snake_cost [--moves N] [-o file]
+#   mpremote run benchmarks/bench_snake_cost.py   (on the board)
+
+# Imports
+import sys
+import random
+import time
+
+ON_BOARD = sys.implementation.name == "micropython"
+
+LENGTHS = (1, 8, 16, 32, 64, 96, 120)
+MOVES = 2000
+PLACEMENTS = 500
+# Best of this many runs of each measurement (less scheduler noise)
+REPEATS = 3
+
+if not ON_BOARD:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import sim
+    sim.install()
+
+from games.snake_game import Snake, NEXT_CELL, GRID_CELLS, SEGMENTS_WIDE, SEGMENTS_HIGH, cell_of
+
+# Cells of a cycle through the whole grid: right along row 0, then
+# zigzags over columns 1..15 of the other rows and back up column 0
+def grid_cycle():
+    cells = [cell_of(x, 0) for x in range(SEGMENTS_WIDE)]
+    for y in range(1, SEGMENTS_HIGH):
+        xs = range(SEGMENTS_WIDE - 1, 0, -1) if y % 2 else range(1, SEGMENTS_WIDE)
+        cells.extend(cell_of(x, y) for x in xs)
+    cells.extend(cell_of(0, y) for y in range(SEGMENTS_HIGH - 1, 0, -1))
+    return cells
+
+# Direction to take at each cell to stay on the cycle
+def cycle_dirs(cycle):
+    dirs = bytearray(GRID_CELLS)
+    for i, cell in enumerate(cycle):
+        following = cycle[(i + 1) % len(cycle)]
+        for d in range(4):
+            if NEXT_CELL[d * GRID_CELLS + cell] == following:
+                dirs[cell] = d
+    return dirs
+
+# The snake as it was before the occupancy grid
+class ListSnake:
+
+    def __init__(self, cycle, length):
+        self.segments = [[c % SEGMENTS_WIDE, c // SEGMENTS_WIDE] for c in cycle[:length]]
+        self.x, self.y = self.segments[-1]
+        self.cells = [[x, y] for y in range(SEGMENTS_HIGH) for x in range(SEGMENTS_WIDE)]
+
+    def move(self, cell):
+        new_x = cell % SEGMENTS_WIDE
+        new_y = cell // SEGMENTS_WIDE
+        for i in range(len(self.segments) - 1):
+            self.segments[i][0] = self.segments[i + 1][0]
+            self.segments[i][1] = self.segments[i + 1][1]
+        crashed = [new_x, new_y] in self.segments
+        self.x = new_x
+        self.y = new_y
+        self.segments[-1][0] = new_x
+        self.segments[-1][1] = new_y
+        return crashed
+
+    def random_free_cell(self):
+        return random.choice([c for c in self.cells if c not in self.segments])
+
+# A grid snake of `length` cells ending at the start of the cycle
+def grid_snake(cycle, dirs, length):
+    snake = Snake(0, 0)
+    snake.reset(cycle[-length] % SEGMENTS_WIDE, cycle[-length] // SEGMENTS_WIDE)
+    snake.grow = length - 1
+    for _ in range(length - 1):
+        snake.dir = dirs[snake.head]
+        snake.move()
+    assert snake.length == length and snake.state
+    return snake
+
+# Average microseconds per call over n calls, best of REPEATS runs
+def time_us(step, n):
+    best = None
+    for _ in range(REPEATS):
+        start = time.ticks_us()
+        for _ in range(n):
+            step()
+        us = time.ticks_diff(time.ticks_us(), start) / n
+        if best is None or us < best:
+            best = us
+    return best
+
+def measure(length, moves, placements, cycle, dirs):
+    snake = grid_snake(cycle, dirs, length)
+
+    def grid_move():
+        snake.dir = dirs[snake.head]
+        snake.move()
+
+    legacy = ListSnake(cycle[-length:], length)
+    position = [0]
+
+    def list_move():
+        legacy.move(cycle[position[0]])
+        position[0] = (position[0] + 1) % GRID_CELLS
+
+    result = {
+        "grid_move_us": time_us(grid_move, moves),
+        "grid_food_us": time_us(snake.random_free_cell, placements),
+        "list_move_us": time_us(list_move, moves),
+        "list_food_us": time_us(legacy.random_free_cell, placements),
+    }
+    assert snake.state and snake.length == length
+    return result
+
+def run(moves=MOVES, placements=PLACEMENTS):
+    cycle = grid_cycle()
+    dirs = cycle_dirs(cycle)
+    results = {}
+    print(f"{'length':>6} {'move us':>9} {'food us':>9} {'list move':>10} {'list food':>10}")
+    for length in LENGTHS:
+        r = measure(length, moves, placements, cycle, dirs)
+        results[length] = r
+        print(f"{length:>6} {r['grid_move_us']:>9.2f} {r['grid_food_us']:>9.2f} "
+              f"{r['list_move_us']:>10.2f} {r['list_food_us']:>10.2f}")
+    grid = [r["grid_move_us"] for r in results.values()]
+    print(f"grid move: longest/shortest snake {grid[-1] / grid[0]:.2f}x")
+    return results
+
+def main(argv=None):
+    import argparse
+    from benchmarks.common import write_results
+
+    parser = argparse.ArgumentParser(description="Snake step cost against length")
+    parser.add_argument("--moves", type=int, default=MOVES)
+    parser.add_argument("--placements", type=int, default=PLACEMENTS)
+    parser.add_argument("-o", "--output", help="JSON file (default benchmarks/results/snake_cost.json)")
+    args = parser.parse_args(argv)
+    results = run(args.moves, args.placements)
+    write_results("snake_cost", {
+        "moves": args.moves,
+        "placements": args.placements,
+        "lengths": {str(length): r for length, r in results.items()},
+    }, args.output)
+
+if __name__ == "__main__":
+    if ON_BOARD:
+        run()
+    else:
+        main(sys.argv[1:])
@@ -0,0 +1,234 @@
+# End-to-end command throughput of the HC-05 and WiFi connection modes.
+#
+# Runs bluetooth_hc05() and tcp_server() unchanged on the simulator and
+# replays the app's command streams (benchmarks/streams.py) the way the
+# app sends them: one command, wait for its reply, next command. For each
+# transport and stream it reports per-command latency (p50/p99), the part
+# of it spent in exec(), commands/s and bytes on the wire.
+#
+#   python -m benchmarks.bench_transports [--realtime] [--scale N] [--baud B] [--no-cache] [-o file]
+#
+# Without --realtime the UART is instantaneous and its baud rate cost is
+# only reported (wire_ms); with it every byte takes its real time.
+# --no-cache turns the compiled command cache off (the "@cache off" of
+# the firmware), for comparing exec() times with and without it.
+
+# Imports
+import argparse
+import contextlib
+import io
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sim
+from benchmarks.common import summarize_ms, write_results
+from benchmarks.streams import default_streams
+
+REPLY_TIMEOUT_MS = 5000
+START_TIMEOUT_S = 5
+
+# Records how long each exec() of the firmware takes
+class ExecTimer:
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.samples = []
+        self.run = cache.run
+
+    def __enter__(self):
+        def timed(command, scope):
+            start = time.perf_counter()
+            try:
+                return self.run(command, scope)
+            finally:
+                self.samples.append(time.perf_counter() - start)
+        self.cache.run = timed
+        return self
+
+    def __exit__(self, *exc):
+        del self.cache.run
+
+# Button B: every connection mode goes back to the menu on it
+def press_b():
+    import hardware
+    hardware.button_b.sim_set(0)
+
+def release_b():
+    import hardware
+    time.sleep(0.05)
+    hardware.button_b.sim_set(1)
+
+# The app talking to bluetooth_hc05() through UART0
+class HC05Transport:
+    name = "hc05"
+
+    def __init__(self, baud=None):
+        self.baud = baud
+
+    def start(self):
+        from machine import uart_peer, reset_uarts
+        from connections.bluetooth_hc05 import bluetooth_hc05
+        reset_uarts()
+        self.peer = uart_peer(0)
+        self.thread = threading.Thread(target=bluetooth_hc05, args=(self.baud,), daemon=True)
+        self.thread.start()
+        if self.peer.readline(START_TIMEOUT_S * 1000) is None:
+            raise RuntimeError("bluetooth_hc05() did not start")
+
+    def send(self, command):
+        self.peer.write(command + "\r\n")
+        return self.peer.readline(REPLY_TIMEOUT_MS)
+
+    def wire_bytes(self):
+        stats = self.peer.stats()
+        return stats["to_board"], stats["to_host"]
+
+    def stop(self):
+        press_b()
+        self.thread.join(START_TIMEOUT_S)
+        release_b()
+
+# The app talking to tcp_server() over a loopback socket
+class WiFiTransport:
+    name = "wifi"
+
+    def start(self):
+        from connections import wifi
+        self.thread = threading.Thread(target=wifi.tcp_server, args=("127.0.0.1",), daemon=True)
+        self.thread.start()
+        deadline = time.time() + START_TIMEOUT_S
+        while True:
+            try:
+                self.sock = socket.create_connection(("127.0.0.1", wifi.TCP_PORT))
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise RuntimeError("tcp_server() did not start")
+                time.sleep(0.05)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(REPLY_TIMEOUT_MS / 1000)
+        self.reader = self.sock.makefile("rb")
+        self.sent = 0
+        self.received = 0
+
+    def send(self, command):
+        data = (command + "\n").encode()
+        self.sock.sendall(data)
+        self.sent += len(data)
+        try:
+            reply = self.reader.readline()
+        except socket.timeout:
+            return None
+        self.received += len(reply)
+        return reply or None
+
+    def wire_bytes(self):
+        return self.sent, self.received
+
+    def stop(self):
+        self.reader.close()
+        self.sock.close()
+        press_b()
+        self.thread.join(START_TIMEOUT_S)
+        release_b()
+
+# Replays one stream, returns its measurements
+def run_stream(transport, setup, commands):
+    from connections.session import command_cache
+    for command in setup:
+        transport.send(command)
+
+    sent_before, received_before = transport.wire_bytes()
+    wire_before = sim.bus_time().get("uart", 0.0)
+    latencies = []
+    errors = 0
+    timeouts = 0
+    with ExecTimer(command_cache) as exec_timer:
+        start = time.perf_counter()
+        for command in commands:
+            t0 = time.perf_counter()
+            reply = transport.send(command)
+            latencies.append(time.perf_counter() - t0)
+            if reply is None:
+                timeouts += 1
+            elif not reply.startswith(b"OK"):
+                errors += 1
+        elapsed = time.perf_counter() - start
+    sent, received = transport.wire_bytes()
+    wire = sim.bus_time().get("uart", 0.0) - wire_before
+
+    return {
+        "commands": len(commands),
+        "errors": errors,
+        "timeouts": timeouts,
+        "elapsed_s": round(elapsed, 4),
+        "commands_per_s": round(len(commands) / elapsed, 1),
+        "latency": summarize_ms(latencies),
+        "exec": summarize_ms(exec_timer.samples),
+        "bytes_to_board": sent - sent_before,
+        "bytes_to_app": received - received_before,
+        "wire_ms": round(wire * 1000, 2),
+    }
+
+def run(transports, streams, verbose=False):
+    results = {}
+    for transport in transports:
+        results[transport.name] = {}
+        firmware_output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with firmware_output:
+            transport.start()
+            try:
+                for name, (setup, commands) in streams.items():
+                    results[transport.name][name] = run_stream(transport, setup, commands)
+            finally:
+                transport.stop()
+    return results
+
+def print_table(results):
+    print(f"{'transport':<9} {'stream':<16} {'cmds':>5} {'cmd/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'exec p50':>9} {'B in':>7} {'B out':>7} {'wire ms':>9} {'err':>4}")
+    for transport, streams in results.items():
+        for name, r in streams.items():
+            print(f"{transport:<9} {name:<16} {r['commands']:>5} {r['commands_per_s']:>8} "
+                  f"{r['latency']['p50_ms']:>8} {r['latency']['p99_ms']:>8} {r['exec']['p50_ms']:>9} "
+                  f"{r['bytes_to_board']:>7} {r['bytes_to_app']:>7} {r['wire_ms']:>9} "
+                  f"{r['errors'] + r['timeouts']:>4}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--realtime", action="store_true", help="UART/I2C transfers take their modelled time")
+    parser.add_argument("--scale", type=int, default=1, help="multiplies the length of every stream")
+    parser.add_argument("--transport", choices=("hc05", "wifi", "all"), default="all")
+    parser.add_argument("--baud", type=int, help="HC-05 UART speed (default: the one saved by config/hc05.py)")
+    parser.add_argument("--no-cache", action="store_true", help="compile every command again (command cache off)")
+    parser.add_argument("-o", "--output", help="JSON file (default benchmarks/results/transports.json)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the firmware's prints")
+    args = parser.parse_args(argv)
+
+    sim.install(realtime=args.realtime)
+    from connections.session import command_cache
+    if args.no_cache:
+        command_cache.off()
+    transports = []
+    if args.transport in ("hc05", "all"):
+        transports.append(HC05Transport(args.baud))
+    if args.transport in ("wifi", "all"):
+        transports.append(WiFiTransport())
+
+    results = run(transports, default_streams(args.scale), args.verbose)
+    print_table(results)
+    print(f"Command cache: {command_cache.stats()}")
+    write_results("transports", {
+        "realtime": args.realtime,
+        "scale": args.scale,
+        "command_cache": command_cache.enabled,
+        "transports": results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
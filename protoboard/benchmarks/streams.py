@@ -0,0 +1,99 @@
+# Command streams sent by the app, generated the same way as the
+# interpreters in src/builder/product/interpreters (neoPixel.ts, ledRGB.ts,
+# buzzer.ts) and the setup lists of the controllers in
+# src/builder/constroct buiders. Seeded, so every run sends the same bytes.
+
+# Imports
+import random
+
+# Setup sent by each controller before its first command ("\x03" left out)
+NEOPIXEL_SETUP = [
+    "from machine import Pin",
+    "import neopixel",
+    "np = neopixel.NeoPixel(Pin(7), 25)",
+]
+
+LED_RGB_SETUP = [
+    "from machine import Pin, PWM",
+    "pinR = Pin(13)",
+    "pinG = Pin(11)",
+    "pinB = Pin(12)",
+    "pwmR = PWM(pinR)",
+    "pwmG = PWM(pinG)",
+    "pwmB = PWM(pinB)",
+    "pwmR.duty_u16(0)",
+    "pwmG.duty_u16(0)",
+    "pwmB.duty_u16(0)",
+]
+
+BUZZER_SETUP = [
+    "from machine import Pin, PWM",
+    "import time",
+    "buzzer = PWM(Pin(21))",
+    "buzzerAux = PWM(Pin(8))",
+    "buzzer.duty_u16(0)",
+    "buzzerAux.duty_u16(0)",
+]
+
+# mapNumbers() of neoPixel.ts (BitDogLab v7 wiring)
+SWAP_MAP = {0: 4, 4: 0, 1: 3, 3: 1, 10: 14, 14: 10, 11: 13, 13: 11, 20: 24, 24: 20, 21: 23, 23: 21}
+
+# One full 5x5 drawing: 25 pixel assignments and np.write()
+def neopixel_frame(rng):
+    commands = []
+    for pos in range(25):
+        r, g, b = rng.randrange(256), rng.randrange(256), rng.randrange(256)
+        commands.append(f"np[{SWAP_MAP.get(pos, pos)}] = ({r}, {g}, {b})")
+    commands.append("np.write()")
+    return commands
+
+def neopixel_frames(count, seed=1):
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(count):
+        commands += neopixel_frame(rng)
+    return commands
+
+# Piano keys C4..C6 as the app rounds them
+def note_frequency(midi):
+    return round(440 * 2 ** ((midi - 69) / 12))
+
+# Key press and release pairs, like a quick melody played on the piano
+def piano_bursts(notes, seed=2):
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(notes):
+        frequency = note_frequency(rng.randrange(60, 85))
+        commands += [
+            f"buzzer.freq({frequency})",
+            "buzzer.duty_u16(700)",
+            "buzzerAux.duty_u16(300)",
+            "buzzer.duty_u16(0)",
+            "buzzerAux.duty_u16(0)",
+        ]
+    return commands
+
+# Dragging one color slider from 0 to 255 and back, every step sending
+# the three channels like ledRGB.ts
+def rgb_sweeps(sweeps, step=5):
+    commands = []
+    values = list(range(0, 256, step)) + list(range(255, -1, -step))
+    for sweep in range(sweeps):
+        channel = sweep % 3
+        for value in values:
+            rgb = [0, 0, 0]
+            rgb[channel] = value
+            commands += [
+                f"pwmR.duty_u16({rgb[0] << 8})",
+                f"pwmG.duty_u16({rgb[1] << 8})",
+                f"pwmB.duty_u16({rgb[2] << 8})",
+            ]
+    return commands
+
+# name -> (setup commands, measured commands)
+def default_streams(scale=1):
+    return {
+        "neopixel_frames": (NEOPIXEL_SETUP, neopixel_frames(8 * scale)),
+        "piano_bursts": (BUZZER_SETUP, piano_bursts(40 * scale)),
+        "rgb_sweeps": (LED_RGB_SETUP, rgb_sweeps(2 * scale)),
+    }
@@ -1,50 +1,236 @@
 """
-    Este código serve para alterar o nome da HC-05
+    Configuração do módulo HC-05: nome, velocidade da UART (baud rate) e
+    teste do link. A velocidade escolhida fica salva na flash e o modo
+    HC-05 (connections/bluetooth_hc05.py) abre a UART com ela.
 """
 from machine import UART
+import json
 import time
 
-# Configura UART para modo AT (38400 baud)
-uart = UART(0, baudrate=38400)
-uart.init(38400, bits=8, parity=None, stop=1)
+# Velocidade de fábrica do HC-05 no modo de dados
+DEFAULT_BAUD = 9600
 
-def send_at_command(command):
-    """Envia um comando AT e imprime a resposta"""
+# Velocidade sugerida: 12x a de fábrica, estável entre a Pico e o HC-05
+TARGET_BAUD = 115200
+
+# Velocidades aceitas pelo comando AT+UART
+BAUD_RATES = (4800, 9600, 19200, 38400, 57600, 115200, 230400, 460800, 921600, 1382400)
+
+# Ordem de busca do probe: 38400 é a velocidade fixa do modo AT completo
+# (KEY pressionado ao ligar), as outras são as mais comuns no modo de dados
+PROBE_RATES = (38400, 9600, 115200, 57600, 19200, 230400, 460800)
+
+# Tempo máximo de espera por uma resposta AT (ms)
+AT_TIMEOUT_MS = 500
+
+# Teste de vazão: bytes enviados, tamanho de cada bloco e espera pelo eco
+TEST_BYTES = 4096
+TEST_BLOCK = 64
+TEST_TIMEOUT_MS = 2000
+
+# Arquivo na flash com a velocidade configurada
+SETTINGS_FILE = "hc05.json"
+
+def open_uart(baud):
+    """Abre a UART0 (pinos do HC-05) na velocidade indicada"""
+    uart = UART(0, baudrate=baud)
+    uart.init(baud, bits=8, parity=None, stop=1)
+    return uart
+
+def load_baud():
+    """Velocidade salva pela configuração (ou a de fábrica)"""
+    try:
+        with open(SETTINGS_FILE) as f:
+            baud = json.load(f)["baud"]
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_BAUD
+    return baud if baud in BAUD_RATES else DEFAULT_BAUD
+
+def save_baud(baud):
+    """Salva a velocidade usada pelo modo HC-05"""
+    with open(SETTINGS_FILE, "w") as f:
+        json.dump({"baud": baud}, f)
+
+def discard_input(uart):
+    """Descarta bytes que sobraram na UART"""
+    while uart.any():
+        uart.read()
+
+def read_line(uart, timeout_ms=AT_TIMEOUT_MS):
+    """Lê uma linha (sem CR/LF); devolve None se o tempo acabar antes"""
+    line = bytearray()
+    deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+    while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+        if not uart.any():
+            time.sleep_ms(1)
+            continue
+        c = uart.read(1)[0]
+        if c == 10:  # \n
+            return line.decode("utf-8", "ignore").strip()
+        line.append(c)
+    return None
+
+def read_response(uart, timeout_ms=AT_TIMEOUT_MS):
+    """
+        Lê a resposta de um comando AT até "OK" ou "ERROR" (ou o tempo
+        acabar). Devolve (ok, linhas), sem esperar mais que o necessário.
+    """
+    lines = []
+    deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+    while True:
+        left = time.ticks_diff(deadline, time.ticks_ms())
+        if left <= 0:
+            return False, lines
+        line = read_line(uart, left)
+        if line is None:
+            return False, lines
+        if not line:
+            continue
+        if line == "OK":
+            return True, lines
+        if line.startswith("ERROR") or line.startswith("FAIL"):
+            lines.append(line)
+            return False, lines
+        lines.append(line)
+
+def send_at_command(uart, command, timeout_ms=AT_TIMEOUT_MS):
+    """Envia um comando AT e devolve (ok, linhas da resposta)"""
     print(f"Enviando: {command}")
-    uart.write(command + '\r\n')
-    time.sleep(1)  # Espera pela resposta
-    
-    if uart.any():
-        response = uart.read().decode('utf-8')
-        print(f"Resposta: {response}")
-        return response
+    discard_input(uart)
+    uart.write(command + "\r\n")
+    ok, lines = read_response(uart, timeout_ms)
+    print(f"Resposta: {' | '.join(lines) if lines else ''}{' OK' if ok else ' (sem OK)'}")
+    return ok, lines
+
+def probe_baud(rates=PROBE_RATES):
+    """
+        Procura a velocidade em que o HC-05 responde "AT". Devolve
+        (velocidade, uart) ou (None, None) se ele não respondeu.
+    """
+    for baud in rates:
+        uart = open_uart(baud)
+        discard_input(uart)
+        uart.write("AT\r\n")
+        ok, _ = read_response(uart)
+        if ok:
+            print(f"HC-05 respondeu a {baud} baud")
+            return baud, uart
+    return None, None
+
+def get_uart_baud(uart):
+    """Velocidade do modo de dados configurada no HC-05 (AT+UART?)"""
+    ok, lines = send_at_command(uart, "AT+UART?")
+    if not ok:
+        return None
+    for line in lines:
+        # Resposta: +UART:115200,0,0
+        if line.startswith("+UART:"):
+            return int(line[6:].split(",")[0])
     return None
 
-def configure_hc05(new_name="BitDogLab"):
-    """Configura o módulo HC-05"""
+def set_uart_baud(uart, baud):
+    """
+        Configura a velocidade do modo de dados (AT+UART=baud,0,0: 1 stop
+        bit, sem paridade) e confere lendo de volta. Ela vale a partir da
+        próxima vez que o HC-05 ligar no modo de dados.
+    """
+    if baud not in BAUD_RATES:
+        raise ValueError(f"Velocidade não suportada: {baud}")
+    ok, _ = send_at_command(uart, f"AT+UART={baud},0,0")
+    return ok and get_uart_baud(uart) == baud
+
+def throughput_test(uart, nbytes=TEST_BYTES, block=TEST_BLOCK, timeout_ms=TEST_TIMEOUT_MS):
+    """
+        Mede a vazão real do link no modo de dados: envia blocos e espera
+        o eco de cada um (aplicativo ou terminal Bluetooth com eco ligado
+        do outro lado). Compara com o máximo teórico da velocidade.
+    """
+    pattern = bytes(33 + i % 94 for i in range(block))
+    echo = bytearray(block)
+    sent = received = errors = 0
+    discard_input(uart)
+    start = time.ticks_ms()
+    while sent < nbytes:
+        uart.write(pattern)
+        sent += block
+        got = 0
+        deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+        while got < block and time.ticks_diff(deadline, time.ticks_ms()) > 0:
+            n = uart.any()
+            if not n:
+                time.sleep_ms(1)
+                continue
+            data = uart.read(min(n, block - got))
+            echo[got:got + len(data)] = data
+            got += len(data)
+        received += got
+        if got < block:
+            break  # sem eco: ninguém do outro lado
+        if echo != pattern:
+            errors += 1
+    elapsed_ms = max(1, time.ticks_diff(time.ticks_ms(), start))
+    result = {
+        "sent": sent,
+        "received": received,
+        "errors": errors,
+        "ms": elapsed_ms,
+        # Ida e volta: cada byte atravessa o link duas vezes
+        "bytes_per_s": 2 * received * 1000 // elapsed_ms,
+        "ok": received == sent and not errors,
+    }
+    print(f"Vazão: {result['bytes_per_s']} bytes/s, {received}/{sent} bytes de volta, {errors} blocos com erro")
+    return result
+
+def verify_link(baud=None):
+    """Testa o link na velocidade salva (HC-05 no modo de dados, pareado)"""
+    baud = baud or load_baud()
+    uart = open_uart(baud)
+    result = throughput_test(uart)
+    # 10 bits por byte (start + 8 + stop); como cada bloco espera o seu
+    # eco, o máximo é baud / 10 bytes/s somando os dois sentidos
+    result["baud"] = baud
+    result["efficiency_pct"] = result["bytes_per_s"] * 10 * 100 // baud
+    print(f"{baud} baud: {result['efficiency_pct']}% do máximo teórico")
+    return result
+
+def configure_hc05(new_name="BitDogLab", baud=TARGET_BAUD):
+    """Configura o módulo HC-05: nome e velocidade do modo de dados"""
     print("\nIniciando configuração do HC-05...")
     print("Certifique-se que o módulo está em modo AT (LED piscando lentamente)")
-    
-    # Testa comunicação
-    if not send_at_command("AT"):
+
+    # Descobre em que velocidade o módulo responde
+    at_baud, uart = probe_baud()
+    if uart is None:
         print("❌ Erro: Módulo não respondeu. Verifique se está em modo AT")
         return False
-    
+
     # Configura o nome
-    if not send_at_command(f"AT+NAME={new_name}"):
-        print("❌ Erro: Falha ao configurar nome")
-        return False
-    
+    if new_name:
+        ok, _ = send_at_command(uart, f"AT+NAME={new_name}")
+        if not ok:
+            print("❌ Erro: Falha ao configurar nome")
+            return False
+
+    # Configura a velocidade e salva para o modo HC-05
+    if baud:
+        if not set_uart_baud(uart, baud):
+            print(f"❌ Erro: Falha ao configurar {baud} baud")
+            return False
+        save_baud(baud)
+
     print("\n✅ Configuração concluída!")
     print(f"Nome configurado para: {new_name}")
+    print(f"Modo AT encontrado a {at_baud} baud")
+    print(f"Velocidade do modo de dados: {load_baud()} baud")
     print("\nAgora você pode:")
     print("1. Desligar a placa")
     print("2. Reconectar o HC-05 normalmente (sem o modo AT)")
     print("3. O módulo deve aparecer com o novo nome")
-    
+    print("4. Com o aplicativo conectado ecoando os dados, rode verify_link() para testar a vazão")
+
     return True
 
 # Executa a configuração
 if __name__ == '__main__':
-    # Você pode mudar o nome aqui
-    configure_hc05("BitDogLab")
+    # Você pode mudar o nome e a velocidade aqui
+    configure_hc05("BitDogLab", TARGET_BAUD)
@@ -0,0 +1,121 @@
+# Imports
+from micropython import const
+from hardware import (
+    NUM_LEDS,
+    matrix,
+    led_r, led_g, led_b,
+    buzzer, buzzer2, sound
+)
+
+# Compact framed command protocol, enabled per connection with "@bin".
+#
+# Frame layout (all values are bytes):
+#   MAGIC | opcode | payload length | payload... | checksum
+# The checksum is the XOR of opcode, length and every payload byte.
+MAGIC = const(0xA5)
+HEADER_SIZE = const(3)
+MAX_PAYLOAD = const(255)
+
+# Opcodes
+OP_SET_PIXEL = const(0x01)  # n * (index, r, g, b), shown on the next matrix frame
+OP_SET_FRAME = const(0x02)  # NUM_LEDS * (r, g, b), in physical pixel order
+OP_SET_RGB = const(0x03)    # r, g, b (0-255)
+OP_TONE = const(0x04)       # buzzer (0/1), freq hi, freq lo, volume hi, volume lo
+OP_STOP = const(0x05)       # no payload: turns matrix, RGB led and buzzers off
+OP_MELODY = const(0x06)     # n * (freq hi, freq lo, ms hi, ms lo), appended to the melody
+
+# Total frame size for a given payload length
+def frame_size(length):
+    return HEADER_SIZE + length + 1
+
+def checksum(frame, length):
+    value = frame[1] ^ frame[2]
+    for i in range(HEADER_SIZE, HEADER_SIZE + length):
+        value ^= frame[i]
+    return value
+
+# Builds a frame (used by host tools and tests of the app side)
+def encode(opcode, payload=b""):
+    length = len(payload)
+    if length > MAX_PAYLOAD:
+        raise ValueError("Payload too long")
+    frame = bytearray(frame_size(length))
+    frame[0] = MAGIC
+    frame[1] = opcode
+    frame[2] = length
+    frame[HEADER_SIZE:HEADER_SIZE + length] = payload
+    frame[-1] = checksum(frame, length)
+    return frame
+
+def _set_pwm(pwm, freq, volume):
+    if freq and volume:
+        pwm.freq(freq)
+        pwm.duty_u16(volume)
+    else:
+        pwm.duty_u16(0)
+
+# Validates a complete frame and runs it directly on the hardware
+def execute(frame):
+    if frame[0] != MAGIC:
+        raise ValueError("Bad frame")
+    opcode = frame[1]
+    length = frame[2]
+    if len(frame) != frame_size(length):
+        raise ValueError("Bad frame length")
+    if frame[-1] != checksum(frame, length):
+        raise ValueError("Bad checksum")
+    p = HEADER_SIZE
+
+    if opcode == OP_SET_PIXEL:
+        if length % 4:
+            raise ValueError("Bad pixel payload")
+        # Every index is checked first: a rejected frame changes nothing
+        for i in range(p, p + length, 4):
+            if frame[i] >= NUM_LEDS:
+                raise ValueError("Pixel out of range")
+        for i in range(p, p + length, 4):
+            matrix.set(frame[i], frame[i + 1], frame[i + 2], frame[i + 3])
+        matrix.write()
+
+    elif opcode == OP_SET_FRAME:
+        if length != NUM_LEDS * 3:
+            raise ValueError("Bad frame payload")
+        matrix.blit(frame, p)
+        matrix.write()
+
+    elif opcode == OP_SET_RGB:
+        if length != 3:
+            raise ValueError("Bad RGB payload")
+        # 0-255 -> 0-65535
+        led_r.duty_u16(frame[p] * 257)
+        led_g.duty_u16(frame[p + 1] * 257)
+        led_b.duty_u16(frame[p + 2] * 257)
+
+    elif opcode == OP_TONE:
+        if length != 5:
+            raise ValueError("Bad tone payload")
+        # A held tone replaces whatever the scheduler was playing there
+        sound.cancel(1 if frame[p] else 0)
+        _set_pwm(
+            buzzer2 if frame[p] else buzzer,
+            (frame[p + 1] << 8) | frame[p + 2],
+            (frame[p + 3] << 8) | frame[p + 4]
+        )
+
+    elif opcode == OP_STOP:
+        matrix.clear()
+        matrix.show()
+        led_r.duty_u16(0); led_g.duty_u16(0); led_b.duty_u16(0)
+        sound.cancel()
+
+    elif opcode == OP_MELODY:
+        if length % 4:
+            raise ValueError("Bad melody payload")
+        melody = sound.melody
+        if melody.length + length // 4 > melody.size:
+            raise ValueError("Melody full")
+        for i in range(p, p + length, 4):
+            melody.add((frame[i] << 8) | frame[i + 1], (frame[i + 2] << 8) | frame[i + 3])
+
+    else:
+        raise ValueError("Unknown opcode")
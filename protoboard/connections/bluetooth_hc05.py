@@ -1,60 +1,81 @@
 # Imports
+import time
 from machine import UART
 from hardware import clear_oled
+# Batched matrix writes and queued tones, available to exec() commands
+from hardware import matrix, sound
+from inputs import events, press, BUTTON_B
+from telemetry import heap
+from profiler import prof, UART_READ
+from connections.session import Session
+from connections.framing import LineFramer
+from config.hc05 import load_baud
 
-# UART Configuration for HC-05
-uart = UART(0, baudrate=9600)
-uart.init(9600, bits=8, parity=None, stop=1)
+# Sleep between UART checks when no data is waiting (ms)
+IDLE_SLEEP_MS = 2
 
-# Executes received command and sends status
-def process_command(cmd):
-    try:
-        # Remove extra characters and run command
-        cmd = cmd.strip()
-        if cmd:
-            exec(cmd)
-            uart.write("OK\r\n")
-    except Exception as e:
-        # Send error message back
-        error_msg = f"Error: {str(e)}\r\n"
-        uart.write(error_msg.encode())
+# UART for HC-05, opened when the mode starts
+uart = None
+
+# UART Configuration for HC-05, at the speed saved by config/hc05.py
+# (9600, the factory setting, until it is raised there)
+def open_uart(baud=None):
+    global uart
+    if baud is None:
+        baud = load_baud()
+    uart = UART(0, baudrate=baud)
+    uart.init(baud, bits=8, parity=None, stop=1)
+    print(f"HC-05 UART at {baud} baud")
+    return uart
 
 # Main loop: listens for incoming commands via Bluetooth/UART
-def bluetooth_hc05():
+def bluetooth_hc05(baud=None):
     clear_oled()
-    # State tracking: True if we are currently receiving data/connected
-    is_connected = False
+    open_uart(baud)
+    # Command state for this connection (text/binary mode)
+    session = Session(uart.write, globals())
     
     # Initial status message
     print("System started. UART listening.")
     print("Waiting connection...")
     uart.write("System started\r\n")
     
-    # Buffer to store multi-character commands
-    buffer = ''
+    # Preallocated buffer that splits received bytes into commands
+    framer = LineFramer()
+    
+    # Button B goes back to the menu
+    events.start()
+    events.clear()
     
     while True:
         
-        if uart.any(): # Command received
-                
-            # Read and process commands 
-            try:
-                # Read one character at a time
-                char = uart.read(1).decode('utf-8')
-                
-                # If finds a new line, process the command
-                if char in ('\n', '\r'):
-                    if buffer.strip():
-                        process_command(buffer)
-                    buffer = ''
-                else:
-                    buffer += char
-                    
-            except Exception as e:
-                # Handle unexpected read/decode errors
-                print(f"UART Read Error: {e}")
-                uart.write(f"Read Error: {str(e)}\r\n")
-                buffer = ''
+        if events.take(press(BUTTON_B)):
+            print("Leaving HC-05 mode.")
+            session.flush()
+            session.close()
+            return
+        
+        available = uart.any()
+        if not available:
+            # Input drained: acknowledge pending sequenced commands
+            session.flush()
+            # Idle time: the GC policy may collect here
+            heap.idle()
+            # Nothing received: let the CPU rest instead of spinning
+            time.sleep_ms(IDLE_SLEEP_MS)
+            continue
+        
+        # Read everything the UART has and process complete commands
+        try:
+            start = prof.begin()
+            framer.fill(uart, available)
+            prof.end(UART_READ, start)
+            framer.process(session)
+        except Exception as e:
+            # Handle unexpected read/decode errors
+            print(f"UART Read Error: {e}")
+            uart.write(f"Read Error: {str(e)}\r\n")
+            framer.reset()
                 
 
 if __name__ == '__main__':
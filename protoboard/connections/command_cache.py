@@ -0,0 +1,103 @@
+# Imports
+from collections import OrderedDict
+
+# Default limits, sized for the Pico heap
+CACHE_MAX_ENTRIES = 64
+CACHE_MAX_BYTES = 4096
+
+# Rough heap cost of one cached entry on top of the command text
+# (dict slot, key string header and a small code object)
+ENTRY_OVERHEAD = 96
+
+# LRU cache of compiled command code objects, keyed by command text.
+# The app repeats the same lines (np[3]=(255,0,0), buzzer.duty_u16(0)...)
+# thousands of times per session, so compiling each one only once saves
+# the parser/compiler run on every exec.
+class CommandCache:
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Estimated heap cost of caching a command
+    @staticmethod
+    def cost(command):
+        return len(command) + ENTRY_OVERHEAD
+
+    # Turns caching on or off at runtime ("@cache on|off"); while off
+    # every command is compiled again, which is the baseline to compare
+    # the cache against
+    def on(self):
+        self.enabled = True
+
+    def off(self):
+        self.enabled = False
+        self.clear()
+
+    # Returns the compiled code object for command, compiling on a miss
+    def compile(self, command):
+        if not self.enabled:
+            self.misses += 1
+            return compile(command, "<cmd>", "exec")
+
+        entries = self._entries
+        code = entries.get(command)
+        if code is not None:
+            self.hits += 1
+            # Move to the most recently used end
+            del entries[command]
+            entries[command] = code
+            return code
+
+        self.misses += 1
+        code = compile(command, "<cmd>", "exec")
+
+        # Commands bigger than the budget are run but never cached
+        size = self.cost(command)
+        if size > self.max_bytes:
+            return code
+
+        while entries and (len(entries) >= self.max_entries
+                           or self._bytes + size > self.max_bytes):
+            oldest = next(iter(entries))
+            del entries[oldest]
+            self._bytes -= self.cost(oldest)
+            self.evictions += 1
+
+        entries[command] = code
+        self._bytes += size
+        return code
+
+    # Compiles (or reuses) and executes command inside scope
+    def run(self, command, scope):
+        exec(self.compile(command), scope)
+
+    # Drops every cached entry (keeps the counters)
+    def clear(self):
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Counters used to compare command throughput with and without the cache
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
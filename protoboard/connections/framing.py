@@ -0,0 +1,138 @@
+# Imports
+from micropython import const
+from connections.binary_protocol import MAGIC, HEADER_SIZE, frame_size
+
+# Kinds of message returned by LineFramer.next()
+NONE = const(0)      # no complete message buffered yet
+LINE = const(1)      # text line (without CR/LF)
+FRAME = const(2)     # binary frame (see binary_protocol)
+OVERFLOW = const(3)  # line longer than the buffer, it was dropped
+
+FRAMER_SIZE = 512
+
+# Splits incoming bytes into CR/LF terminated lines and binary frames.
+#
+# Bytes are copied in chunks into one preallocated bytearray, messages are
+# returned as memoryview slices of it, so nothing is allocated per byte.
+# The unread tail is moved back to the start of the buffer only when more
+# room is needed, which keeps every message contiguous.
+class LineFramer:
+
+    def __init__(self, size=FRAMER_SIZE):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # first unread byte
+        self.end = 0    # end of received data
+        self.scan = 0   # bytes before this were already checked for CR/LF
+        self.msg_start = 0
+        self.msg_end = 0
+        # After an overflow, the rest of that line is discarded
+        self.skip = False
+
+    def reset(self):
+        self.start = self.end = self.scan = 0
+        self.skip = False
+
+    # Free bytes at the end of the buffer, compacting it if needed
+    def space(self):
+        start = self.start
+        if start and self.end == len(self.buffer):
+            buf = self.buffer
+            n = self.end - start
+            for i in range(n):
+                buf[i] = buf[start + i]
+            self.start = 0
+            self.end = n
+            self.scan -= start
+        return len(self.buffer) - self.end
+
+    # Reads up to nbytes from a stream with readinto() (UART)
+    def fill(self, stream, nbytes):
+        n = min(nbytes, self.space())
+        if n:
+            n = stream.readinto(self.view[self.end:self.end + n], n) or 0
+            self.end += n
+        return n
+
+    # Copies data[offset:] into the buffer, returns the new offset (sockets)
+    def feed(self, data, offset=0):
+        n = min(len(data) - offset, self.space())
+        if n:
+            self.buffer[self.end:self.end + n] = memoryview(data)[offset:offset + n]
+            self.end += n
+        return offset + n
+
+    # Finds the next complete message. Binary frames are only recognized
+    # at the start of a message and when binary is enabled.
+    def next(self, binary=False):
+        buf = self.buffer
+        start = self.start
+        end = self.end
+
+        while start < end:
+            if binary and buf[start] == MAGIC:
+                if end - start < HEADER_SIZE:
+                    break
+                size = frame_size(buf[start + 2])
+                if end - start < size:
+                    break
+                self.msg_start = start
+                self.msg_end = start + size
+                self.start = self.scan = start + size
+                return FRAME
+
+            i = max(self.scan, start)
+            while i < end:
+                c = buf[i]
+                if c == 10 or c == 13:
+                    break
+                i += 1
+
+            if i == end:
+                self.start = start
+                self.scan = end
+                # Buffer full and still no line ending: drop it. Only
+                # the first overflow of a line is reported, the rest of
+                # it is discarded silently up to its line ending.
+                if start == 0 and end == len(buf):
+                    reported = self.skip
+                    self.reset()
+                    self.skip = True
+                    return NONE if reported else OVERFLOW
+                return NONE
+
+            if self.skip:
+                self.skip = False
+            elif i > start:
+                self.msg_start = start
+                self.msg_end = i
+                self.start = self.scan = i + 1
+                return LINE
+
+            # Empty line (e.g. the LF of a CR LF pair) or end of a dropped one
+            start = i + 1
+
+        self.start = self.scan = start
+        if start == end:
+            self.start = self.end = self.scan = 0
+        return NONE
+
+    # Last message returned by next()
+    def message(self):
+        return self.view[self.msg_start:self.msg_end]
+
+    def text(self):
+        return str(self.message(), "utf-8", "ignore")
+
+    # Hands every complete message to the session
+    def process(self, session):
+        while True:
+            kind = self.next(session.binary)
+            if kind == LINE:
+                session.handle_line(self.text())
+            elif kind == FRAME:
+                session.handle_frame(self.message())
+            elif kind == OVERFLOW:
+                session.error("Line too long")
+            else:
+                return
@@ -0,0 +1,252 @@
+# Imports
+import os
+import json
+import binascii
+from collections import OrderedDict
+
+# Scripts live in this flash directory, one file each, plus an index
+SCRIPT_DIR = "scripts"
+INDEX_NAME = "index.json"
+UPLOAD_NAME = "upload.tmp"
+
+# Flash budget of the store and flash always left free for the board
+STORE_MAX_BYTES = 32 * 1024
+FLASH_RESERVE = 64 * 1024
+
+# Largest script accepted (it is compiled in RAM)
+SCRIPT_MAX_BYTES = 8 * 1024
+NAME_MAX = 24
+
+# Compiled scripts kept in RAM
+CODE_CACHE_ENTRIES = 4
+
+# CRC-32 of a script as 8 hex digits: the app computes it over the
+# uploaded lines, each followed by "\n", to know if the board has it
+def script_hash(data, crc=0):
+    return binascii.crc32(data, crc)
+
+def format_hash(crc):
+    return "%08x" % (crc & 0xFFFFFFFF)
+
+# A script being received, written to a temporary file line by line
+class Upload:
+
+    def __init__(self, name, expected, path):
+        self.name = name
+        self.expected = expected
+        self.path = path
+        self.crc = 0
+        self.size = 0
+        self.file = open(path, "w")
+
+    def write(self, line):
+        data = line + "\n"
+        self.size += len(data)
+        if self.size > SCRIPT_MAX_BYTES:
+            raise ValueError(f"Script larger than {SCRIPT_MAX_BYTES} bytes")
+        self.crc = script_hash(data.encode(), self.crc)
+        self.file.write(data)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+# Scripts uploaded once by the app ("@script put") and run by name
+# ("@run"), so setup code is not sent again at every connection.
+#
+# Each index entry is [crc, size, last use]. The least recently used
+# scripts are removed when the store would pass STORE_MAX_BYTES or leave
+# less than FLASH_RESERVE bytes of flash. MicroPython cannot write .mpy
+# files on the board, so scripts are kept as source and their compiled
+# code objects are cached in RAM (CODE_CACHE_ENTRIES, LRU). Uses are
+# counted in RAM and saved with the index when a script is stored or
+# removed, to spare the flash.
+class ScriptStore:
+
+    def __init__(self, directory=SCRIPT_DIR, max_bytes=STORE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index = None   # loaded on first use
+        self.clock = 0      # last use counter handed out
+        self.code = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, name):
+        return f"{self.directory}/{name}"
+
+    def _load(self):
+        if self.index is not None:
+            return self.index
+        try:
+            os.mkdir(self.directory)
+        except OSError:
+            pass  # already there
+        try:
+            with open(self.path(INDEX_NAME)) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        for entry in self.index.values():
+            if entry[2] > self.clock:
+                self.clock = entry[2]
+        return self.index
+
+    def _save(self):
+        temp = self.path(INDEX_NAME + ".tmp")
+        with open(temp, "w") as f:
+            json.dump(self.index, f)
+        self._replace(temp, self.path(INDEX_NAME))
+
+    @staticmethod
+    def _replace(source, target):
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        os.rename(source, target)
+
+    def _flash_free(self):
+        stat = os.statvfs(self.directory)
+        return stat[0] * stat[4]  # block size * free blocks
+
+    @staticmethod
+    def check_name(name):
+        if not name or len(name) > NAME_MAX:
+            raise ValueError(f"Bad script name {name}")
+        for c in name:
+            if not (c.isalpha() or c.isdigit() or c == "_"):
+                raise ValueError(f"Bad script name {name}")
+
+    # True when the board has the script with this crc (8 hex digits)
+    def has(self, name, crc):
+        entry = self._load().get(name)
+        return entry is not None and entry[0] == crc
+
+    def entries(self):
+        return self._load().items()
+
+    # Starts receiving a script, finished by commit()
+    def begin(self, name, crc):
+        self.check_name(name)
+        self._load()
+        return Upload(name, crc, self.path(UPLOAD_NAME))
+
+    def abort(self, upload):
+        upload.close()
+        try:
+            os.remove(upload.path)
+        except OSError:
+            pass
+
+    # Checks and stores a received script, returns its size
+    def commit(self, upload):
+        upload.close()
+        try:
+            crc = format_hash(upload.crc)
+            if upload.expected != crc:
+                raise ValueError(f"Script hash mismatch ({crc})")
+            with open(upload.path) as f:
+                code = compile(f.read(), upload.name, "exec")
+            self._make_room(upload.name, upload.size)
+        except Exception:
+            self.abort(upload)
+            raise
+        name = upload.name
+        self._replace(upload.path, self.path(name + ".py"))
+        self.clock += 1
+        self.index[name] = [crc, upload.size, self.clock]
+        self._save()
+        self._cache(name, code)
+        return upload.size
+
+    # Removes least recently used scripts until `size` more bytes fit
+    def _make_room(self, name, size):
+        index = self.index
+        while True:
+            used = 0
+            oldest = None
+            for other, entry in index.items():
+                if other == name:
+                    continue
+                used += entry[1]
+                if oldest is None or entry[2] < index[oldest][2]:
+                    oldest = other
+            # The upload itself is already on the flash
+            if used + size <= self.max_bytes and self._flash_free() >= FLASH_RESERVE:
+                return
+            if oldest is None:
+                raise ValueError("No room for the script")
+            self._delete(oldest)
+            self.evictions += 1
+
+    def _delete(self, name):
+        try:
+            os.remove(self.path(name + ".py"))
+        except OSError:
+            pass
+        del self.index[name]
+        if name in self.code:
+            del self.code[name]
+
+    def remove(self, name):
+        if name not in self._load():
+            raise ValueError(f"No script {name}")
+        self._delete(name)
+        self._save()
+
+    def _cache(self, name, code):
+        cache = self.code
+        if name in cache:
+            del cache[name]
+        elif len(cache) >= CODE_CACHE_ENTRIES:
+            del cache[next(iter(cache))]
+        cache[name] = code
+
+    # Compiled code of a stored script
+    def load(self, name):
+        entry = self._load().get(name)
+        if entry is None:
+            raise ValueError(f"No script {name}")
+        self.clock += 1
+        entry[2] = self.clock
+        code = self.code.get(name)
+        if code is not None:
+            self.hits += 1
+            # Move to the most recently used end
+            del self.code[name]
+            self.code[name] = code
+            return code
+        self.misses += 1
+        with open(self.path(name + ".py")) as f:
+            code = compile(f.read(), name, "exec")
+        self._cache(name, code)
+        return code
+
+    # Runs a script in scope, with its arguments in `args`
+    def run(self, name, scope, args=()):
+        code = self.load(name)
+        scope["args"] = args
+        exec(code, scope)
+
+    def stats(self):
+        return {
+            "scripts": len(self._load()),
+            "bytes": sum(entry[1] for entry in self.index.values()),
+            "compiled": len(self.code),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+# Values of "@run" arguments: integers when they parse as one
+def parse_args(words):
+    args = []
+    for word in words:
+        try:
+            args.append(int(word))
+        except ValueError:
+            args.append(word)
+    return args
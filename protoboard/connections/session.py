@@ -0,0 +1,351 @@
+# Imports
+import time
+from connections.command_cache import CommandCache
+from connections.script_store import ScriptStore, parse_args
+from connections import binary_protocol
+from hardware import sound
+from telemetry import heap
+from profiler import prof, EXEC, FRAME, REPLY
+
+# Compiled code objects shared by every connection
+command_cache = CommandCache()
+
+# Scripts kept on the flash, run with "@run"
+script_store = ScriptStore()
+
+# Default number of sequenced commands covered by one "ACK"
+ACK_WINDOW = 8
+
+# Largest frequency (Hz) and duration (ms) of a melody note
+NOTE_MAX = 0xFFFF
+
+# (frequency, duration) of a "f:ms" melody note
+def parse_note(note):
+    sep = note.find(":")
+    try:
+        freq = int(note[:sep]) if sep > 0 else -1
+        ms = int(note[sep + 1:]) if sep > 0 else -1
+    except ValueError:
+        freq = ms = -1
+    if not (0 <= freq <= NOTE_MAX and 0 <= ms <= NOTE_MAX):
+        raise ValueError(f"Bad note {note}")
+    return freq, ms
+
+# Per-connection command state shared by the HC-05 and WiFi transports.
+#
+# Text lines are Python commands run with exec(). Lines starting with "@"
+# are control commands handled by the board itself; old firmware answers
+# them with an error, which is how the app detects that a feature is
+# missing and keeps using plain text.
+class Session:
+
+    def __init__(self, write, scope, newline="\r\n", error_prefix="Error: "):
+        # write(bytes) sends a reply back to the app
+        self.write = write
+        # Globals used by exec(), so commands keep their variables
+        self.scope = scope
+        self.newline = newline
+        self.error_prefix = error_prefix
+        self.ok = ("OK" + newline).encode()
+        # Binary frames are only accepted after "@bin"
+        self.binary = False
+        # Sequenced mode ("@ack"): 0 = off, else commands per ACK
+        self.window = 0
+        self.last_seq = -1  # last sequenced command processed
+        self.pending = 0    # processed commands not acknowledged yet
+        # Script being received ("@script put"), None otherwise
+        self.upload = None
+
+    # Sends bytes to the app
+    def send(self, data):
+        start = prof.begin()
+        self.write(data)
+        prof.end(REPLY, start)
+
+    def reply(self, text):
+        self.send((text + self.newline).encode())
+
+    def error(self, e):
+        self.reply(f"{self.error_prefix}{str(e)}")
+
+    # Acknowledges every sequenced command processed so far
+    def flush(self):
+        if self.pending:
+            self.pending = 0
+            self.reply(f"ACK {self.last_seq}")
+
+    # End of the connection: drops a script left half uploaded
+    def close(self):
+        if self.upload is not None:
+            script_store.abort(self.upload)
+            self.upload = None
+
+    # Runs one received text line
+    def handle_line(self, line):
+        # While a script is uploaded its lines are stored, not run
+        if self.upload is not None and not line.startswith("@script"):
+            self.store_line(line)
+            return
+        line = line.strip()
+        if not line:
+            return
+        if line[0] == "@":
+            try:
+                self.handle_control(line[1:].split())
+            except Exception as e:
+                self.error(e)
+            return
+        
+        # In sequenced mode lines look like "<seq> <command>"
+        if self.window:
+            sep = line.find(" ")
+            if sep > 0 and line[:sep].isdigit():
+                self.handle_sequenced(int(line[:sep]), line[sep + 1:])
+                return
+        
+        start = prof.begin()
+        try:
+            command_cache.run(line, self.scope)
+        except Exception as e:
+            self.error(e)
+            return
+        prof.end(EXEC, start)
+        self.send(self.ok)
+
+    # Runs a sequenced command: no "OK", one cumulative "ACK <seq>" per
+    # window (or when the transport runs out of input), "ERR <seq> <msg>"
+    # as soon as a command fails
+    def handle_sequenced(self, seq, command):
+        start = prof.begin()
+        try:
+            command_cache.run(command, self.scope)
+        except Exception as e:
+            self.flush()
+            self.last_seq = seq
+            self.reply(f"ERR {seq} {str(e)}")
+            return
+        prof.end(EXEC, start)
+        self.last_seq = seq
+        self.pending += 1
+        if self.pending >= self.window:
+            self.flush()
+
+    # Adds a line (indentation kept) to the script being uploaded
+    def store_line(self, line):
+        try:
+            self.upload.write(line)
+        except Exception as e:
+            script_store.abort(self.upload)
+            self.upload = None
+            self.error(e)
+            return
+        self.send(self.ok)
+
+    # Runs one complete binary frame
+    def handle_frame(self, frame):
+        start = prof.begin()
+        try:
+            binary_protocol.execute(frame)
+        except Exception as e:
+            self.error(e)
+            return
+        prof.end(FRAME, start)
+        self.send(self.ok)
+
+    # Board-side commands ("@name arg...")
+    def handle_control(self, args):
+        name = args[0] if args else ""
+        if name == "bin":
+            self.binary = True
+            self.reply("OK BIN")
+        elif name == "text":
+            self.binary = False
+            self.reply("OK TEXT")
+        elif name == "ack":
+            self.flush()
+            if len(args) > 1 and args[1] == "off":
+                self.window = 0
+                self.reply("OK ACK OFF")
+            else:
+                self.window = max(1, int(args[1])) if len(args) > 1 else ACK_WINDOW
+                self.last_seq = -1
+                self.reply(f"OK ACK {self.window}")
+        elif name == "melody":
+            self.handle_melody(args[1:])
+        elif name == "cache":
+            self.handle_cache(args[1:])
+        elif name == "gc":
+            self.handle_gc(args[1:])
+        elif name == "prof":
+            self.handle_prof(args[1:])
+        elif name == "script":
+            self.handle_script(args[1:])
+        elif name == "run":
+            self.run_script(args[1:])
+        else:
+            self.error(f"Unknown command @{name}")
+
+    # Compiled command cache ("@cache <action>"):
+    #   on / off          uses the cache or compiles every command again
+    #   stats             entries, bytes and hit/miss counters (default)
+    #   clear             drops the cached code and zeroes the counters
+    def handle_cache(self, args):
+        action = args[0] if args else "stats"
+        if action == "on":
+            command_cache.on()
+            self.reply("OK CACHE ON")
+        elif action == "off":
+            command_cache.off()
+            self.reply("OK CACHE OFF")
+        elif action == "stats":
+            self.reply("CACHE " + " ".join(f"{k}={v}" for k, v in command_cache.stats().items()))
+        elif action == "clear":
+            command_cache.clear()
+            command_cache.reset_stats()
+            self.reply("OK CACHE CLEAR")
+        else:
+            raise ValueError(f"Unknown cache action {action}")
+
+    # Heap diagnostics ("@gc <action>"):
+    #   stats             heap and collection counters (default)
+    #   samples           the sampled heap history, oldest first
+    #   collect           collects now, replies with pause and bytes freed
+    #   policy <name>     default, idle or eager (see telemetry.py)
+    def handle_gc(self, args):
+        action = args[0] if args else "stats"
+        if action == "stats":
+            self.reply("GC " + " ".join(f"{k}={v}" for k, v in heap.stats().items()))
+        elif action == "samples":
+            now = time.ticks_ms()
+            for at_ms, free, alloc in heap.samples():
+                self.reply(f"GC {time.ticks_diff(now, at_ms)} {free} {alloc}")
+            self.reply(f"OK GC {heap.count}")
+        elif action == "collect":
+            freed = heap.collect()
+            self.reply(f"OK GC {heap.pause_us} {freed}")
+        elif action == "policy":
+            if len(args) > 1:
+                heap.set_policy(args[1])
+            self.reply(f"OK GC POLICY {heap.policy}")
+        else:
+            raise ValueError(f"Unknown gc action {action}")
+
+    # Scripts stored on the board ("@script <action> ..."):
+    #   put <name> <crc>  the next lines, up to "@script end", are the script
+    #   end               checks the crc, compiles and stores it
+    #   abort             drops the script being received
+    #   has <name> <crc>  whether the board already has that version
+    #   list              stored scripts with size and crc
+    #   del <name>        removes a script
+    def handle_script(self, args):
+        action = args[0] if args else "list"
+        if action == "put":
+            if len(args) < 3:
+                raise ValueError("Usage: @script put <name> <crc>")
+            if self.upload is not None:
+                script_store.abort(self.upload)
+            self.upload = script_store.begin(args[1], args[2].lower())
+            self.reply(f"OK SCRIPT PUT {args[1]}")
+        elif action == "end":
+            upload = self.upload
+            if upload is None:
+                raise ValueError("No script being uploaded")
+            self.upload = None
+            size = script_store.commit(upload)
+            self.reply(f"OK SCRIPT {upload.name} {size}")
+        elif action == "abort":
+            if self.upload is not None:
+                script_store.abort(self.upload)
+                self.upload = None
+            self.reply("OK SCRIPT ABORT")
+        elif action == "has":
+            if len(args) < 3:
+                raise ValueError("Usage: @script has <name> <crc>")
+            state = "READY" if script_store.has(args[1], args[2].lower()) else "MISSING"
+            self.reply(f"SCRIPT {state} {args[1]}")
+        elif action == "list":
+            count = 0
+            for name, entry in script_store.entries():
+                self.reply(f"SCRIPT {name} {entry[1]} {entry[0]}")
+                count += 1
+            self.reply(f"OK SCRIPT {count}")
+        elif action == "del":
+            if len(args) < 2:
+                raise ValueError("Usage: @script del <name>")
+            script_store.remove(args[1])
+            self.reply(f"OK SCRIPT DEL {args[1]}")
+        else:
+            raise ValueError(f"Unknown script action {action}")
+
+    # Runs a stored script ("@run <name> [args...]") in the scope of the
+    # text commands, with its arguments in `args`
+    def run_script(self, args):
+        if not args:
+            raise ValueError("Usage: @run <name> [args...]")
+        start = prof.begin()
+        script_store.run(args[0], self.scope, parse_args(args[1:]))
+        prof.end(EXEC, start)
+        self.send(self.ok)
+
+    # Hot path profiler ("@prof <action>"):
+    #   on / off          starts or stops recording spans
+    #   dump              per-span count, average, max and histogram (default)
+    #   reset             clears what was recorded
+    def handle_prof(self, args):
+        action = args[0] if args else "dump"
+        if action == "on":
+            prof.on()
+            self.reply("OK PROF ON")
+        elif action == "off":
+            prof.off()
+            self.reply("OK PROF OFF")
+        elif action == "dump":
+            spans = 0
+            for line in prof.lines():
+                self.reply(line)
+                spans += 1
+            self.reply(f"OK PROF {spans - 1}")
+        elif action == "reset":
+            prof.reset()
+            self.reply("OK PROF RESET")
+        else:
+            raise ValueError(f"Unknown prof action {action}")
+
+    # Melody stored and played by the board ("@melody <action> ..."):
+    #   new [volume]      empties the melody
+    #   add f:ms f:ms ... appends notes (frequency 0 is a rest)
+    #   play [buzzer]     starts it, replies with its length and duration
+    #   status            notes started so far
+    #   stop              cancels it
+    def handle_melody(self, args):
+        action = args[0] if args else "status"
+        melody = sound.melody
+        if action == "new":
+            sound.cancel()
+            melody.clear(int(args[1]) if len(args) > 1 else melody.volume)
+            self.reply("OK MELODY 0")
+        elif action == "add":
+            # Every note is checked before any is added: a rejected line
+            # leaves the melody as it was
+            notes = []
+            for note in args[1:]:
+                notes.append(parse_note(note))
+            if melody.length + len(notes) > melody.size:
+                raise ValueError("Melody full")
+            for freq, ms in notes:
+                melody.add(freq, ms)
+            self.reply(f"OK MELODY {melody.length}")
+        elif action == "play":
+            sound.play_melody(int(args[1]) if len(args) > 1 else 0)
+            self.reply(f"OK MELODY PLAY {melody.length} {melody.duration_ms()}")
+        elif action == "status":
+            progress = sound.melody_progress()
+            if progress is None:
+                self.reply(f"MELODY IDLE {melody.length}")
+            else:
+                self.reply(f"MELODY PLAYING {progress}/{melody.length}")
+        elif action == "stop":
+            sound.cancel()
+            self.reply("OK MELODY STOP")
+        else:
+            raise ValueError(f"Unknown melody action {action}")
@@ -1,13 +1,21 @@
 # Imports
 import network
-import socket
 import time
-import gc
+from collections import deque
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
 
 # Import all hardware components for exec() commands and feedback
 from hardware import (
-    led, update_oled, clear_oled
+    led, update_oled, clear_oled, scroll_oled, matrix, sound
 )
+from connections.session import Session, command_cache
+from connections.framing import LineFramer
+from inputs import events, press, BUTTON_B
+from telemetry import heap
+from profiler import prof, TCP_SEND
 
 # Network configuration
 AP_SSID = "BDL #001"  # Network name
@@ -15,6 +23,11 @@ AP_PASSWORD = "BDL001"    # Network password (min 8 chars)
 AP_IP = "192.168.4.1"        # Pico's static IP
 TCP_PORT = 8080
 
+MAX_CLIENTS = 4        # Simultaneous app connections (e.g. teacher + student)
+CLIENT_TIMEOUT_S = 30  # Idle time before a client is dropped
+STOP_TIMEOUT_S = 5     # Time given to the queued commands when stopping
+QUEUE_SIZE = 16        # Received chunks waiting for the hardware task
+
 # Creates an Acess Point (Pico becomes a router)
 def create_access_point():    
     print("Creating Access Point...")
@@ -39,109 +52,207 @@ def create_access_point():
     
     return AP_IP
 
-# Executes received command via TCP and sends status
-def process_tcp_command(command, client_socket):
+# Commands of every connected client go through this queue and are run
+# one at a time, in arrival order, by a single hardware task
+class HardwareQueue:
+
+    def __init__(self, size=QUEUE_SIZE):
+        self.size = size
+        self.items = deque((), size)
+        self.event = asyncio.Event()
+
+    def full(self):
+        return len(self.items) >= self.size
+
+    def empty(self):
+        return not self.items
+
+    # Waits for room (back pressure on fast clients) and adds an item
+    async def put(self, item):
+        while self.full():
+            await asyncio.sleep(0.005)
+        self.items.append(item)
+        self.event.set()
+
+    async def get(self):
+        while not self.items:
+            self.event.clear()
+            await self.event.wait()
+        return self.items.popleft()
+
+hardware_queue = None
+clients = 0
+
+# Tasks serving the connected clients, with their writers, so stopping
+# the server can close them
+client_tasks = {}
+
+# Id of the latest feedback task, older ones give up the OLED
+feedback_id = 0
+
+# Waiting screen shown while no client is connected
+def show_waiting():
+    update_oled([
+        "Conexao WiFi",
+        "-------------------",
+        f"Rede: {AP_SSID}",
+        f"Senha: {AP_PASSWORD}",
+        f"------------------",
+        "Aguardando",
+        "Conexao..."
+    ])
+
+# OLED/LED feedback for connects and disconnects, runs as a background
+# task so it never stalls the command stream
+async def connection_feedback(connected):
+    global feedback_id
+    feedback_id += 1
+    my_id = feedback_id
+    
+    update_oled([
+        "",
+        "---------------",
+        "Conexao Wifi",
+        "Recebida!" if connected else "Perdida!",
+        "---------------",
+        "",
+        ""
+    ])
+    
+    # LED blink
+    for _ in range(2 if connected else 3):
+        led.off(); await asyncio.sleep(0.1 if connected else 0.2)
+        led.on(); await asyncio.sleep(0.1 if connected else 0.2)
+    
+    await asyncio.sleep(2)
+    if my_id != feedback_id:
+        return # Newer feedback owns the screen
+    if clients:
+        clear_oled()
+    else:
+        show_waiting()
+
+# Runs the queued commands on the hardware
+async def hardware_worker(queue):
+    while True:
+        session, framer, writer, data = await queue.get()
+        if session is None:
+            return  # stop marker, after everything queued before it
+        if data is None:
+            session.close()
+            continue
+        try:
+            offset = 0
+            while offset < len(data):
+                offset = framer.feed(data, offset)
+                framer.process(session)
+            session.flush()
+            start = prof.begin()
+            await writer.drain()
+            prof.end(TCP_SEND, start)
+        except Exception as e:
+            print(f"Communication error: {e}")
+
+# Serves one app connection: reads data and queues it for the hardware
+async def handle_client(reader, writer):
+    global clients
+    client_address = writer.get_extra_info('peername')
     
-    command = command.strip()
-    if not command:
+    if clients >= MAX_CLIENTS:
+        print(f"Client refused (server full): {client_address}")
+        writer.close()
+        await writer.wait_closed()
         return
     
+    clients += 1
+    client_tasks[asyncio.current_task()] = writer
+    print(f"Client connected: {client_address} ({clients} active)")
+    asyncio.create_task(connection_feedback(True))
+    
+    session = Session(writer.write, globals(), "\n", "ERROR: ")
+    framer = LineFramer()
+    
     try:
-        exec(command)
-        response = "OK\n"
-        client_socket.send(response.encode())
+        while True:
+            data = await asyncio.wait_for(reader.read(1024), CLIENT_TIMEOUT_S)
+            if not data:
+                print("Client disconnected.")
+                break
+            await hardware_queue.put((session, framer, writer, data))
+    
+    except asyncio.TimeoutError:
+        print("Connection timeout.")
+    except asyncio.CancelledError:
+        print("Server stopped.")
     except Exception as e:
-        error_msg = f"ERROR: {str(e)}\n"
+        print(f"Communication error: {e}")
+    finally:
+        clients -= 1
+        client_tasks.pop(asyncio.current_task(), None)
+        # Closed by the worker, after the data still queued for it
+        await hardware_queue.put((session, None, writer, None))
         try:
-            client_socket.send(error_msg.encode())
-        except:
-            pass # Failed to send error
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
+        print(f"Connection closed: {client_address}")
+        print(f"Command cache: {command_cache.stats()}")
+        asyncio.create_task(connection_feedback(False))
+        heap.collect()
 
-# Main TCP server loop. Waits for connections and process commands
-def tcp_server(ip):    
+# Starts the server and keeps it running
+async def serve(ip):
+    global hardware_queue, clients
     print(f"Starting TCP server on {ip}:{TCP_PORT}")
     
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server_socket.bind(('0.0.0.0', TCP_PORT))
-    server_socket.listen(1)
+    hardware_queue = HardwareQueue()
+    clients = 0
+    client_tasks.clear()
+    worker = asyncio.create_task(hardware_worker(hardware_queue))
+    server = await asyncio.start_server(
+        handle_client, '0.0.0.0', TCP_PORT, backlog=MAX_CLIENTS
+    )
     
-    print("Server listening. Ready for app connection.")
+    print("Server listening. Ready for app connections.")
     
-    while True:
-        try:
-            client_socket, client_address = server_socket.accept()
-            print(f"Client connected: {client_address}")
-            update_oled([
-                "",
-                "---------------",
-                "Conexao Wifi",
-                "Recebida!",
-                "---------------",
-                "",
-                ""
-            ])
-            time.sleep(2)
-            clear_oled()
-
-            # Connection feedback (LED blink)
-            for _ in range(2): led.off(); time.sleep(0.1); led.on(); time.sleep(0.1)
-            
-            client_socket.settimeout(30)
-            buffer = ""
-            
+    # Button B stops the server and goes back to the menu
+    events.start()
+    events.clear()
+    
+    try:
+        while not events.take(press(BUTTON_B)):
+            # Idle time: the GC policy may collect here
+            if hardware_queue.empty():
+                heap.idle()
+            await asyncio.sleep(0.05)
+        print("Stopping TCP server.")
+    finally:
+        server.close()
+        # Clients still connected are stopped: each one queues its close
+        # marker, then the worker runs what is queued and exits
+        tasks = list(client_tasks)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
             try:
-                while True:
-                    data = client_socket.recv(1024)
-                    if not data:
-                        print("Client disconnected.")
-                        update_oled([
-                            "",
-                            "---------------",
-                            "Conexao Wifi",
-                            "Perdida!",
-                            "---------------",
-                            "",
-                            ""
-                        ])
-                        time.sleep(2)
-                        update_oled([
-                            "Conexao WiFi",
-                            "-------------------",
-                            
-                            f"Rede: {AP_SSID}",
-                            f"Senha: {AP_PASSWORD}",
-                            f"------------------",
-                            "Aguardando",
-                            "Conexao..."
-                        ])
-                        break
-                    
-                    text = data.decode('utf-8', 'ignore')
-                    
-                    for char in text:
-                        if char in ('\n', '\r'):
-                            if buffer.strip():
-                                process_tcp_command(buffer, client_socket)
-                            buffer = ""
-                        else:
-                            buffer += char
-            
-            except socket.timeout:
-                print("Connection timeout.")
-            except Exception as e:
-                print(f"Communication error: {e}")
-            finally:
-                client_socket.close()
-                print(f"Connection closed: {client_address}")
-                
-                # Disconnection feedback (LED blink)
-                for _ in range(3): led.off(); time.sleep(0.2); led.on(); time.sleep(0.2)
-                gc.collect()
-                
-        except Exception as e:
-            print(f"Server error: {e}")
-            time.sleep(1)
+                await task
+            except asyncio.CancelledError:
+                pass
+        await hardware_queue.put((None, None, None, None))
+        try:
+            await asyncio.wait_for(worker, STOP_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            worker.cancel()
+        await server.wait_closed()
+
+# Main TCP server loop. Waits for connections and process commands
+def tcp_server(ip):
+    try:
+        asyncio.run(serve(ip))
+    finally:
+        # Clears the scheduler state so the server can be started again
+        asyncio.new_event_loop()
 
 
 # Main function for WiFi connection, sets up AP and starts TCP server
@@ -166,15 +277,7 @@ def wifi():
         return
     
     # 3. Success Feedback
-    update_oled([
-        "Conexao WiFi",
-        "-------------------",
-        f"Rede: {AP_SSID}",
-        f"Senha: {AP_PASSWORD}",
-        f"------------------",
-        "Aguardando",
-        "Conexao..."
-    ])
+    show_waiting()
     
     print(f"SSID: {AP_SSID}| PSSWD: {AP_PASSWORD} | IP: {ip} | Port: {TCP_PORT}")
     
@@ -184,9 +287,12 @@ def wifi():
     except Exception as e:
         # Fatal error handling
         print(f"Fatal error: {e}")
-        update_oled(["FATAL TCP ERROR!", "", str(e)[:16], str(e)[16:32]])
-        time.sleep(3)
+        update_oled(["FATAL TCP ERROR!"])
+        scroll_oled(2, str(e), 3000)
         for _ in range(10): led.toggle(); time.sleep(0.1)
+    finally:
+        # Access point off when going back to the menu
+        network.WLAN(network.AP_IF).active(False)
         led.off()
 
 if __name__  == '__main__':
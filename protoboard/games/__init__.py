@@ -0,0 +1,9 @@
+# Games listed in the menu. Each entry names the module and the function
+# that starts it, the module is only imported when the game is chosen.
+# A new game registers itself here and runs on games/runtime.py.
+GAMES = []
+
+def register_game(name, module, func="start"):
+    GAMES.append({"name": name, "module": module, "func": func})
+
+register_game("Jogo Snake", "games.snake_game", "snake_start")
@@ -0,0 +1,188 @@
+# Imports
+import time
+from hardware import oled, sound
+from inputs import events, press, BUTTON_B, NO_EVENT
+from telemetry import heap
+
+# Late updates beyond this many steps are dropped instead of caught up
+MAX_CATCH_UP = 4
+
+# Frame rates listed in the frame budget report
+REPORT_FPS = (5, 10, 20, 30, 60)
+
+# Per-frame timing of a game: how long update() and render() take and
+# how many updates had to be dropped to keep up
+class FrameStats:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.updates = 0
+        self.renders = 0
+        self.dropped = 0
+        self.update_us = 0
+        self.update_max_us = 0
+        self.render_us = 0
+        self.render_max_us = 0
+
+    def add_update(self, us):
+        self.updates += 1
+        self.update_us += us
+        if us > self.update_max_us:
+            self.update_max_us = us
+
+    def add_render(self, us):
+        self.renders += 1
+        self.render_us += us
+        if us > self.render_max_us:
+            self.render_max_us = us
+
+    # Average cost of one frame (update + render) in microseconds
+    def frame_us(self):
+        update = self.update_us // self.updates if self.updates else 0
+        render = self.render_us // self.renders if self.renders else 0
+        return update + render
+
+    def report(self, name, fps):
+        update = self.update_us // self.updates if self.updates else 0
+        render = self.render_us // self.renders if self.renders else 0
+        print(f"{name}: {self.updates} updates, {self.renders} renders, {self.dropped} dropped")
+        print(f"  update {update / 1000:.2f} ms (max {self.update_max_us / 1000:.2f})")
+        print(f"  render {render / 1000:.2f} ms (max {self.render_max_us / 1000:.2f})")
+        cost = self.frame_us()
+        print("  fps  budget ms  headroom")
+        for rate in REPORT_FPS:
+            budget = 1000000 // rate
+            mark = " <" if rate == fps else ""
+            print(f"  {rate:>3} {budget / 1000:>10.1f} {100 * (budget - cost) // budget:>8}%{mark}")
+
+# One state of a game (playing, game over...). The runtime calls:
+#   enter()  when the scene becomes active
+#   event()  for every input event (B is kept by the runtime to exit)
+#   update() once per fixed step
+#   render() after the updates of a loop, to draw on the OLED
+#   exit()   when another scene takes over or the game ends
+class Scene:
+
+    def enter(self, game):
+        pass
+
+    def exit(self, game):
+        pass
+
+    def event(self, game, event):
+        pass
+
+    def update(self, game):
+        pass
+
+    def render(self, game):
+        pass
+
+# Runs scenes with a fixed-timestep update and a decoupled render:
+# updates happen every 1000 / fps ms whatever rendering costs (catching
+# up to MAX_CATCH_UP late steps), rendering happens once per loop and the
+# OLED is sent once per frame. Input events are handled as they arrive.
+class Game:
+
+    def __init__(self, name, scene, fps=30):
+        self.name = name
+        self.fps = fps
+        self.step_ms = 1000 // fps
+        self.first_scene = scene
+        self.scene = None
+        self.next_scene = None
+        self.running = False
+        self.redraw = True
+        self.frame = 0
+        self.stats = FrameStats()
+
+    # Changes scene after the current update
+    def switch(self, scene):
+        self.next_scene = scene
+
+    def stop(self):
+        self.running = False
+
+    def _enter_next(self):
+        if self.scene:
+            self.scene.exit(self)
+        self.scene = self.next_scene
+        self.next_scene = None
+        self.scene.enter(self)
+        self.redraw = True
+
+    def _event(self, event):
+        if event == press(BUTTON_B):
+            self.stop()
+        else:
+            self.scene.event(self, event)
+
+    # One fixed step
+    def step(self):
+        start = time.ticks_us()
+        self.scene.update(self)
+        self.stats.add_update(time.ticks_diff(time.ticks_us(), start))
+        self.frame += 1
+        if self.next_scene:
+            self._enter_next()
+
+    def render(self):
+        start = time.ticks_us()
+        self.scene.render(self)
+        oled.show()
+        self.stats.add_render(time.ticks_diff(time.ticks_us(), start))
+        self.redraw = False
+
+    def run(self):
+        print(f"Starting {self.name} ({self.fps} fps)")
+        events.start()
+        events.clear()
+        self.running = True
+        self.stats.reset()
+        self.frame = 0
+        self.next_scene = self.first_scene
+        event = NO_EVENT
+        try:
+            self._enter_next()
+            last = time.ticks_ms()
+            lag = 0
+            while self.running:
+                # Input first, so this step already sees it
+                while event != NO_EVENT and self.running:
+                    self._event(event)
+                    event = events.get()
+
+                now = time.ticks_ms()
+                lag += time.ticks_diff(now, last)
+                last = now
+                steps = 0
+                while lag >= self.step_ms and self.running:
+                    if steps == MAX_CATCH_UP:
+                        self.stats.dropped += lag // self.step_ms
+                        lag %= self.step_ms
+                        break
+                    self.step()
+                    lag -= self.step_ms
+                    steps += 1
+
+                if self.running and (steps or self.redraw):
+                    self.render()
+
+                # Sleeps until the next step, waking up for input. The
+                # GC policy may use the spare time of the frame first.
+                if self.running:
+                    if heap.idle(self.step_ms - lag):
+                        now = time.ticks_ms()
+                        lag += time.ticks_diff(now, last)
+                        last = now
+                    event = events.wait(max(0, self.step_ms - lag))
+        finally:
+            if self.scene:
+                self.scene.exit(self)
+                self.scene = None
+            sound.cancel()
+            oled.fill(0)
+            oled.show()
+            self.stats.report(self.name, self.fps)
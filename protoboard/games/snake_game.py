@@ -3,26 +3,83 @@
 
 import random
 import time
-from machine import Timer
 
 # Importa constantes e hardware
 from hardware import (
     SCREEN_WIDTH, SCREEN_HEIGHT, SEGMENT_WIDTH, SEGMENT_PIXELS,
-    SEGMENTS_HIGH, SEGMENTS_WIDE, VALID_RANGE,
-    oled, joystick_button, buzzer,
-    joy_up, joy_down, joy_left, joy_right
+    SEGMENTS_HIGH, SEGMENTS_WIDE,
+    oled, sound, update_oled, scroll_oled
 )
+from inputs import (
+    press,
+    JOY_BUTTON, JOY_UP, JOY_DOWN, JOY_LEFT, JOY_RIGHT
+)
+from games.runtime import Game, Scene
+
+# Movimentos da cobra por segundo (passos do jogo)
+SNAKE_FPS = 5
+
+# Tempo da tela de game over antes de aceitar o reinício (ms)
+GAME_OVER_DELAY_MS = 500
+
+# Jogo em execução (None quando parado)
+game = None
+
+# Número de células da grade (16 x 8 = 128)
+GRID_CELLS = SEGMENTS_WIDE * SEGMENTS_HIGH
+
+def cell_of(x, y):
+    """
+    Converte coordenadas da grade no índice da célula
+    """
+    return y * SEGMENTS_WIDE + x
 
-# === VARIÁVEIS GLOBAIS DO JOGO ===
-is_game_running = False
-game_timer = Timer()
-player = None
-food = None
+def _next_cells():
+    """
+    Tabela da célula vizinha em cada direção (cima, baixo, esquerda,
+    direita), já com o wrap-around nas bordas
+    """
+    table = bytearray(4 * GRID_CELLS)
+    for cell in range(GRID_CELLS):
+        x = cell % SEGMENTS_WIDE
+        y = cell // SEGMENTS_WIDE
+        table[cell] = cell_of(x, (y - 1) % SEGMENTS_HIGH)
+        table[GRID_CELLS + cell] = cell_of(x, (y + 1) % SEGMENTS_HIGH)
+        table[2 * GRID_CELLS + cell] = cell_of((x - 1) % SEGMENTS_WIDE, y)
+        table[3 * GRID_CELLS + cell] = cell_of((x + 1) % SEGMENTS_WIDE, y)
+    return table
+
+# Tabelas pré-calculadas, para o frame não fazer contas nem criar objetos:
+# posição em pixels de cada célula e vizinha em cada direção
+CELL_PX = bytes((cell % SEGMENTS_WIDE) * SEGMENT_PIXELS for cell in range(GRID_CELLS))
+CELL_PY = bytes((cell // SEGMENTS_WIDE) * SEGMENT_PIXELS for cell in range(GRID_CELLS))
+NEXT_CELL = _next_cells()
+
+def draw_cell(cell, color):
+    """
+    Preenche (1) ou apaga (0) uma célula da grade na tela
+    """
+    oled.fill_rect(CELL_PX[cell], CELL_PY[cell], SEGMENT_PIXELS, SEGMENT_PIXELS, color)
+
+def draw_segment(cell):
+    """
+    Desenha um segmento da cobra (contorno da célula)
+    """
+    x = CELL_PX[cell]
+    y = CELL_PY[cell]
+    oled.fill_rect(x, y, SEGMENT_PIXELS, SEGMENT_PIXELS, 1)
+    oled.fill_rect(x + 1, y + 1, SEGMENT_PIXELS - 2, SEGMENT_PIXELS - 2, 0)
 
 class Snake:
     """
     Classe que representa a cobra
     Controla movimento, direção, colisões e crescimento
+
+    O corpo fica num buffer circular (cauda -> cabeça) e uma grade de
+    ocupação marca as células usadas, então colisão e movimento são O(1).
+    Uma lista de células livres permite sortear a comida em O(1).
+    Posições são índices de célula (y * SEGMENTS_WIDE + x) e todo o estado
+    fica em buffers pré-alocados: um movimento não cria nenhum objeto.
     """
     
     # Constantes de direção
@@ -36,16 +93,11 @@ class Snake:
         Inicializa a cobra no centro da tela
         x, y: posição inicial (opcional)
         """
-        if x is None:
-            x = int(SEGMENTS_WIDE / 2)
-        if y is None:
-            y = int(SEGMENTS_HIGH / 2) + 1
-            
-        self.segments = [[x, y]]
-        self.x = x
-        self.y = y
-        self.dir = random.randint(0, 3)  # Direção inicial aleatória
-        self.state = True  # True = viva, False = morta
+        self.body = bytearray(GRID_CELLS)      # células do corpo (anel)
+        self.occupied = bytearray(GRID_CELLS)  # 1 = célula ocupada pela cobra
+        self.free = bytearray(GRID_CELLS)      # células livres (primeiras free_count)
+        self.free_pos = bytearray(GRID_CELLS)  # posição de cada célula em free
+        self.reset(x, y)
     
     def reset(self, x=None, y=None):
         """
@@ -55,91 +107,105 @@ class Snake:
             x = int(SEGMENTS_WIDE / 2)
         if y is None:
             y = int(SEGMENTS_HIGH / 2) + 1
-            
-        self.segments = [[x, y]]
-        self.x = x
-        self.y = y
-        self.dir = random.randint(0, 3)
-        self.state = True
+        
+        for cell in range(GRID_CELLS):
+            self.occupied[cell] = 0
+            self.free[cell] = cell
+            self.free_pos[cell] = cell
+        self.free_count = GRID_CELLS
+        
+        self.tail = 0    # índice da cauda no anel
+        self.length = 0  # segmentos no anel
+        self.grow = 0    # segmentos a crescer nos próximos movimentos
+        self.head = cell_of(x, y)  # célula da cabeça
+        self._push_head(self.head)
+        
+        self.dir = random.randint(0, 3)  # Direção inicial aleatória
+        self.state = True  # True = viva, False = morta
+    
+    def _push_head(self, cell):
+        """
+        Adiciona a célula como nova cabeça e a tira da lista livre
+        """
+        self.body[(self.tail + self.length) % GRID_CELLS] = cell
+        self.length += 1
+        self.occupied[cell] = 1
+        
+        # Troca com a última célula livre
+        i = self.free_pos[cell]
+        self.free_count -= 1
+        last = self.free[self.free_count]
+        self.free[i] = last
+        self.free_pos[last] = i
+    
+    def _pop_tail(self):
+        """
+        Remove a cauda e devolve sua célula para a lista livre
+        """
+        cell = self.body[self.tail]
+        self.tail = (self.tail + 1) % GRID_CELLS
+        self.length -= 1
+        self.occupied[cell] = 0
+        
+        self.free[self.free_count] = cell
+        self.free_pos[cell] = self.free_count
+        self.free_count += 1
+        return cell
+    
+    def size(self):
+        """
+        Tamanho da cobra (conta o crescimento pendente)
+        """
+        return self.length + self.grow
+    
+    def random_free_cell(self):
+        """
+        Sorteia uma célula livre, -1 se a grade estiver cheia
+        """
+        if not self.free_count:
+            return -1
+        return self.free[random.randint(0, self.free_count - 1)]
     
     def move(self):
         """
         Move a cobra na direção atual
         Implementa wrap-around (atravessa as bordas da tela)
+        Retorna a célula liberada pela cauda (-1 se a cobra cresceu ou
+        bateu)
         """
-        new_x = self.x
-        new_y = self.y
-        
-        # Calcula nova posição baseada na direção
-        if self.dir == Snake.up:
-            new_y -= 1
-        elif self.dir == Snake.down:
-            new_y += 1
-        elif self.dir == Snake.left:
-            new_x -= 1
-        elif self.dir == Snake.right:
-            new_x += 1
+        # Célula seguinte na direção atual (com wrap-around)
+        new_cell = NEXT_CELL[self.dir * GRID_CELLS + self.head]
         
-        # Wrap-around: atravessa as bordas
-        if new_x < 0:
-            new_x = SEGMENTS_WIDE - 1
-        elif new_x >= SEGMENTS_WIDE:
-            new_x = 0
-        
-        if new_y < 0:
-            new_y = SEGMENTS_HIGH - 1
-        elif new_y >= SEGMENTS_HIGH:
-            new_y = 0
-        
-        # Move todos os segmentos (cada um vai para posição do próximo)
-        for i in range(len(self.segments) - 1):
-            self.segments[i][0] = self.segments[i + 1][0]
-            self.segments[i][1] = self.segments[i + 1][1]
-        
-        # Verifica colisão com próprio corpo
-        if self._check_crash(new_x, new_y):
+        # Verifica colisão com próprio corpo. A célula da cauda só fica
+        # livre se a cauda anda junto (a cobra não está crescendo)
+        if self._check_crash(new_cell) and (self.grow or new_cell != self.body[self.tail]):
             if self.state:
-                # Toca som de morte
-                buzzer.freq(200)
-                buzzer.duty_u16(2000)
-                time.sleep(0.5)
-                buzzer.duty_u16(0)
+                # Toca som de morte (sem travar o timer do jogo)
+                sound.tone(200, 500, 2000)
             self.state = False
+            return -1
+        
+        # A cauda anda junto (a não ser que a cobra esteja crescendo)
+        freed = -1
+        if self.grow:
+            self.grow -= 1
+        else:
+            freed = self._pop_tail()
+        self._push_head(new_cell)
         
         # Atualiza posição da cabeça
-        self.x = new_x
-        self.y = new_y
-        self.segments[-1][0] = self.x
-        self.segments[-1][1] = self.y
+        self.head = new_cell
+        return freed
     
     def eat(self):
         """
         Cobra come a comida e cresce
         """
-        # Desenha o novo segmento
-        oled.fill_rect(
-            self.x * SEGMENT_PIXELS,
-            self.y * SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            0
-        )
-        oled.rect(
-            self.x * SEGMENT_PIXELS,
-            self.y * SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            1
-        )
-        
-        # Adiciona novo segmento
-        self.segments.append([self.x, self.y])
+        # Cresce um segmento no próximo movimento
+        self.grow += 1
         
         # Toca som de comer
-        buzzer.freq(1000)
-        buzzer.duty_u16(2000)
-        time.sleep(0.1)
-        buzzer.duty_u16(0)
+        sound.tone(1000, 100, 2000)
     
     def change_dir(self, new_dir):
         """
@@ -159,199 +225,160 @@ class Snake:
         self.dir = new_dir
         return True
     
-    def _check_crash(self, new_x, new_y):
+    def _check_crash(self, cell):
         """
-        Verifica se a nova posição colide com o corpo da cobra
+        Verifica se a célula colide com o corpo da cobra
         """
-        return [new_x, new_y] in self.segments
+        return self.occupied[cell]
     
-    def draw(self):
-        """
-        Desenha a cabeça da cobra na tela
-        """
-        oled.rect(
-            self.segments[-1][0] * SEGMENT_PIXELS,
-            self.segments[-1][1] * SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            1
-        )
 
-def update_game(timer):
+# Desenhos pendentes: o update registra as células que mudaram e o render
+# as desenha (mesmo que vários updates aconteçam antes de um render)
+ERASE = 0    # apaga a célula
+FOOD = 1     # célula cheia (comida)
+SEGMENT = 2  # contorno (corpo da cobra)
+
+class SnakePlay(Scene):
     """
-    Função chamada pelo timer a cada frame do jogo
-    Atualiza posição da cobra e verifica colisões com comida
+    Cena da partida: move a cobra a cada passo e desenha só o que mudou
     """
-    global food, player
     
-    # Apaga a cauda anterior (otimização)
-    oled.fill_rect(
-        player.segments[0][0] * SEGMENT_PIXELS,
-        player.segments[0][1] * SEGMENT_PIXELS,
-        SEGMENT_PIXELS,
-        SEGMENT_PIXELS,
-        0
-    )
+    def __init__(self):
+        self.player = Snake()
+        self.food = -1
+        self.draw_cells = bytearray(GRID_CELLS)
+        self.draw_kinds = bytearray(GRID_CELLS)
+        self.draw_count = 0
     
-    # Move a cobra
-    player.move()
+    def queue_draw(self, cell, kind):
+        if self.draw_count < GRID_CELLS:
+            self.draw_cells[self.draw_count] = cell
+            self.draw_kinds[self.draw_count] = kind
+            self.draw_count += 1
     
-    if player.state:
-        # Cobra ainda está viva
+    def enter(self, game):
+        self.player.reset()
+        self.food = self.player.random_free_cell()
+        self.draw_count = 0
+        oled.fill(0)
+        draw_cell(self.food, 1)
+        self.queue_draw(self.player.head, SEGMENT)
+    
+    def event(self, game, event):
+        if event == press(JOY_UP):
+            self.player.change_dir(Snake.up)
+        elif event == press(JOY_RIGHT):
+            self.player.change_dir(Snake.right)
+        elif event == press(JOY_LEFT):
+            self.player.change_dir(Snake.left)
+        elif event == press(JOY_DOWN):
+            self.player.change_dir(Snake.down)
+    
+    def update(self, game):
+        player = self.player
+        
+        # Move a cobra e apaga a cauda anterior
+        freed = player.move()
+        if freed >= 0:
+            self.queue_draw(freed, ERASE)
+        
+        if not player.state:
+            game.switch(game_over)
+            return
+        
+        head = player.head
+        self.queue_draw(head, SEGMENT)
         
         # Verifica se comeu a comida
-        if food[0] == player.x and food[1] == player.y:
+        if head == self.food:
             player.eat()
             
             # Gera nova comida (se ainda há espaço)
-            if len(player.segments) < (SEGMENTS_WIDE * SEGMENTS_HIGH):
-                food = random.choice([
-                    coord for coord in VALID_RANGE
-                    if coord not in player.segments
-                ])
-                oled.fill_rect(
-                    food[0] * SEGMENT_PIXELS,
-                    food[1] * SEGMENT_PIXELS,
-                    SEGMENT_PIXELS,
-                    SEGMENT_PIXELS,
-                    1
-                )
+            self.food = player.random_free_cell()
+            if self.food >= 0:
+                self.queue_draw(self.food, FOOD)
             else:
                 # Vitória! Preencheu toda a tela
                 player.state = False
+                game.switch(game_over)
+    
+    def render(self, game):
+        for i in range(self.draw_count):
+            cell = self.draw_cells[i]
+            kind = self.draw_kinds[i]
+            if kind == SEGMENT:
+                draw_segment(cell)
+            else:
+                draw_cell(cell, kind)
+        self.draw_count = 0
+
+class SnakeGameOver(Scene):
+    """
+    Tela de game over: o botão do joystick começa outra partida
+    """
+    
+    def enter(self, game):
+        self.since = time.ticks_ms()
         
-        # Desenha a cobra
-        player.draw()
+        # Calcula pontuação
+        score_text = f"Score: {play.player.size()}"
+        
+        # Centraliza textos
+        oled.fill(0)
+        oled.text(
+            "Game Over!",
+            int(SCREEN_WIDTH / 2) - int(len("Game Over!") / 2 * 8),
+            int(SCREEN_HEIGHT / 2) - 16
+        )
+        oled.text(
+            score_text,
+            int(SCREEN_WIDTH / 2) - int(len(score_text) / 2 * 8),
+            int(SCREEN_HEIGHT / 2)
+        )
+        oled.text("Press joy to rst", 0, SCREEN_HEIGHT - 8)
     
-    # Atualiza a tela
-    oled.show()
+    def event(self, game, event):
+        if event == press(JOY_BUTTON):
+            # Ignora toques logo depois da morte
+            if time.ticks_diff(time.ticks_ms(), self.since) >= GAME_OVER_DELAY_MS:
+                game.switch(play)
+
+play = SnakePlay()
+game_over = SnakeGameOver()
 
 def snake_start():
     """
     Inicia o jogo da cobrinha
-    Chamado pelo app ou pelo menu
+    Chamado pelo app ou pelo menu (B volta ao menu)
     """
-    global is_game_running, player, food
+    global game
     
     # Só inicia se não estiver rodando
-    if is_game_running:
+    if game is not None:
         print("⚠️ Jogo já está rodando!")
         return
     
-    is_game_running = True
     print("🐍 Iniciando jogo Snake...")
-    
+    game = Game("Snake", play, SNAKE_FPS)
     try:
-        pico_snake_main()
+        game.run()
     except Exception as e:
         print(f"❌ Erro no jogo: {e}")
-        oled.fill(0)
-        oled.text("Game Error", 0, 0)
-        oled.text(str(e)[:16], 0, 10)
-        oled.show()
-        time.sleep(3)
+        # A mensagem inteira rola na linha 2
+        update_oled(["Game Error"])
+        scroll_oled(2, str(e), 3000)
     finally:
         # Garante que o estado seja resetado
-        is_game_running = False
+        game = None
+        print("🏁 Jogo finalizado")
 
 def snake_stop():
     """
-    Para o jogo da cobrinha imediatamente
-    Chamado pelo app ou pelo botão B
+    Para o jogo da cobrinha
+    Chamado pelo app (o botão B é tratado pelo runtime)
     """
-    global is_game_running
-    
-    if is_game_running:
+    if game is not None:
         print("⏹️ Parando o jogo...")
-        is_game_running = False
-        game_timer.deinit()
-        oled.fill(0)
-        oled.show()
-        buzzer.duty_u16(0)
-
-def pico_snake_main():
-    """
-    Loop principal do jogo
-    Gerencia partidas e tela de game over
-    """
-    global player, food, is_game_running
-    
-    while is_game_running:
-        # === INICIALIZAÇÃO DE UMA PARTIDA ===
-        player = Snake()
-        food = random.choice([
-            coord for coord in VALID_RANGE
-            if coord not in player.segments
-        ])
-        
-        # Limpa tela e desenha comida inicial
-        oled.fill(0)
-        oled.fill_rect(
-            food[0] * SEGMENT_PIXELS,
-            food[1] * SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            SEGMENT_PIXELS,
-            1
-        )
-        
-        # Inicia o timer do jogo (5 FPS)
-        game_timer.init(freq=5, mode=Timer.PERIODIC, callback=update_game)
-        
-        # === LOOP DA PARTIDA ===
-        while player.state and is_game_running:
-            # Lê controles do joystick
-            if joy_up():
-                player.change_dir(Snake.up)
-            elif joy_right():
-                player.change_dir(Snake.right)
-            elif joy_left():
-                player.change_dir(Snake.left)
-            elif joy_down():
-                player.change_dir(Snake.down)
-            
-            time.sleep(0.01)
-        
-        # Para o timer
-        game_timer.deinit()
-        
-        # Se o jogo foi interrompido externamente, sai
-        if not is_game_running:
-            break
-        
-        # === TELA DE GAME OVER ===
-        oled.fill(0)
-        
-        # Calcula pontuação
-        score = len(player.segments)
-        score_text = f"Score: {score}"
-        
-        # Centraliza textos
-        oled.text(
-            "Game Over!",
-            int(SCREEN_WIDTH / 2) - int(len("Game Over!") / 2 * 8),
-            int(SCREEN_HEIGHT / 2) - 16
-        )
-        oled.text(
-            score_text,
-            int(SCREEN_WIDTH / 2) - int(len(score_text) / 2 * 8),
-            int(SCREEN_HEIGHT / 2)
-        )
-        oled.text("Press joy to rst", 0, SCREEN_HEIGHT - 8)
-        oled.show()
-        
-        time.sleep(0.5)
-        
-        # Aguarda botão do joystick para reiniciar
-        while joystick_button.value() != 0:
-            if not is_game_running:
-                break
-            time.sleep(0.01)
-    
-    # === LIMPEZA FINAL ===
-    game_timer.deinit()
-    oled.fill(0)
-    oled.show()
-    buzzer.duty_u16(0)
-    print("🏁 Jogo finalizado")
+        game.stop()
 
 print("✓ snake_game.py carregado")
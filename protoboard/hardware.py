@@ -3,6 +3,9 @@ from machine import Pin, PWM, I2C, ADC
 import neopixel
 import time
 from lib.ssd1306 import SSD1306_I2C
+from lib.frame_engine import FrameEngine
+from lib.tone_scheduler import ToneScheduler
+from lib.text_layer import TextLayer
 
 # Constants:
 # Width and Height of OLED Display
@@ -15,67 +18,86 @@ SEGMENT_PIXELS = int(SCREEN_HEIGHT / SEGMENT_WIDTH) # 64 / 8 = 8 pixels
 SEGMENTS_HIGH = int(SCREEN_HEIGHT / SEGMENT_WIDTH)  # 64 / 8 = 8 height segments
 SEGMENTS_WIDE = int(SCREEN_WIDTH / SEGMENT_WIDTH)   # 128 / 8 = 16 width segments
 
-# Valid range for grid coords (used to place the food)
-VALID_RANGE = [[int(i / SEGMENTS_HIGH), i % SEGMENTS_HIGH] 
-               for i in range(SEGMENTS_WIDE * SEGMENTS_HIGH - 1)]
-
 # Number of leds from Neopixel
 NUM_LEDS = 25
 
+# Most matrix frames sent per second, updates in between are merged
+MATRIX_MAX_FPS = 30
+
+# Sends OLED frames from a background thread (second core)
+OLED_DOUBLE_BUFFER = True
+
+# Duration of the OLED fade between two screens (ms)
+OLED_FADE_MS = 160
+
 # Function to clear OLED
 def clear_oled():
-    oled.fill(0)
-    oled.show()
+    oled_text.clear()
 
-# Function to update and display text on OLED
+# Function to update and display text on OLED (up to 8 lines). Only the
+# lines that changed since the last call are drawn and sent.
 def update_oled(lines):
-    oled.fill(0)
-    for i, line in enumerate(lines):
-        if i < 8:
-            oled.text(line, 0, i * 8)
+    oled_text.show(lines)
+
+# Replaces the OLED text with a fade: the contrast goes down, the lines
+# change and it comes back up, a couple of command bytes per step
+def fade_oled(lines, ms=OLED_FADE_MS):
+    level = oled.contrast_level
+    oled.contrast_ramp(level, 0, ms // 2)
+    oled_text.show(lines)
+    oled.contrast_ramp(0, level, ms // 2)
+
+# Shows a message on one OLED line, scrolling it when it is longer than
+# 16 characters, and keeps it moving for hold_ms
+def scroll_oled(line, message, hold_ms=0):
+    oled_text.marquee(line, message)
     oled.show()
+    oled_text.hold(hold_ms)
 
 # Components initialization:
 
 # OLED Display (128x64)
 i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400000)
-oled = SSD1306_I2C(SCREEN_WIDTH, SCREEN_HEIGHT, i2c)
+oled = SSD1306_I2C(SCREEN_WIDTH, SCREEN_HEIGHT, i2c, double_buffer=OLED_DOUBLE_BUFFER)
 oled.fill(0)
 oled.show()
 
+# Cached text rows and marquees on the OLED (see lib/text_layer.py)
+oled_text = TextLayer(oled)
+
 # Neopixel Matrix (GPIO7)
 np_pin = Pin(7, Pin.OUT)
 np_pin.value(0) # Safety: Force pin LOW before init
 np = neopixel.NeoPixel(np_pin, NUM_LEDS)
 
+# Batched writes to the matrix (see lib/frame_engine.py)
+matrix = FrameEngine(np, MATRIX_MAX_FPS)
+matrix.start()
+
 def clear_neopixels():
     """Desliga todos os NeoPixels"""
-    for i in range(NUM_LEDS):
-        np[i] = (0, 0, 0)
-    np.write()
+    matrix.clear()
+    matrix.show()
 
 # RGB Led (PWM)
 led_r = PWM(Pin(12)); led_g = PWM(Pin(13)); led_b = PWM(Pin(11))
 led_r.freq(1000); led_g.freq(1000); led_b.freq(1000)
 led_r.duty_u16(0); led_g.duty_u16(0); led_b.duty_u16(0) # Turn off
 
+def rgb_off():
+    """Desliga o LED RGB"""
+    led_r.duty_u16(0); led_g.duty_u16(0); led_b.duty_u16(0)
+
 # Buzzers (PWM)
 buzzer = PWM(Pin(21)); buzzer2 = PWM(Pin(10))
 buzzer.duty_u16(0); buzzer2.duty_u16(0) # Turn off
 
-# Plays a tone on the main buzzer
+# Queued, timer-driven notes on both buzzers (see lib/tone_scheduler.py)
+sound = ToneScheduler((buzzer, buzzer2))
+
+# Plays a tone on the main buzzer, without waiting for it to end
 def play_tone(frequency, duration_s=0.1, volume=500):
-    global buzzer
-    
-    # Set frequency and duty cycle (volume)
-    buzzer.freq(frequency)
-    buzzer.duty_u16(volume)
-    
-    # Wait for the duration of the tone
-    time.sleep(duration_s)
-    
-    # Stop the sound (set volume to 0)
-    buzzer.duty_u16(0)
+    sound.tone(frequency, int(duration_s * 1000), volume)
 
 
 # Buttons A and B (Input)
@@ -0,0 +1,195 @@
+# Imports
+import time
+from machine import Pin, Timer
+from micropython import const
+from hardware import button_a, button_b, joystick_button, adc_vrx, adc_vry
+
+# Event sources
+BUTTON_A = const(0)
+BUTTON_B = const(1)
+JOY_BUTTON = const(2)
+JOY_UP = const(3)
+JOY_DOWN = const(4)
+JOY_LEFT = const(5)
+JOY_RIGHT = const(6)
+NUM_SOURCES = const(7)
+
+# Events are small ints: source << 1 | pressed (1) / released (0)
+NO_EVENT = const(-1)
+
+def press(source):
+    return source << 1 | 1
+
+def release(source):
+    return source << 1
+
+def event_source(event):
+    return event >> 1
+
+def is_press(event):
+    return event & 1
+
+# Buttons: edges closer than this are contact bounce (ms)
+DEBOUNCE_MS = 30
+
+# Joystick sampling rate and hysteresis on the raw u16 readings: a
+# direction turns on past ENTER and only turns off again back past EXIT
+JOY_SAMPLE_HZ = 50
+JOY_ENTER_LOW = 16384
+JOY_EXIT_LOW = 24576
+JOY_ENTER_HIGH = 49152
+JOY_EXIT_HIGH = 40960
+
+QUEUE_SIZE = 32
+
+# Sleep between checks while waiting for an event (ms)
+WAIT_SLEEP_MS = 5
+
+# Preallocated ring of events, safe to push from IRQ handlers
+class EventQueue:
+
+    def __init__(self, size=QUEUE_SIZE):
+        self.items = bytearray(size)
+        self.size = size
+        self.head = 0   # next event to pop
+        self.count = 0
+        self.dropped = 0
+
+    def push(self, event):
+        if self.count == self.size:
+            self.dropped += 1
+            return
+        self.items[(self.head + self.count) % self.size] = event
+        self.count += 1
+
+    def pop(self):
+        if not self.count:
+            return NO_EVENT
+        event = self.items[self.head]
+        self.head = (self.head + 1) % self.size
+        self.count -= 1
+        return event
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+# Debounced edge events from the buttons (pin IRQs) and the joystick
+# (sampled by a timer). Menu, games and connection modes wait on them
+# instead of polling the pins.
+class InputEvents:
+
+    def __init__(self):
+        self.queue = EventQueue()
+        self.buttons = (button_a, button_b, joystick_button)
+        # Current pressed state of every source
+        self.state = bytearray(NUM_SOURCES)
+        # Time of the last accepted edge of each button
+        self.last_edge = [0, 0, 0]
+        self.timer = None
+        # Bound methods created once, IRQs must not allocate them
+        self._on_pin = self.on_pin
+        self._on_sample = self.sample
+
+    def start(self):
+        if self.timer:
+            return
+        for pin in self.buttons:
+            pin.irq(trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING, handler=self._on_pin)
+        self.timer = Timer()
+        self.timer.init(freq=JOY_SAMPLE_HZ, mode=Timer.PERIODIC, callback=self._on_sample)
+
+    def stop(self):
+        if not self.timer:
+            return
+        for pin in self.buttons:
+            pin.irq(handler=None)
+        self.timer.deinit()
+        self.timer = None
+
+    def _set(self, source, active):
+        if active != self.state[source]:
+            self.state[source] = active
+            self.queue.push(source << 1 | active)
+
+    def _button(self, source, now):
+        if time.ticks_diff(now, self.last_edge[source]) < DEBOUNCE_MS:
+            return
+        active = 1 if self.buttons[source].value() == 0 else 0
+        if active != self.state[source]:
+            self.last_edge[source] = now
+            self._set(source, active)
+
+    # Pin IRQ handler (buttons are active low)
+    def on_pin(self, pin):
+        now = time.ticks_ms()
+        for source in range(3):
+            if self.buttons[source] is pin:
+                self._button(source, now)
+
+    def _axis(self, low, high, value):
+        if self.state[low]:
+            self._set(low, 1 if value < JOY_EXIT_LOW else 0)
+        else:
+            self._set(low, 1 if value < JOY_ENTER_LOW else 0)
+        if self.state[high]:
+            self._set(high, 1 if value > JOY_EXIT_HIGH else 0)
+        else:
+            self._set(high, 1 if value > JOY_ENTER_HIGH else 0)
+
+    # Timer handler: samples the joystick and catches button edges lost
+    # while an IRQ was being debounced
+    def sample(self, timer):
+        now = time.ticks_ms()
+        for source in range(3):
+            self._button(source, now)
+        # X-axis (vertical): low = up, high = down
+        self._axis(JOY_UP, JOY_DOWN, adc_vrx.read_u16())
+        # Y-axis (horizontal): low = right, high = left
+        self._axis(JOY_RIGHT, JOY_LEFT, adc_vry.read_u16())
+
+    # Next event, or NO_EVENT if there is none
+    def get(self):
+        return self.queue.pop()
+
+    # Waits for the next event, up to timeout_ms (-1 waits forever)
+    def wait(self, timeout_ms=-1):
+        start = time.ticks_ms()
+        while True:
+            event = self.queue.pop()
+            if event != NO_EVENT:
+                return event
+            if timeout_ms >= 0 and time.ticks_diff(time.ticks_ms(), start) >= timeout_ms:
+                return NO_EVENT
+            time.sleep_ms(WAIT_SLEEP_MS)
+
+    # Discards queued events until event is found, returns if it was
+    def take(self, event):
+        while self.queue.count:
+            if self.queue.pop() == event:
+                return True
+        return False
+
+    def is_pressed(self, source):
+        return self.state[source]
+
+    def clear(self):
+        self.queue.clear()
+
+    # Adds an event as if it came from the hardware (replayed traces)
+    def inject(self, event):
+        self.queue.push(event)
+
+# Replays a recorded trace of (delay_ms, event) pairs into events
+def replay(events, trace):
+    for delay_ms, event in trace:
+        time.sleep_ms(delay_ms)
+        events.inject(event)
+
+# Shared input events of the board
+events = InputEvents()
+
+print("(✓) inputs.py")
@@ -0,0 +1,123 @@
+# Frame engine for the 5x5 Neopixel matrix.
+#
+# Works directly on the NeoPixel's own GRB buffer (3 bytes per pixel), so
+# updates neither allocate tuples nor copy frames. Changes only mark the
+# frame dirty; a timer sends it at most max_fps times per second, so a
+# burst of pixel updates reaches the LEDs as a single write().
+
+from machine import Timer
+from profiler import prof, NP_WRITE
+
+# Byte offsets of each color inside a pixel (NeoPixel GRB order)
+G = 0
+R = 1
+B = 2
+
+# Pixels per matrix row
+ROW_SIZE = 5
+
+class FrameEngine:
+
+    def __init__(self, np, max_fps=30):
+        self.np = np
+        self.buf = np.buf
+        self.n = len(np)
+        self.max_fps = max_fps
+        self.dirty = False
+        self.timer = None
+        # Frames actually sent to the LEDs
+        self.frames = 0
+        # Bound method created once, the timer must not allocate it
+        self._on_tick = self._tick
+
+    # Starts flushing dirty frames from the timer
+    def start(self):
+        if self.timer:
+            return
+        self.timer = Timer()
+        self.timer.init(freq=self.max_fps, mode=Timer.PERIODIC, callback=self._on_tick)
+
+    def stop(self):
+        if not self.timer:
+            return
+        self.timer.deinit()
+        self.timer = None
+        self.flush()
+
+    def _tick(self, timer):
+        if self.dirty:
+            self.show()
+
+    # Sends the frame now
+    def show(self):
+        self.dirty = False
+        start = prof.begin()
+        self.np.write()
+        prof.end(NP_WRITE, start)
+        self.frames += 1
+
+    # Sends the frame if it changed since the last one
+    def flush(self):
+        if self.dirty:
+            self.show()
+
+    # NeoPixel-compatible write(): the timer sends it (or immediately when
+    # the engine is not running)
+    def write(self):
+        if self.timer:
+            self.dirty = True
+        else:
+            self.show()
+
+    def set(self, index, r, g, b):
+        o = index * 3
+        buf = self.buf
+        buf[o + G] = g
+        buf[o + R] = r
+        buf[o + B] = b
+        self.dirty = True
+
+    def __setitem__(self, index, color):
+        self.set(index, color[0], color[1], color[2])
+
+    def __getitem__(self, index):
+        o = index * 3
+        return (self.buf[o + R], self.buf[o + G], self.buf[o + B])
+
+    def __len__(self):
+        return self.n
+
+    def fill(self, r, g, b):
+        buf = self.buf
+        for o in range(0, self.n * 3, 3):
+            buf[o + G] = g
+            buf[o + R] = r
+            buf[o + B] = b
+        self.dirty = True
+
+    def clear(self):
+        self.fill(0, 0, 0)
+
+    # Paints the ROW_SIZE pixels of a (physical) row with one color
+    def set_row(self, row, r, g, b):
+        buf = self.buf
+        start = row * ROW_SIZE * 3
+        for o in range(start, start + ROW_SIZE * 3, 3):
+            buf[o + G] = g
+            buf[o + R] = r
+            buf[o + B] = b
+        self.dirty = True
+
+    # Copies a whole image of r, g, b bytes starting at data[offset].
+    # Pixel k of the image goes to index order[k] (physical order when
+    # order is None).
+    def blit(self, data, offset=0, order=None):
+        buf = self.buf
+        i = offset
+        for k in range(self.n):
+            o = (k if order is None else order[k]) * 3
+            buf[o + R] = data[i]
+            buf[o + G] = data[i + 1]
+            buf[o + B] = data[i + 2]
+            i += 3
+        self.dirty = True
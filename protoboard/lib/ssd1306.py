@@ -3,6 +3,13 @@
 
 from micropython import const
 import framebuf
+import time
+from profiler import prof, OLED_SHOW
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
 
 
 # register definitions
@@ -25,6 +32,27 @@ SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
 
+# scrolling and fading (run by the controller, no RAM transfer)
+SET_HSCROLL_RIGHT = const(0x26)
+SET_HSCROLL_LEFT = const(0x27)
+SET_VSCROLL_RIGHT = const(0x29)
+SET_VSCROLL_LEFT = const(0x2A)
+SET_VSCROLL_AREA = const(0xA3)
+SET_SCROLL_OFF = const(0x2E)
+SET_SCROLL_ON = const(0x2F)
+SET_FADE = const(0x23)
+
+# Scroll step interval codes, by frames between steps
+SCROLL_FRAMES = {2: 0b111, 3: 0b100, 4: 0b101, 5: 0b000, 25: 0b110, 64: 0b001, 128: 0b010, 256: 0b011}
+
+# Fade/blink modes of SET_FADE, the step interval is 8 to 128 frames
+FADE_OFF = const(0x00)
+FADE_OUT = const(0x20)
+FADE_BLINK = const(0x30)
+
+# Contrast commands sent by contrast_ramp()
+CONTRAST_STEPS = 16
+
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
@@ -34,11 +62,30 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        self.view = memoryview(self.buffer)
+        # One view per page, so whole pages are sent without slicing
+        self.page_views = self.split_pages(self.view)
+        # Only the dirty window is sent by show() unless partial is False
+        self.partial = True
+        # Bytes written to the bus (commands + data) and by the last show()
+        self.bytes_sent = 0
+        self.frame_bytes = 0
+        # Drawing calls so far, for code sharing the screen (TextLayer)
+        # to see that someone else drew
+        self.writes = 0
+        self.mark_clean()
+        # narrow displays use centred columns
+        self.col_offset = (128 - width) // 2 if width != 128 else 0
+        # Window setup sent by show(), only the addresses change
+        self.window_cmds = bytearray((SET_COL_ADDR, 0, 0, SET_PAGE_ADDR, 0, 0))
+        self.contrast_cmd = bytearray((SET_CONTRAST, 0xFF))
+        self.contrast_level = 0xFF
+        self.scrolling = False
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
     def init_display(self):
-        for cmd in (
+        self.write_cmds(bytes((
             SET_DISP,  # display off
             # address setting
             SET_MEM_ADDR,
@@ -71,61 +118,394 @@ class SSD1306(framebuf.FrameBuffer):
             SET_CHARGE_PUMP,
             0x10 if self.external_vcc else 0x14,
             SET_DISP | 0x01,  # display on
-        ):  # on
-            self.write_cmd(cmd)
+        )))
         self.fill(0)
         self.show()
 
     def poweroff(self):
+        self.wait()
         self.write_cmd(SET_DISP)
 
     def poweron(self):
+        self.wait()
         self.write_cmd(SET_DISP | 0x01)
 
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.wait()
+        self.contrast_level = contrast
+        self.contrast_cmd[1] = contrast
+        self.write_cmds(self.contrast_cmd)
+
+    # Moves the contrast from start to end in CONTRAST_STEPS commands over
+    # ms milliseconds (blocks meanwhile). Fades the screen in or out for
+    # two bytes per step instead of redrawing it.
+    def contrast_ramp(self, start, end, ms, steps=CONTRAST_STEPS):
+        self.wait()
+        cmd = self.contrast_cmd
+        for k in range(steps + 1):
+            cmd[1] = start + (end - start) * k // steps
+            self.write_cmds(cmd)
+            if k < steps:
+                time.sleep_ms(ms // steps)
+        self.contrast_level = end
+
+    # Starts the controller's own scroll of pages start_page..end_page,
+    # one column every `frames` display frames (2, 3, 4, 5, 25, 64, 128
+    # or 256). With dy > 0 the whole screen also moves dy rows up per step
+    # (diagonal scroll). Nothing is sent while it runs; show() stops it,
+    # since the scrolled RAM must then be rewritten.
+    def start_scroll(self, left=False, start_page=0, end_page=None, frames=5, dy=0):
+        if frames not in SCROLL_FRAMES:
+            raise ValueError(f"Unsupported scroll interval {frames}")
+        if end_page is None:
+            end_page = self.pages - 1
+        self.stop_scroll()
+        self.wait()
+        interval = SCROLL_FRAMES[frames]
+        if dy:
+            self.write_cmds(bytes((
+                SET_VSCROLL_AREA, 0, self.height,
+                SET_VSCROLL_LEFT if left else SET_VSCROLL_RIGHT,
+                0x00, start_page, interval, end_page, dy,
+                SET_SCROLL_ON,
+            )))
+        else:
+            self.write_cmds(bytes((
+                SET_HSCROLL_LEFT if left else SET_HSCROLL_RIGHT,
+                0x00, start_page, interval, end_page, 0x00, 0xFF,
+                SET_SCROLL_ON,
+            )))
+        self.scrolling = True
+
+    def stop_scroll(self):
+        if not self.scrolling:
+            return
+        self.wait()
+        self.write_cmd(SET_SCROLL_OFF)
+        self.scrolling = False
+        # The scrolled RAM no longer matches the framebuffer
+        self.mark_all()
+
+    # Controller fade out (blink=False) or blinking, one contrast step
+    # every `frames` display frames (8 to 128, multiple of 8); frames=0
+    # turns it off again
+    def fade(self, frames=32, blink=False):
+        self.wait()
+        if not frames:
+            self.write_cmds(bytes((SET_FADE, FADE_OFF)))
+            return
+        if frames % 8 or not 8 <= frames <= 128:
+            raise ValueError(f"Unsupported fade interval {frames}")
+        mode = FADE_BLINK if blink else FADE_OUT
+        self.write_cmds(bytes((SET_FADE, mode | (frames // 8 - 1))))
 
     def invert(self, invert):
+        self.wait()
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
+    def split_pages(self, view):
+        width = self.width
+        return [view[p * width:(p + 1) * width] for p in range(self.pages)]
+
     def rotate(self, rotate):
-        self.write_cmd(SET_COM_OUT_DIR | ((rotate & 1) << 3))
-        self.write_cmd(SET_SEG_REMAP | (rotate & 1))
-
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
-        if self.width != 128:
-            # narrow displays use centred columns
-            col_offset = (128 - self.width) // 2
-            x0 += col_offset
-            x1 += col_offset
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        self.wait()
+        self.write_cmds(bytes((SET_COM_OUT_DIR | ((rotate & 1) << 3), SET_SEG_REMAP | (rotate & 1))))
+
+    # Dirty window tracking: columns x0..x1 of pages p0..p1 changed since
+    # the last show(). The drawing primitives below extend it.
+    def mark_clean(self):
+        self.dirty_x0 = self.width
+        self.dirty_x1 = -1
+        self.dirty_p0 = self.pages
+        self.dirty_p1 = -1
+
+    def mark_all(self):
+        self.dirty_x0 = 0
+        self.dirty_x1 = self.width - 1
+        self.dirty_p0 = 0
+        self.dirty_p1 = self.pages - 1
+
+    def mark_dirty(self, x, y, w, h):
+        self.writes += 1
+        x0 = max(x, 0)
+        x1 = min(x + w - 1, self.width - 1)
+        y0 = max(y, 0)
+        y1 = min(y + h - 1, self.height - 1)
+        if x0 > x1 or y0 > y1:
+            return
+        if x0 < self.dirty_x0:
+            self.dirty_x0 = x0
+        if x1 > self.dirty_x1:
+            self.dirty_x1 = x1
+        if y0 >> 3 < self.dirty_p0:
+            self.dirty_p0 = y0 >> 3
+        if y1 >> 3 > self.dirty_p1:
+            self.dirty_p1 = y1 >> 3
+
+    def fill(self, c):
+        super().fill(c)
+        self.writes += 1
+        self.mark_all()
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return super().pixel(x, y)
+        super().pixel(x, y, c)
+        self.mark_dirty(x, y, 1, 1)
+
+    def hline(self, x, y, w, c):
+        super().hline(x, y, w, c)
+        self.mark_dirty(x, y, w, 1)
+
+    def vline(self, x, y, h, c):
+        super().vline(x, y, h, c)
+        self.mark_dirty(x, y, 1, h)
+
+    def line(self, x1, y1, x2, y2, c):
+        super().line(x1, y1, x2, y2, c)
+        self.mark_dirty(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+
+    def rect(self, x, y, w, h, c, *args):
+        super().rect(x, y, w, h, c, *args)
+        self.mark_dirty(x, y, w, h)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        self.mark_dirty(x, y, w, h)
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        super().ellipse(x, y, xr, yr, c, *args)
+        self.mark_dirty(x - xr, y - yr, 2 * xr + 1, 2 * yr + 1)
+
+    def text(self, s, x, y, c=1):
+        super().text(s, x, y, c)
+        self.mark_dirty(x, y, 8 * len(s), 8)
 
+    # Primitives whose extent is not known here dirty the whole screen
+    def poly(self, *args):
+        super().poly(*args)
+        self.writes += 1
+        self.mark_all()
 
+    def blit(self, *args):
+        super().blit(*args)
+        self.writes += 1
+        self.mark_all()
+
+    def scroll(self, dx, dy):
+        super().scroll(dx, dy)
+        self.writes += 1
+        self.mark_all()
+
+    # Sends the dirty window (or the whole buffer with full=True or
+    # partial=False) and records the bytes it cost in frame_bytes
+    def show(self, full=False):
+        if self.scrolling:
+            self.stop_scroll()
+        if full or not self.partial:
+            self.mark_all()
+        x0 = self.dirty_x0
+        if x0 > self.dirty_x1:
+            self.frame_bytes = 0
+            return
+        start = prof.begin()
+        x1 = self.dirty_x1
+        p0 = self.dirty_p0
+        p1 = self.dirty_p1
+        self.mark_clean()
+        self.send_window(self.view, x0, x1, p0, p1)
+        prof.end(OLED_SHOW, start)
+
+    # Writes columns x0..x1 of pages p0..p1 of view to the display RAM
+    def send_window(self, view, x0, x1, p0, p1):
+        sent = self.bytes_sent
+        width = self.width
+        cmds = self.window_cmds
+        cmds[1] = x0 + self.col_offset
+        cmds[2] = x1 + self.col_offset
+        cmds[4] = p0
+        cmds[5] = p1
+        self.write_cmds(cmds)
+        if x0 == 0 and x1 == width - 1:
+            # Full rows are contiguous in the buffer
+            self.write_data(view[p0 * width:(p1 + 1) * width])
+        else:
+            # The controller wraps to x0 of the next page after x1
+            self.write_data_parts([
+                view[p * width + x0:p * width + x1 + 1]
+                for p in range(p0, p1 + 1)
+            ])
+        self.frame_bytes = self.bytes_sent - sent
+
+    # Blocks until no transfer is in progress (see SSD1306_I2C)
+    def wait(self):
+        pass
+
+    # Sends several command bytes, drivers override it to batch them
+    def write_cmds(self, cmds):
+        for cmd in cmds:
+            self.write_cmd(cmd)
+
+    def write_data_parts(self, parts):
+        for part in parts:
+            self.write_data(part)
+
+
+# I2C control bytes: Co (bit 7) says whether another control byte follows
+# the next byte, D/C# (bit 6) whether that byte is data or a command
+CTRL_CMD = const(0x80)         # Co=1, D/C#=0: one command, control follows
+CTRL_CMD_STREAM = const(0x00)  # Co=0, D/C#=0: commands up to the stop
+CTRL_DATA_STREAM = const(0x40) # Co=0, D/C#=1: data up to the stop
+
+# Commands are batched: a command sequence is one transaction (a single
+# CTRL_CMD_STREAM byte then the commands) and show() sends the window
+# setup and the pixels together, the window commands each after a
+# CTRL_CMD byte and the pixels after a final CTRL_DATA_STREAM.
+#
+# With double_buffer=True, show() copies the framebuffer to a front buffer
+# and a background thread (second core on the Pico) sends it, so callers
+# keep drawing the next frame while the I2C transfer runs. A show() made
+# while the previous transfer is still running waits for it to finish.
 class SSD1306_I2C(SSD1306):
-    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False, double_buffer=False):
         self.i2c = i2c
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
+        self.cmd_list = [b"\x00", None]    # Co=0, D/C#=0
+        # Window setup of show() in continuation format, the addresses at
+        # 3, 5, 9 and 11 are filled in for each frame
+        self.window_block = bytearray((
+            CTRL_CMD, SET_COL_ADDR, CTRL_CMD, 0, CTRL_CMD, 0,
+            CTRL_CMD, SET_PAGE_ADDR, CTRL_CMD, 0, CTRL_CMD, 0,
+            CTRL_DATA_STREAM,
+        ))
+        # A partial window is copied into these buffers, one per bit of
+        # its size (1, 2, 4... bytes), so it is sent without slicing
+        self.window_parts = []
+        size = 1
+        while size <= (width - 1) * (height // 8):
+            self.window_parts.append(bytearray(size))
+            size <<= 1
+        # Buffers of one show() transaction: the block, then the pages or
+        # the parts of the window (unused slots stay empty)
+        self.window_vector = [self.window_block] + [b""] * max(height // 8, len(self.window_parts))
+        self.background = False
         super().__init__(width, height, external_vcc)
+        if double_buffer and _thread:
+            self.start_background()
+
+    def start_background(self):
+        self.front = bytearray(len(self.buffer))
+        self.front_view = memoryview(self.front)
+        self.front_pages = self.split_pages(self.front_view)
+        self.window = [0, 0, 0, 0]
+        # _idle is held while a transfer runs, _request wakes the thread
+        self._idle = _thread.allocate_lock()
+        self._request = _thread.allocate_lock()
+        self._request.acquire()
+        self.background = True
+        _thread.start_new_thread(self._flush_loop, ())
+
+    def _flush_loop(self):
+        window = self.window
+        while True:
+            self._request.acquire()
+            try:
+                self.send_window(self.front_view, window[0], window[1], window[2], window[3])
+            except Exception as e:
+                print(f"OLED flush error: {e}")
+            self._idle.release()
+
+    def show(self, full=False):
+        if not self.background:
+            return super().show(full)
+        if self.scrolling:
+            self.stop_scroll()
+        if full or not self.partial:
+            self.mark_all()
+        if self.dirty_x0 > self.dirty_x1:
+            return
+        # Includes waiting for the previous transfer to finish
+        start = prof.begin()
+        self._idle.acquire()
+        self.front[:] = self.buffer
+        window = self.window
+        window[0] = self.dirty_x0
+        window[1] = self.dirty_x1
+        window[2] = self.dirty_p0
+        window[3] = self.dirty_p1
+        self.mark_clean()
+        self._request.release()
+        prof.end(OLED_SHOW, start)
+
+    def wait(self):
+        if self.background:
+            self._idle.acquire()
+            self._idle.release()
+
+    # Window setup and pixels in a single I2C transaction, without
+    # allocating: full rows go out as page views, other windows are
+    # copied into the preallocated parts
+    def send_window(self, view, x0, x1, p0, p1):
+        width = self.width
+        block = self.window_block
+        block[3] = x0 + self.col_offset
+        block[5] = x1 + self.col_offset
+        block[9] = p0
+        block[11] = p1
+        vector = self.window_vector
+        used = 1
+        if x0 == 0 and x1 == width - 1:
+            pages = self.page_views if view is self.view else self.front_pages
+            for p in range(p0, p1 + 1):
+                vector[used] = pages[p]
+                used += 1
+        else:
+            # The controller wraps to x0 of the next page after x1, so the
+            # window is sent page after page, x0..x1 of each
+            parts = self.window_parts
+            left = (x1 - x0 + 1) * (p1 - p0 + 1)
+            bit = len(parts) - 1
+            part = None
+            k = size = 0
+            for p in range(p0, p1 + 1):
+                for i in range(p * width + x0, p * width + x1 + 1):
+                    if k == size:
+                        # Next part: the largest one still fitting
+                        while not (left >> bit) & 1:
+                            bit -= 1
+                        part = parts[bit]
+                        size = len(part)
+                        left -= size
+                        bit -= 1
+                        k = 0
+                        vector[used] = part
+                        used += 1
+                    part[k] = view[i]
+                    k += 1
+        for i in range(used, len(vector)):
+            vector[i] = b""
+        self.i2c.writevto(self.addr, vector)
+        self.frame_bytes = len(block) + (x1 - x0 + 1) * (p1 - p0 + 1)
+        self.bytes_sent += self.frame_bytes
 
     def write_cmd(self, cmd):
-        self.temp[0] = 0x80  # Co=1, D/C#=0
+        self.temp[0] = CTRL_CMD
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
+        self.bytes_sent += 2
+
+    # Several commands in a single I2C transaction
+    def write_cmds(self, cmds):
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+        self.bytes_sent += 1 + len(cmds)
 
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
+        self.bytes_sent += 1 + len(buf)
 
 
 class SSD1306_SPI(SSD1306):
@@ -154,6 +534,16 @@ class SSD1306_SPI(SSD1306):
         self.cs(0)
         self.spi.write(bytearray([cmd]))
         self.cs(1)
+        self.bytes_sent += 1
+
+    def write_cmds(self, cmds):
+        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.cs(1)
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(cmds)
+        self.cs(1)
+        self.bytes_sent += len(cmds)
 
     def write_data(self, buf):
         self.spi.init(baudrate=self.rate, polarity=0, phase=0)
@@ -162,3 +552,4 @@ class SSD1306_SPI(SSD1306):
         self.cs(0)
         self.spi.write(buf)
         self.cs(1)
+        self.bytes_sent += len(buf)
@@ -0,0 +1,201 @@
+# Text layer for the SSD1306 OLED.
+#
+# The screen is 8 rows of 16 characters and each row is exactly one page
+# of the display RAM (8 pixels high, one byte per column), so a rendered
+# string is just the bytes of its columns. The layer remembers what each
+# row shows and only rewrites the rows that changed, copying their bytes
+# into the framebuffer; show() then sends only the dirty pages. Rendered
+# strings are kept in an LRU cache, so the menu and status screens that
+# keep coming back are never rendered twice.
+#
+# Rows too long for the screen can scroll as a marquee: tick() moves them
+# a few pixels at a time and only their page is sent again.
+#
+# Anything else drawing on the OLED (games, exec commands) bumps its
+# write counter; the layer then blanks the screen and draws its rows
+# again instead of trusting what it remembers.
+
+from collections import OrderedDict
+import framebuf
+import time
+
+# Font cell of framebuf.text() (pixels)
+GLYPH = 8
+
+# Bytes of rendered strings kept in the cache
+CACHE_BYTES = 2048
+
+# Marquee: pixels moved per step, time between steps and the blank gap
+# shown between the end of the text and its start
+MARQUEE_STEP = 2
+MARQUEE_MS = 60
+MARQUEE_GAP = "   "
+
+class TextLayer:
+
+    def __init__(self, oled, cache_bytes=CACHE_BYTES):
+        self.oled = oled
+        self.width = oled.width
+        self.rows = oled.height // GLYPH
+        self.cols = oled.width // GLYPH
+        # Text shown on each row and how many columns it covers
+        self.lines = [""] * self.rows
+        self.inked = bytearray(self.rows)
+        # Marquee rows: rendered text (None when not scrolling) and offset
+        self.scrolls = [None] * self.rows
+        self.offsets = [0] * self.rows
+        self.next_step = 0
+        # oled.writes after the layer's last drawing
+        self.writes = oled.writes
+        self.cache = OrderedDict()
+        self.cache_bytes = cache_bytes
+        self.cached = 0
+        self.hits = 0
+        self.misses = 0
+
+    # Columns of a string as drawn by framebuf.text(), one byte each
+    @staticmethod
+    def render(text):
+        columns = bytearray(GLYPH * len(text))
+        if text:
+            fb = framebuf.FrameBuffer(columns, len(columns), GLYPH, framebuf.MONO_VLSB)
+            fb.text(text, 0, 0, 1)
+        return columns
+
+    # Rendered columns of a string, from the cache when possible
+    def glyphs(self, text):
+        cache = self.cache
+        columns = cache.get(text)
+        if columns is not None:
+            self.hits += 1
+            # Move to the most recently used end
+            del cache[text]
+            cache[text] = columns
+            return columns
+
+        self.misses += 1
+        columns = self.render(text)
+        size = len(columns)
+        if size > self.cache_bytes:
+            return columns
+        while cache and self.cached + size > self.cache_bytes:
+            oldest = next(iter(cache))
+            self.cached -= len(cache[oldest])
+            del cache[oldest]
+        cache[text] = columns
+        self.cached += size
+        return columns
+
+    # Copies rendered columns into a row, starting at column `offset` of
+    # them and wrapping around for marquees, and marks what changed
+    def _draw(self, row, columns, offset=0):
+        oled = self.oled
+        width = self.width
+        view = oled.view
+        base = row * width
+        n = len(columns)
+        if n > width:
+            first = min(n - offset, width)
+            source = memoryview(columns)
+            view[base:base + first] = source[offset:offset + first]
+            if first < width:
+                view[base + first:base + width] = source[:width - first]
+            used = width
+        else:
+            view[base:base + n] = columns
+            used = n
+        previous = self.inked[row]
+        if previous > used:
+            oled.fill_rect(used, row * GLYPH, previous - used, GLYPH, 0)
+        oled.mark_dirty(0, row * GLYPH, used, GLYPH)
+        self.inked[row] = used
+        self.writes = oled.writes
+
+    # Starts over when something else drew on the OLED since the layer
+    # last did
+    def _check(self):
+        if self.oled.writes != self.writes:
+            self.reset()
+
+    # Shows text on a row (cut at the screen width), returns False when
+    # the row already showed it
+    def set(self, row, text):
+        if row >= self.rows:
+            return False
+        self._check()
+        if self.scrolls[row] is None and self.lines[row] == text:
+            return False
+        self.scrolls[row] = None
+        self.lines[row] = text
+        self._draw(row, self.glyphs(text[:self.cols]))
+        return True
+
+    # Shows text on a row, scrolling it when it does not fit
+    def marquee(self, row, text):
+        if len(text) <= self.cols:
+            self.set(row, text)
+            return
+        if row >= self.rows:
+            return
+        self._check()
+        if self.scrolls[row] is not None and self.lines[row] == text:
+            return
+        columns = self.render(text + MARQUEE_GAP)
+        self.lines[row] = text
+        self.scrolls[row] = columns
+        self.offsets[row] = 0
+        self._draw(row, columns)
+        self.next_step = time.ticks_add(time.ticks_ms(), MARQUEE_MS)
+
+    # Replaces the whole screen: rows past the end of lines are blanked
+    def show(self, lines):
+        for row in range(self.rows):
+            self.set(row, lines[row] if row < len(lines) else "")
+        self.oled.show()
+
+    # Moves the marquees one step when it is time, returns True if the
+    # screen changed
+    def tick(self):
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.next_step) < 0:
+            return False
+        self.next_step = time.ticks_add(now, MARQUEE_MS)
+        self._check()
+        moved = False
+        for row in range(self.rows):
+            columns = self.scrolls[row]
+            if columns is None:
+                continue
+            offset = (self.offsets[row] + MARQUEE_STEP) % len(columns)
+            self.offsets[row] = offset
+            self._draw(row, columns, offset)
+            moved = True
+        if moved:
+            self.oled.show()
+        return moved
+
+    # Keeps the marquees moving for ms milliseconds (instead of sleeping)
+    def hold(self, ms):
+        end = time.ticks_add(time.ticks_ms(), ms)
+        while True:
+            left = time.ticks_diff(end, time.ticks_ms())
+            if left <= 0:
+                return
+            self.tick()
+            time.sleep_ms(min(left, max(1, time.ticks_diff(self.next_step, time.ticks_ms()))))
+
+    # Blanks the framebuffer and forgets what the rows showed
+    def reset(self):
+        self.oled.fill(0)
+        for row in range(self.rows):
+            self.lines[row] = ""
+            self.inked[row] = 0
+            self.scrolls[row] = None
+        self.writes = self.oled.writes
+
+    def clear(self):
+        self.reset()
+        self.oled.show()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.cache), "bytes": self.cached}
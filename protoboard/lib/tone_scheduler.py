@@ -0,0 +1,227 @@
+# Non-blocking tone scheduler for the PWM buzzers.
+#
+# Notes (frequency Hz, duration ms, volume duty_u16) are queued per voice
+# (one voice per buzzer) and a timer switches the PWM from one note to the
+# next, so callers return right away. Note boundaries follow the planned
+# end of the previous note, not the tick that noticed it, so melodies do
+# not drift. Frequency 0 is a rest.
+
+from machine import Timer
+from array import array
+import time
+
+# Timer resolution: note boundaries land within one tick (ms)
+TICK_MS = 5
+
+# Notes waiting per voice
+QUEUE_SIZE = 64
+
+DEFAULT_VOLUME = 500
+
+# Notes of an uploaded melody (4 bytes each, allocated once)
+MELODY_SIZE = 512
+
+# Queued notes kept ahead of a playing melody
+MELODY_AHEAD = 2
+
+# Preallocated ring of notes of one buzzer
+class Voice:
+
+    def __init__(self, pwm, size=QUEUE_SIZE):
+        self.pwm = pwm
+        self.freqs = array("H", bytes(2 * size))
+        self.durations = array("H", bytes(2 * size))
+        self.volumes = array("H", bytes(2 * size))
+        self.size = size
+        self.head = 0       # next note to play
+        self.count = 0
+        self.dropped = 0
+        self.playing = False
+        self.until = 0      # planned end of the current note (ticks_ms)
+        self.queued_ms = 0  # duration of the queued notes
+
+    def push(self, freq, duration_ms, volume):
+        if self.count == self.size:
+            self.dropped += 1
+            return False
+        i = (self.head + self.count) % self.size
+        self.freqs[i] = freq
+        self.durations[i] = duration_ms
+        self.volumes[i] = volume
+        self.queued_ms += duration_ms
+        self.count += 1
+        return True
+
+    # Milliseconds until everything queued on this voice has played
+    def remaining_ms(self, now):
+        left = self.queued_ms
+        if self.playing:
+            left += max(0, time.ticks_diff(self.until, now))
+        return left
+
+    # Starts the next queued note at `start` (ticks_ms), or goes silent
+    def advance(self, start):
+        if not self.count:
+            self.pwm.duty_u16(0)
+            self.playing = False
+            return
+        i = self.head
+        freq = self.freqs[i]
+        duration = self.durations[i]
+        if freq:
+            self.pwm.freq(freq)
+            self.pwm.duty_u16(self.volumes[i])
+        else:
+            self.pwm.duty_u16(0)
+        self.head = (i + 1) % self.size
+        self.count -= 1
+        self.queued_ms -= duration
+        self.until = time.ticks_add(start, duration)
+        self.playing = True
+
+    def cancel(self):
+        self.count = 0
+        self.queued_ms = 0
+        self.playing = False
+        self.pwm.duty_u16(0)
+
+# A whole song kept on the board, fed to a voice while it plays
+class Melody:
+
+    def __init__(self, size=MELODY_SIZE):
+        self.freqs = array("H", bytes(2 * size))
+        self.durations = array("H", bytes(2 * size))
+        self.size = size
+        self.length = 0
+        self.position = 0   # next note to hand to the voice
+        self.volume = DEFAULT_VOLUME
+
+    def clear(self, volume=DEFAULT_VOLUME):
+        self.length = 0
+        self.position = 0
+        self.volume = volume
+
+    def add(self, freq, duration_ms):
+        if self.length == self.size:
+            raise ValueError("Melody full")
+        self.freqs[self.length] = freq
+        self.durations[self.length] = duration_ms
+        self.length += 1
+
+    def duration_ms(self):
+        total = 0
+        for i in range(self.length):
+            total += self.durations[i]
+        return total
+
+class ToneScheduler:
+
+    def __init__(self, pwms, tick_ms=TICK_MS):
+        self.voices = [Voice(pwm) for pwm in pwms]
+        self.tick_ms = tick_ms
+        self.timer = None
+        self.melody = Melody()
+        self.melody_voice = None  # voice playing the melody, None if stopped
+        # Bound method created once, the timer must not allocate it
+        self._on_tick = self._tick
+
+    # The timer starts with the first note and keeps running until stop()
+    def start(self):
+        if self.timer:
+            return
+        self.timer = Timer()
+        self.timer.init(period=self.tick_ms, mode=Timer.PERIODIC, callback=self._on_tick)
+
+    def stop(self):
+        self.cancel()
+        if self.timer:
+            self.timer.deinit()
+            self.timer = None
+
+    def _tick(self, timer):
+        now = time.ticks_ms()
+        if self.melody_voice is not None:
+            self._feed_melody()
+        for voice in self.voices:
+            if voice.playing:
+                if time.ticks_diff(now, voice.until) >= 0:
+                    # Next note starts where this one was planned to end
+                    voice.advance(voice.until)
+            elif voice.count:
+                voice.advance(now)
+
+    # Keeps a few melody notes queued ahead of the one playing
+    def _feed_melody(self):
+        melody = self.melody
+        voice = self.voices[self.melody_voice]
+        while voice.count < MELODY_AHEAD and melody.position < melody.length:
+            i = melody.position
+            voice.push(melody.freqs[i], melody.durations[i], melody.volume)
+            melody.position += 1
+        if melody.position == melody.length and not voice.count and not voice.playing:
+            self.melody_voice = None
+
+    # Plays the stored melody on a voice
+    def play_melody(self, voice=0):
+        self.cancel(voice)
+        self.melody.position = 0
+        self.melody_voice = voice
+        self._feed_melody()
+        self.start()
+
+    # Melody notes already started, None when no melody is playing
+    def melody_progress(self):
+        if self.melody_voice is None:
+            return None
+        voice = self.voices[self.melody_voice]
+        return self.melody.position - voice.count
+
+    # Queues one note, returns right away
+    def tone(self, freq, duration_ms, volume=DEFAULT_VOLUME, voice=0):
+        queued = self.voices[voice].push(freq, duration_ms, volume)
+        self.start()
+        return queued
+
+    def rest(self, duration_ms, voice=0):
+        return self.tone(0, duration_ms, 0, voice)
+
+    # Queues a melody: (freq, ms) or (freq, ms, volume) notes
+    def play(self, notes, voice=0, volume=DEFAULT_VOLUME):
+        for note in notes:
+            self.tone(note[0], note[1], note[2] if len(note) > 2 else volume, voice)
+
+    # Pads the voices with rests so the next notes start together
+    def sync(self):
+        now = time.ticks_ms()
+        longest = max(voice.remaining_ms(now) for voice in self.voices)
+        for voice in self.voices:
+            gap = longest - voice.remaining_ms(now)
+            if gap > 0:
+                voice.push(0, gap, 0)
+
+    # Two notes at once, one per buzzer
+    def chord(self, freqs, duration_ms, volume=DEFAULT_VOLUME):
+        self.sync()
+        for voice in range(min(len(freqs), len(self.voices))):
+            self.tone(freqs[voice], duration_ms, volume, voice)
+
+    # Two melodies played together, one on each buzzer
+    def duet(self, first, second, volume=DEFAULT_VOLUME):
+        self.sync()
+        self.play(first, 0, volume)
+        self.play(second, 1, volume)
+
+    def busy(self, voice=None):
+        voices = self.voices if voice is None else (self.voices[voice],)
+        for v in voices:
+            if v.playing or v.count:
+                return True
+        return False
+
+    # Silences the buzzers and drops what is queued
+    def cancel(self, voice=None):
+        if voice is None or voice == self.melody_voice:
+            self.melody_voice = None
+        voices = self.voices if voice is None else (self.voices[voice],)
+        for v in voices:
+            v.cancel()
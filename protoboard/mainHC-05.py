@@ -1,69 +1,81 @@
-
+from startup import timeline
+import sys
 import time
 import gc
-from machine import Pin
-import neopixel
 
 print("Initializating BitDogLab")
-=======
-"""
-Este código deve ser salvo direto na raspiberry pi em "Salvar Como" para funcionar o módulo bluetooth
-"""
-from machine import UART
-from machine import PWM, Pin,I2C, Timer, ADC
-from ssd1306 import SSD1306_I2C
-import bluetooth
-# Configuração do UART para HC-05
-uart = UART(0, baudrate=9600)
-uart.init(9600, bits=8, parity=None, stop=1)
-# Configurando o LED RGB
-led_r = PWM(Pin(12))
-led_g = PWM(Pin(13))
-led_b = PWM(Pin(11))
-
-led_r.freq(1000)
-led_g.freq(1000)
-led_b.freq(1000)
 
 # Imports hardware
 print("Loading hardware...")
 from hardware import (
-    update_oled, clear_oled,
+    update_oled, clear_oled, scroll_oled, fade_oled, oled, oled_text,
     clear_neopixels,
-    joy_up,joy_down, button_a, button_b,
-    led,
+    led, rgb_off,
     play_tone
 )
+timeline.stage("hardware")
 
-# Imports connection modules
-print("Loading connection modules...")
-from connections.bluetooth_hc05 import bluetooth_hc05
-from connections.wifi import wifi
+from inputs import events, press, BUTTON_A, JOY_UP, JOY_DOWN
+timeline.stage("inputs")
 
-# Imports snake game
-print("Loading snake game...")
-from games.snake_game import snake_start
+# Heap sampling, and collections moved to idle time
+from telemetry import heap
+GC_POLICY = "idle"
+heap.set_policy(GC_POLICY)
+heap.start()
+timeline.stage("telemetry")
 
 print("=" * 40)
 
-# Menu
+# Menu: each option names the module and function that run it. The
+# module is only imported when the option is selected and is freed
+# again when it returns to the menu. Games come from games.GAMES.
+from games import GAMES
+
 MENU_OPTIONS = [
     {
         "name": "Modulo HC-05",
-        "func": bluetooth_hc05
+        "module": "connections.bluetooth_hc05",
+        "func": "bluetooth_hc05"
     },
     {
         "name": "WiFi",
-        "func": wifi
-    },
-    {
-        "name": "Jogo Snake",
-        "func": snake_start
+        "module": "connections.wifi",
+        "func": "wifi"
     }
-]
+] + GAMES
 
-# Show menu on OLED Display
-def show_menu(selected_index):
+# Imports the option's module and runs its function, then drops every
+# module loaded for it so their memory can be collected
+def run_option(option):
+    loaded = set(sys.modules)
+    
+    start = time.ticks_ms()
+    free = gc.mem_free()
+    __import__(option['module'])
+    module = sys.modules[option['module']]
+    print(f"Loaded {option['module']}: {time.ticks_diff(time.ticks_ms(), start)} ms, {free - gc.mem_free()} bytes")
+    
+    try:
+        getattr(module, option['func'])()
+    finally:
+        module = None
+        for name in list(sys.modules):
+            if name not in loaded:
+                del sys.modules[name]
+                # A package loaded before still holds its new submodule
+                package, _, child = name.rpartition(".")
+                if package in loaded and package in sys.modules:
+                    parent = sys.modules[package]
+                    if getattr(parent, child, None) is not None:
+                        delattr(parent, child)
+        # The option drew on the OLED by itself
+        oled_text.reset()
+        heap.collect()
+        print(f"Heap after {option['name']}: {heap.stats()}")
+
+# Show menu on OLED Display (fading in when coming back from an option)
+def show_menu(selected_index, fade=False):
     option = MENU_OPTIONS[selected_index]
     
     # Setups OLED lines
@@ -78,7 +90,10 @@ def show_menu(selected_index):
         "A: Selecionar"
     ]
     
-    update_oled(lines)
+    if fade:
+        fade_oled(lines)
+    else:
+        update_oled(lines)
 
 # Startup animation
 def show_startup_animation():
@@ -92,10 +107,71 @@ def show_startup_animation():
         "  Pronto!",
     ])
     
-    import time
+    # The controller fades the splash out by itself
+    oled.fade(16)
     time.sleep(1)
     
     clear_oled()
+    oled.fade(0)
+
+# Handles one input event of the menu, returns the selected option
+def menu_event(event, selected):
+    
+    # Joystick navigation
+    if event == press(JOY_UP):
+        selected = (selected - 1) % len(MENU_OPTIONS)
+        show_menu(selected)
+    
+    elif event == press(JOY_DOWN):
+        selected = (selected + 1) % len(MENU_OPTIONS)
+        show_menu(selected)
+    
+    # Selection with button(A)
+    elif event == press(BUTTON_A):
+        option = MENU_OPTIONS[selected]
+        
+        print(f"Selected option: {option['name']}")
+        
+        # Show transition screen, "Aguarde..." scrolled by the
+        # controller while waiting
+        fade_oled([
+            "Iniciando:",
+            "",
+            option['name'],
+            "",
+            "Aguarde..."
+        ])
+        oled.start_scroll(start_page=4, end_page=4, frames=2)
+        
+        time.sleep(1)
+        oled.stop_scroll()
+        events.clear()
+        
+        # Runs the selected option
+        try:
+            run_option(option)
+        except Exception as e:
+            print(f"Error on run: {option['name']}: {e}")
+            update_oled([
+                "ERRO!",
+                "",
+                option['name'],
+                "falhou:",
+            ])
+            play_tone(200, 0.5)
+            scroll_oled(5, str(e), 3000)
+        
+        # Back to menu
+        print("Going back to menu...")
+        rgb_off()
+        led.off()
+        show_menu(selected, fade=True)
+        play_tone(1000, 0.05)
+        
+        # Ignores what was pressed inside the option
+        events.clear()
+    
+    return selected
 
 # Manage the selection and navigation menu
 def main():
@@ -111,100 +187,31 @@ def main():
     # Show up the initial menu
     show_menu(selected)
     
-    # Variables for buttons debounce
-    last_up = False
-    last_down = False
-    last_button_a = False
+    # Debounced joystick/button events
+    events.start()
+    events.clear()
     
     print("Menu active, use joystick to navigate")
+    timeline.stage("menu")
+    timeline.report()
     
     try:
         while True:
-            # Joystick navigation
-            
-            current_up = joy_up()
-            if current_up and not last_up:
-                selected = (selected - 1) % len(MENU_OPTIONS)
-                show_menu(selected)
-                time.sleep(0.2)  # Debounce
-            last_up = current_up
-
-            current_down = joy_down()
-            if current_down and not last_down:
-                selected = (selected + 1) % len(MENU_OPTIONS)
-                show_menu(selected)
-                time.sleep(0.2)  # Debounce
-            last_down = current_down
-            
-            # Selection with button(A)
-            current_button_a = button_a.value() == 0
-            if current_button_a and not last_button_a:
-                option = MENU_OPTIONS[selected]
-                
-                print(f"Selected option: {option['name']}")
-                
-                # Show transition screen
-                update_oled([
-                    "Iniciando:",
-                    "",
-                    option['name'],
-                    "",
-                    "Aguarde..."
-                ])
-                
-                time.sleep(1)
-                
-                # Runs the selected option
-                try:
-                    option['func']()
-                except Exception as e:
-                    print(f"Error on run: {option['name']}: {e}")
-                    update_oled([
-                        "ERRO!",
-                        "",
-                        option['name'],
-                        "falhou:",
-                        "",
-                        str(e)[:16],
-                        str(e)[16:32] if len(str(e)) > 16 else ""
-                    ])
-                    play_tone(200, 0.5)
-                    time.sleep(3)
-                
-                # Back to menu
-                print("Going back to menu...")
-                rgb_off()
-                led.off()
-                show_menu(selected)
-                play_tone(1000, 0.05)
-                
-                # Clear memory
-                gc.collect()
-                
-                time.sleep(0.3)  # Debounce
-                
-            last_button_a = current_button_a
-            
-            # Short pause to not overcharge
-            time.sleep(0.01)
-            
+            selected = menu_event(events.wait(), selected)
+    
     except KeyboardInterrupt:
         rgb_off()
         led.off()
         clear_oled()
     except Exception as e:
         print(f"Fatal error on menu: {e}")
-        update_oled([
-            "ERRO FATAL!",
-            "",
-            str(e)[:16],
-            str(e)[16:32] if len(str(e)) > 16 else ""
-        ])
+        update_oled(["ERRO FATAL!"])
+        scroll_oled(2, str(e))
         
         # Error led
         for _ in range(10):
             led.toggle()
-            time.sleep(0.1)
+            oled_text.hold(100)
 
         
         raise
@@ -0,0 +1,93 @@
+# Imports
+import time
+from array import array
+from micropython import const
+
+# Instrumented hot paths. Spans are small ints so recording one never
+# allocates; SPANS holds their names, in the same order.
+UART_READ = const(0)   # framer.fill() from the HC-05 UART
+EXEC = const(1)        # one text command run with exec()
+FRAME = const(2)       # one binary frame
+NP_WRITE = const(3)    # np.write() of a matrix frame
+OLED_SHOW = const(4)   # oled.show() as seen by the caller
+REPLY = const(5)       # writing a reply to the transport
+TCP_SEND = const(6)    # writer.drain(): the socket send of the replies
+SPANS = ("uart_read", "exec", "frame", "np_write", "oled_show", "reply", "tcp_send")
+
+# Upper bounds of the histogram buckets (us), the last bucket has no limit
+BUCKET_US = array("I", (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000))
+BUCKETS = len(BUCKET_US) + 1
+
+# Span timing with fixed-bucket histograms, off by default.
+#
+#   start = prof.begin()
+#   ...hot path...
+#   prof.end(EXEC, start)
+#
+# Disabled, begin() returns 0 and end() returns right away, so the hooks
+# stay in production firmware. Enabled, a sample only updates preallocated
+# arrays (no allocation, safe from timer callbacks). Totals are kept in
+# 32 bits and wrap after ~71 minutes of time spent in one span.
+class Profiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.counts = array("I", bytes(4 * len(SPANS)))
+        self.total_us = array("I", bytes(4 * len(SPANS)))
+        self.max_us = array("I", bytes(4 * len(SPANS)))
+        self.histogram = array("I", bytes(4 * len(SPANS) * BUCKETS))
+
+    def on(self):
+        self.enabled = True
+
+    def off(self):
+        self.enabled = False
+
+    def reset(self):
+        for i in range(len(SPANS)):
+            self.counts[i] = 0
+            self.total_us[i] = 0
+            self.max_us[i] = 0
+        for i in range(len(self.histogram)):
+            self.histogram[i] = 0
+
+    # Start time of a span, 0 when profiling is off
+    def begin(self):
+        if not self.enabled:
+            return 0
+        return time.ticks_us() or 1
+
+    # Records the span started at `start`
+    def end(self, span, start):
+        if not start:
+            return
+        us = time.ticks_diff(time.ticks_us(), start)
+        self.counts[span] += 1
+        self.total_us[span] = (self.total_us[span] + us) & 0xFFFFFFFF
+        if us > self.max_us[span]:
+            self.max_us[span] = us
+        bucket = 0
+        while bucket < BUCKETS - 1 and us >= BUCKET_US[bucket]:
+            bucket += 1
+        self.histogram[span * BUCKETS + bucket] += 1
+
+    # Report as text lines: a header, then one line per span that has
+    # samples with count, average, max and the bucket counts
+    def lines(self):
+        yield "PROF span n avg_us max_us " + " ".join(f"<{edge}" for edge in BUCKET_US) + " more"
+        for span in range(len(SPANS)):
+            n = self.counts[span]
+            if not n:
+                continue
+            start = span * BUCKETS
+            buckets = " ".join(str(c) for c in self.histogram[start:start + BUCKETS])
+            yield f"PROF {SPANS[span]} {n} {self.total_us[span] // n} {self.max_us[span]} {buckets}"
+
+    def report(self):
+        for line in self.lines():
+            print(line)
+
+# Hot path profiler of the board
+prof = Profiler()
+
+print("(✓) profiler.py")
@@ -0,0 +1,75 @@
+# Host-side simulator of the BitDogLab board.
+#
+# Provides CPython stand-ins for the MicroPython modules the firmware
+# imports (machine, neopixel, network, framebuf, micropython) and the
+# MicroPython extensions of time and gc, so hardware.py, lib/ssd1306.py,
+# the games and the connection modes run unchanged on a PC:
+#
+#   import sim
+#   sim.install()
+#   import hardware
+#
+# Buses record what they would cost on the board (see sim.clock). Not
+# meant to be copied to the Pico.
+
+# Imports
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from sim import clock as _clock
+
+# RAM available to MicroPython on the Pico W, reported by gc.mem_free()
+HEAP_SIZE = 192 * 1024
+
+# Directory holding hardware.py and the firmware packages
+FIRMWARE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_threshold = -1
+
+# gc extensions. Heap use is measured with tracemalloc, started by
+# install(); CPython objects are bigger than MicroPython ones, so compare
+# numbers between host runs, not with the board.
+def mem_alloc():
+    if not tracemalloc.is_tracing():
+        return 0
+    return tracemalloc.get_traced_memory()[0]
+
+def mem_free():
+    return max(0, HEAP_SIZE - mem_alloc())
+
+def threshold(amount=None):
+    global _threshold
+    if amount is None:
+        return _threshold
+    _threshold = amount
+
+# Registers the simulated modules. realtime=True makes every bus transfer
+# also take its modelled time, so the firmware runs at board speed.
+def install(realtime=False, trace_memory=True):
+    from sim import machine, neopixel, network, framebuf, micropython
+    sys.modules["machine"] = machine
+    sys.modules["neopixel"] = neopixel
+    sys.modules["network"] = network
+    sys.modules["framebuf"] = framebuf
+    sys.modules["micropython"] = micropython
+
+    for name in ("ticks_ms", "ticks_us", "ticks_cpu", "ticks_add", "ticks_diff", "sleep_ms", "sleep_us"):
+        setattr(time, name, getattr(_clock, name))
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+    gc.threshold = threshold
+
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _clock.clock.realtime = realtime
+    if FIRMWARE_DIR not in sys.path:
+        sys.path.insert(0, FIRMWARE_DIR)
+
+# Modelled bus time so far, {bus: seconds}
+def bus_time():
+    return dict(_clock.clock.busy)
+
+def reset_bus_time():
+    _clock.clock.reset()
@@ -0,0 +1,54 @@
+# Imports
+import time
+
+# MicroPython ticks wrap around at 2**30
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+_start = time.perf_counter()
+
+# Modelled bus time. Every simulated bus charges the time its transfers
+# would take on the board (I2C/UART at their configured baud rate, the
+# Neopixel bitstream). With realtime enabled the simulator also sleeps
+# for it, so firmware timing behaves like on the Pico.
+class Clock:
+
+    def __init__(self):
+        self.realtime = False
+        self.busy = {}
+
+    def charge(self, bus, seconds):
+        self.busy[bus] = self.busy.get(bus, 0.0) + seconds
+        if self.realtime and seconds > 0:
+            time.sleep(seconds)
+
+    def reset(self):
+        self.busy = {}
+
+clock = Clock()
+
+# time module extensions of MicroPython
+def ticks_us():
+    return int((time.perf_counter() - _start) * 1000000) & TICKS_MAX
+
+def ticks_ms():
+    return int((time.perf_counter() - _start) * 1000) & TICKS_MAX
+
+def ticks_cpu():
+    return ticks_us()
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2) & TICKS_MAX
+    if diff >= TICKS_HALFPERIOD:
+        diff -= TICKS_PERIOD
+    return diff
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000)
+
+def sleep_us(us):
+    time.sleep(us / 1000000)
@@ -0,0 +1,198 @@
+# Host stand-in for the framebuf module.
+#
+# Only MONO_VLSB (the SSD1306 layout) is simulated: each byte is a column
+# of 8 vertical pixels, bit 0 on top, pages of `stride` bytes.
+# The 8x8 glyphs drawn by text() are placeholders (the board's font is
+# not bundled): every character touches the same 8x8 cell as on the
+# board, so dirty regions and transfer sizes match, but shapes do not.
+
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+
+def _make_font():
+    font = []
+    for code in range(32, 128):
+        glyph = bytearray(8)
+        if code != 32:
+            h = (code * 2654435761) & 0xFFFFFFFF
+            for j in range(1, 6):
+                glyph[j] = ((h >> (j * 5)) & 0x7E) | 0x02
+        font.append(bytes(glyph))
+    return font
+
+_FONT = _make_font()
+
+class FrameBuffer:
+
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format != MONO_VLSB:
+            raise ValueError("only MONO_VLSB is simulated")
+        self._buf = buffer
+        self._width = width
+        self._height = height
+        self._stride = width if stride is None else stride
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            return None
+        index = (y >> 3) * self._stride + x
+        bit = 1 << (y & 7)
+        if c is None:
+            return 1 if self._buf[index] & bit else 0
+        if c:
+            self._buf[index] |= bit
+        else:
+            self._buf[index] &= ~bit & 0xFF
+
+    def fill(self, c):
+        value = 0xFF if c else 0x00
+        for i in range(len(self._buf)):
+            self._buf[i] = value
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        x1 = min(x + w, self._width)
+        y0 = max(y, 0)
+        y1 = min(y + h, self._height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        buf = self._buf
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            top = max(y0, page * 8) - page * 8
+            bottom = min(y1, page * 8 + 8) - page * 8
+            mask = ((1 << bottom) - 1) & ~((1 << top) - 1)
+            base = page * self._stride
+            for i in range(base + x0, base + x1):
+                if c:
+                    buf[i] |= mask
+                else:
+                    buf[i] &= ~mask & 0xFF
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    # Quadrants of ellipse() (m): bit 0 top right, 1 top left, 2 bottom
+    # left, 3 bottom right, like the board's framebuf
+    def ellipse(self, x, y, xr, yr, c, f=False, m=0b1111):
+        quadrants = ((1, -1, 1), (-1, -1, 2), (-1, 1, 4), (1, 1, 8))
+
+        def half_width(dy):
+            if not yr:
+                return xr
+            return round(xr * (1 - (dy / yr) ** 2) ** 0.5)
+
+        def half_height(dx):
+            if not xr:
+                return yr
+            return round(yr * (1 - (dx / xr) ** 2) ** 0.5)
+
+        for sx, sy, bit in quadrants:
+            if not m & bit:
+                continue
+            if f:
+                for dy in range(yr + 1):
+                    w = half_width(dy)
+                    left = x if sx > 0 else x - w
+                    self.fill_rect(left, y + sy * dy, w + 1, 1, c)
+                continue
+            # Both axes are walked so steep and flat parts have no gaps
+            for dx in range(xr + 1):
+                self.pixel(x + sx * dx, y + sy * half_height(dx), c)
+            for dy in range(yr + 1):
+                self.pixel(x + sx * half_width(dy), y + sy * dy, c)
+
+    # Closed polygon through the (x, y) pairs of coords, offset by x, y.
+    # Filled with the even-odd rule at the pixel centres.
+    def poly(self, x, y, coords, c, f=False):
+        n = len(coords) // 2
+        if not n:
+            return
+        points = [(x + coords[2 * i], y + coords[2 * i + 1]) for i in range(n)]
+        if f:
+            top = min(py for _, py in points)
+            bottom = max(py for _, py in points)
+            for row in range(top, bottom + 1):
+                centre = row + 0.5
+                crossings = []
+                for i in range(n):
+                    x1, y1 = points[i]
+                    x2, y2 = points[(i + 1) % n]
+                    if (y1 <= centre) != (y2 <= centre):
+                        crossings.append(x1 + (centre - y1) * (x2 - x1) / (y2 - y1))
+                crossings.sort()
+                for k in range(0, len(crossings) - 1, 2):
+                    left = round(crossings[k])
+                    right = round(crossings[k + 1])
+                    self.fill_rect(left, row, right - left + 1, 1, c)
+        for i in range(n):
+            x1, y1 = points[i]
+            x2, y2 = points[(i + 1) % n]
+            self.line(x1, y1, x2, y2, c)
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            code = ord(ch)
+            if code < 32 or code > 127:
+                code = 127
+            glyph = _FONT[code - 32]
+            for j in range(8):
+                column = glyph[j]
+                for i in range(8):
+                    if column & (1 << i):
+                        self.pixel(x + j, y + i, c)
+            x += 8
+
+    def scroll(self, xstep, ystep):
+        width = self._width
+        height = self._height
+        pixels = [[self.pixel(x, y) for x in range(width)] for y in range(height)]
+        for y in range(height):
+            for x in range(width):
+                sx = x - xstep
+                sy = y - ystep
+                if 0 <= sx < width and 0 <= sy < height:
+                    self.pixel(x, y, pixels[sy][sx])
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        for sy in range(fbuf._height):
+            for sx in range(fbuf._width):
+                c = fbuf.pixel(sx, sy)
+                if palette is not None:
+                    c = palette.pixel(c, 0)
+                if c != key:
+                    self.pixel(x + sx, y + sy, c)
@@ -0,0 +1,428 @@
+# Host stand-in for the machine module.
+#
+# Pins, PWM and ADC keep their state in plain attributes that host code
+# can read or drive (Pin.sim_set, ADC.sim_set). I2C counts transactions
+# and bytes, UARTs are connected to a host-side peer and Timers run their
+# callbacks from a background thread, like soft IRQs on the board.
+
+# Imports
+import threading
+import time
+from array import array
+from collections import deque
+from sim.clock import clock, sleep_ms
+
+# (freq, duty) changes kept per PWM
+PWM_HISTORY = 64
+
+# ======================================================================
+#   Pin
+# ======================================================================
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_LOW_LEVEL = 1
+    IRQ_HIGH_LEVEL = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 1 if pull == Pin.PULL_UP else 0
+        self._handler = None
+        self._trigger = 0
+        if value is not None:
+            self._value = 1 if value else 0
+
+    def init(self, mode=-1, pull=-1, value=None):
+        self.mode = mode
+        self.pull = pull
+        if value is not None:
+            self._value = 1 if value else 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    __call__ = value
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self._value ^= 1
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self._handler = handler
+        self._trigger = trigger
+
+    # Drives an input pin from host code, firing its IRQ handler
+    def sim_set(self, v):
+        v = 1 if v else 0
+        old = self._value
+        self._value = v
+        if self._handler is None or old == v:
+            return
+        if (v and self._trigger & Pin.IRQ_RISING) or (not v and self._trigger & Pin.IRQ_FALLING):
+            self._handler(self)
+
+    def __repr__(self):
+        return f"Pin({self.id!r})"
+
+# ======================================================================
+#   PWM and ADC
+# ======================================================================
+
+class PWM:
+
+    def __init__(self, pin, freq=None, duty_u16=None):
+        self.pin = pin
+        self._freq = 0 if freq is None else freq
+        self._duty = 0 if duty_u16 is None else duty_u16
+        # Last (freq, duty) changes, copied into arrays so the simulator
+        # keeps no reference to the firmware's objects
+        self._freqs = array("L", [0] * PWM_HISTORY)
+        self._duties = array("L", [0] * PWM_HISTORY)
+        self._changes = 0
+
+    def _record(self):
+        i = self._changes % PWM_HISTORY
+        self._freqs[i] = self._freq
+        self._duties[i] = self._duty
+        self._changes += 1
+
+    # (freq, duty) changes, oldest first, for checking what was played
+    @property
+    def history(self):
+        count = min(self._changes, PWM_HISTORY)
+        first = self._changes - count
+        return [
+            (self._freqs[i % PWM_HISTORY], self._duties[i % PWM_HISTORY])
+            for i in range(first, self._changes)
+        ]
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        if value <= 0:
+            raise ValueError("freq out of range")
+        self._freq = value
+        self._record()
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        self._duty = value
+        self._record()
+
+    def deinit(self):
+        self._duty = 0
+
+class ADC:
+
+    def __init__(self, pin):
+        self.pin = pin
+        # Joystick at rest sits at mid scale
+        self._value = 32768
+
+    def read_u16(self):
+        return self._value
+
+    def sim_set(self, value):
+        self._value = value
+
+# ======================================================================
+#   I2C
+# ======================================================================
+
+# Start + address byte + stop, in bit times
+I2C_OVERHEAD_BITS = 11
+
+class I2C:
+
+    def __init__(self, id=0, scl=None, sda=None, freq=400000, timeout=50000):
+        self.id = id
+        self.scl = scl
+        self.sda = sda
+        self.freq = freq
+        self.transactions = 0
+        self.bytes = 0
+        # addr -> callable(bytes) receiving every write
+        self.devices = {}
+
+    def attach(self, addr, device):
+        self.devices[addr] = device
+
+    def reset_stats(self):
+        self.transactions = 0
+        self.bytes = 0
+
+    def _count(self, size):
+        self.transactions += 1
+        self.bytes += size
+        clock.charge("i2c", (I2C_OVERHEAD_BITS + 9 * size) / self.freq)
+
+    def _transfer(self, addr, data):
+        self._count(len(data))
+        device = self.devices.get(addr)
+        if device is not None:
+            device(data)
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def writeto(self, addr, buf, stop=True):
+        self._transfer(addr, bytes(buf))
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        if addr not in self.devices:
+            # Nothing decodes the bytes, only their count matters (and the
+            # allocation benchmarks see no copies made by the simulator)
+            size = 0
+            for buf in vector:
+                size += len(buf)
+            self._count(size)
+            return size
+        data = b"".join(bytes(buf) for buf in vector)
+        self._transfer(addr, data)
+        return len(data)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        self._transfer(addr, bytes(nbytes))
+        return bytes(nbytes)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        self._transfer(addr, bytes(len(buf)))
+
+SoftI2C = I2C
+
+# ======================================================================
+#   UART
+# ======================================================================
+
+# One direction of a serial link. Written bytes only become readable once
+# their wire time (10 bits per byte at the baud rate) has passed, so the
+# link has the same bandwidth as the real one.
+class _Wire:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chunks = deque()  # (ready_at, bytes)
+        self.free_at = 0.0     # when the line finishes the queued bytes
+        self.data = bytearray()
+        self.bytes = 0
+
+    def send(self, data, baudrate):
+        if not data:
+            return
+        seconds = len(data) * 10 / baudrate
+        clock.charge("uart", seconds)
+        with self.lock:
+            now = time.perf_counter()
+            ready_at = max(now, self.free_at) + seconds
+            self.free_at = ready_at
+            self.chunks.append((ready_at if clock.realtime else 0.0, bytes(data)))
+            self.bytes += len(data)
+
+    def _collect(self):
+        now = time.perf_counter()
+        while self.chunks and self.chunks[0][0] <= now:
+            self.data += self.chunks.popleft()[1]
+
+    def any(self):
+        with self.lock:
+            self._collect()
+            return len(self.data)
+
+    def read(self, nbytes=None):
+        with self.lock:
+            self._collect()
+            if nbytes is None:
+                nbytes = len(self.data)
+            out = bytes(self.data[:nbytes])
+            del self.data[:nbytes]
+            return out
+
+class _Link:
+
+    def __init__(self):
+        self.to_board = _Wire()
+        self.to_host = _Wire()
+        self.baudrate = 9600
+
+_links = {}
+
+def _link(id):
+    if id not in _links:
+        _links[id] = _Link()
+    return _links[id]
+
+class UART:
+
+    def __init__(self, id, baudrate=9600, bits=8, parity=None, stop=1, **kwargs):
+        self.id = id
+        self._link = _link(id)
+        self.init(baudrate)
+
+    def init(self, baudrate=9600, bits=8, parity=None, stop=1, **kwargs):
+        self._link.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def any(self):
+        return self._link.to_board.any()
+
+    def read(self, nbytes=None):
+        data = self._link.to_board.read(nbytes)
+        return data or None
+
+    def readinto(self, buf, nbytes=None):
+        if nbytes is None:
+            nbytes = len(buf)
+        data = self._link.to_board.read(nbytes)
+        buf[:len(data)] = data
+        return len(data) or None
+
+    def readline(self):
+        return self.read()
+
+    def write(self, buf):
+        if isinstance(buf, str):
+            buf = buf.encode()
+        self._link.to_host.send(buf, self._link.baudrate)
+        return len(buf)
+
+    def flush(self):
+        pass
+
+# Host end of UART id: what the app (phone + HC-05) would see
+class UARTPeer:
+
+    def __init__(self, id):
+        self._link = _link(id)
+
+    @property
+    def baudrate(self):
+        return self._link.baudrate
+
+    def write(self, buf):
+        if isinstance(buf, str):
+            buf = buf.encode()
+        self._link.to_board.send(buf, self._link.baudrate)
+        return len(buf)
+
+    def any(self):
+        return self._link.to_host.any()
+
+    def read(self, nbytes=None):
+        return self._link.to_host.read(nbytes)
+
+    # Reads one line sent by the board, None after timeout_ms
+    def readline(self, timeout_ms=1000):
+        deadline = time.perf_counter() + timeout_ms / 1000
+        line = bytearray()
+        while time.perf_counter() < deadline:
+            data = self._link.to_host.read(1)
+            if not data:
+                time.sleep(0.0002)
+                continue
+            line += data
+            if data == b"\n":
+                return bytes(line)
+        return None
+
+    # Bytes written in each direction so far
+    def stats(self):
+        return {
+            "to_board": self._link.to_board.bytes,
+            "to_host": self._link.to_host.bytes,
+        }
+
+def uart_peer(id):
+    return UARTPeer(id)
+
+# Drops every UART link (fresh state between runs)
+def reset_uarts():
+    _links.clear()
+
+# ======================================================================
+#   Timer
+# ======================================================================
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self._thread = None
+        self._stop = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, tick_hz=1000, callback=None):
+        self.deinit()
+        if freq > 0:
+            interval = 1 / freq
+        else:
+            interval = period / tick_hz
+        stop = threading.Event()
+        self._stop = stop
+
+        def run():
+            next_at = time.perf_counter() + interval
+            while not stop.wait(max(0, next_at - time.perf_counter())):
+                if callback is not None:
+                    callback(self)
+                if mode == Timer.ONE_SHOT:
+                    return
+                next_at += interval
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def deinit(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+# ======================================================================
+#   Misc
+# ======================================================================
+
+def idle():
+    sleep_ms(1)
+
+def freq(hz=None):
+    return 150000000
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+def soft_reset():
+    raise SystemExit("machine.soft_reset()")
+
+def unique_id():
+    return b"SIMBOARD"
+
+def disable_irq():
+    return 0
+
+def enable_irq(state=0):
+    pass
@@ -0,0 +1,33 @@
+# Host stand-in for the micropython module
+
+def const(value):
+    return value
+
+# Code emitters are plain Python on the host
+def native(func):
+    return func
+
+def viper(func):
+    return func
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def schedule(func, arg):
+    func(arg)
+
+def heap_lock():
+    return 0
+
+def heap_unlock():
+    return 0
+
+def kbd_intr(chr):
+    pass
+
+def opt_level(level=None):
+    return 0
+
+def mem_info(verbose=False):
+    import gc
+    print(f"mem: total={gc.mem_alloc() + gc.mem_free()}, current={gc.mem_alloc()}")
@@ -0,0 +1,41 @@
+# Imports
+from sim.clock import clock
+
+# WS2812 bit time (800 kHz) and latch time, in seconds
+BIT_TIME = 1.25e-6
+RESET_TIME = 50e-6
+
+# Host stand-in for the neopixel module, same buffer layout as the board
+class NeoPixel:
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n, bpp=3, timing=1):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.buf = bytearray(n * bpp)
+        self.timing = timing
+        self.writes = 0
+        # Colors shown by the last write(), as (r, g, b[, w]) tuples
+        self.shown = [(0,) * bpp] * n
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, i, v):
+        offset = i * self.bpp
+        for j in range(self.bpp):
+            self.buf[offset + self.ORDER[j]] = v[j]
+
+    def __getitem__(self, i):
+        offset = i * self.bpp
+        return tuple(self.buf[offset + self.ORDER[j]] for j in range(self.bpp))
+
+    def fill(self, v):
+        for i in range(self.n):
+            self[i] = v
+
+    def write(self):
+        self.writes += 1
+        self.shown = [self[i] for i in range(self.n)]
+        clock.charge("neopixel", len(self.buf) * 8 * BIT_TIME + RESET_TIME)
@@ -0,0 +1,53 @@
+# Host stand-in for the network module. The access point is only state;
+# sockets are the host's own, so the firmware's TCP server listens on
+# the local machine and clients connect to 127.0.0.1.
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 3
+
+_interfaces = {}
+
+class WLAN:
+
+    def __new__(cls, interface=STA_IF):
+        # One object per interface, like the board
+        if interface not in _interfaces:
+            wlan = super().__new__(cls)
+            wlan.interface = interface
+            wlan._active = False
+            wlan._config = {"essid": "", "password": "", "channel": 1}
+            wlan._ifconfig = ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0")
+            _interfaces[interface] = wlan
+        return _interfaces[interface]
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self._active
+        self._active = bool(is_active)
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config.get(args[0])
+        self._config.update(kwargs)
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return self._ifconfig
+        self._ifconfig = tuple(config)
+
+    def connect(self, ssid=None, key=None):
+        self._config["essid"] = ssid
+        self._active = True
+
+    def disconnect(self):
+        pass
+
+    def isconnected(self):
+        return self._active
+
+    def status(self, *args):
+        return STAT_GOT_IP if self._active else STAT_IDLE
@@ -0,0 +1,29 @@
+# Imports
+import time
+import gc
+
+# Records how long each boot stage took and how much heap it used.
+# time.ticks_ms() starts at reset, so the first stage already shows the
+# time spent since power-on.
+class Timeline:
+
+    def __init__(self):
+        self.stages = []
+
+    def stage(self, name):
+        self.stages.append((name, time.ticks_ms(), gc.mem_free()))
+
+    def report(self):
+        print("Startup timeline:")
+        print("  stage            at ms  +ms   heap free  +heap")
+        last_ms = 0
+        last_free = None
+        for name, at_ms, free in self.stages:
+            used = 0 if last_free is None else last_free - free
+            print(f"  {name:<15} {at_ms:>6} {time.ticks_diff(at_ms, last_ms):>4} {free:>11} {-used:>6}")
+            last_ms = at_ms
+            last_free = free
+
+# Boot timeline of the board
+timeline = Timeline()
+timeline.stage("power-on")
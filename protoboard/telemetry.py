@@ -0,0 +1,149 @@
+# Imports
+import gc
+import time
+from array import array
+from machine import Timer
+
+# Heap samples kept (one per SAMPLE_MS)
+SAMPLES = 60
+SAMPLE_MS = 1000
+
+# GC policies:
+#   default  MicroPython's own: collect when an allocation fails
+#   idle     no automatic threshold; idle() collects between commands and
+#            game frames once IDLE_PCT of the heap left free by the last
+#            collection has been allocated (live data alone never makes it
+#            collect). A safety threshold at SAFETY_PCT still collects if
+#            idle time never comes
+#   eager    threshold at EAGER_PCT of the heap: frequent, short pauses
+POLICIES = ("default", "idle", "eager")
+IDLE_PCT = 50
+SAFETY_PCT = 85
+EAGER_PCT = 10
+
+# Heap and GC telemetry: a timer samples mem_free/mem_alloc into a fixed
+# ring, and collections made through collect() are counted and timed.
+# MicroPython does not report its own automatic collections, so they are
+# counted when mem_alloc drops between two samples (a lower bound).
+class HeapTelemetry:
+
+    def __init__(self, size=SAMPLES):
+        self.size = size
+        self.times = array("I", bytes(4 * size))
+        self.free = array("I", bytes(4 * size))
+        self.alloc = array("I", bytes(4 * size))
+        self.head = 0
+        self.count = 0
+        self.collections = 0
+        self.auto_collections = 0
+        self.pause_us = 0       # last collect() pause
+        self.pause_max_us = 0
+        self.pause_total_us = 0
+        self.last_alloc = 0
+        self.policy = "default"
+        # mem_alloc after the last collection and the bytes idle() lets
+        # be allocated past it
+        self.base_alloc = 0
+        self.idle_budget = 0
+        self.timer = None
+        # Bound method created once, the timer must not allocate it
+        self._on_sample = self.sample
+
+    def start(self, period_ms=SAMPLE_MS):
+        if self.timer:
+            return
+        self.last_alloc = gc.mem_alloc()
+        self.timer = Timer()
+        self.timer.init(period=period_ms, mode=Timer.PERIODIC, callback=self._on_sample)
+
+    def stop(self):
+        if not self.timer:
+            return
+        self.timer.deinit()
+        self.timer = None
+
+    # Timer handler: records one sample
+    def sample(self, timer=None):
+        alloc = gc.mem_alloc()
+        if alloc < self.last_alloc:
+            self.auto_collections += 1
+            self._collected(alloc)
+        self.last_alloc = alloc
+        i = (self.head + self.count) % self.size
+        if self.count == self.size:
+            self.head = (self.head + 1) % self.size
+        else:
+            self.count += 1
+        self.times[i] = time.ticks_ms()
+        self.free[i] = gc.mem_free()
+        self.alloc[i] = alloc
+
+    # Runs a collection and records its pause, returns the bytes freed
+    def collect(self):
+        before = gc.mem_alloc()
+        start = time.ticks_us()
+        gc.collect()
+        pause = time.ticks_diff(time.ticks_us(), start)
+        self.collections += 1
+        self.pause_us = pause
+        self.pause_total_us += pause
+        if pause > self.pause_max_us:
+            self.pause_max_us = pause
+        self.last_alloc = gc.mem_alloc()
+        self._collected(self.last_alloc)
+        return before - self.last_alloc
+
+    # A collection happened and left `alloc` bytes in use
+    def _collected(self, alloc):
+        self.base_alloc = alloc
+        self.idle_budget = gc.mem_free() * IDLE_PCT // 100
+
+    # Called where the firmware has time to spare (no input waiting, time
+    # left in a game frame). With the idle policy it collects there when
+    # enough was allocated since the last collection and the last pause
+    # fits in free_ms.
+    def idle(self, free_ms=-1):
+        if self.policy != "idle":
+            return False
+        if free_ms >= 0 and self.pause_us > free_ms * 1000:
+            return False
+        if gc.mem_alloc() - self.base_alloc < self.idle_budget:
+            return False
+        self.collect()
+        return True
+
+    def set_policy(self, policy):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown GC policy {policy}")
+        heap = gc.mem_free() + gc.mem_alloc()
+        if policy == "idle":
+            self._collected(gc.mem_alloc())
+            gc.threshold(heap * SAFETY_PCT // 100)
+        elif policy == "eager":
+            gc.threshold(heap * EAGER_PCT // 100)
+        else:
+            gc.threshold(-1)
+        self.policy = policy
+
+    # Samples from oldest to newest as (ticks_ms, free, alloc)
+    def samples(self):
+        for k in range(self.count):
+            i = (self.head + k) % self.size
+            yield self.times[i], self.free[i], self.alloc[i]
+
+    def stats(self):
+        return {
+            "free": gc.mem_free(),
+            "alloc": gc.mem_alloc(),
+            "collections": self.collections,
+            "auto": self.auto_collections,
+            "pause_us": self.pause_us,
+            "pause_max_us": self.pause_max_us,
+            "pause_avg_us": self.pause_total_us // self.collections if self.collections else 0,
+            "policy": self.policy,
+        }
+
+# Heap telemetry of the board
+heap = HeapTelemetry()
+
+print("(✓) telemetry.py")
@@ -0,0 +1,30 @@
+# Tests of the firmware on a PC, through the board simulator (sim/).
+# From the protoboard folder:
+#
+#   python -m pytest tests
+
+# Imports
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sim
+sim.install()
+
+# Replies sent by a Session, one decoded line each
+class Replies(list):
+
+    def write(self, data):
+        self.extend(bytes(data).decode().splitlines())
+
+@pytest.fixture
+def replies():
+    return Replies()
+
+@pytest.fixture
+def session(replies):
+    from connections.session import Session
+    return Session(replies.write, {}, "\n", "ERROR: ")
@@ -0,0 +1,36 @@
+# Imports
+import pytest
+from connections import binary_protocol
+from connections.binary_protocol import OP_SET_PIXEL, OP_MELODY, encode
+from hardware import matrix, sound
+
+def test_set_pixel(session, replies):
+    matrix.clear()
+    session.handle_frame(encode(OP_SET_PIXEL, bytes((0, 10, 20, 30, 24, 1, 2, 3))))
+    assert replies == ["OK"]
+    assert matrix[0] == (10, 20, 30)
+    assert matrix[24] == (1, 2, 3)
+
+def test_rejected_pixel_frame_changes_nothing(session, replies):
+    matrix.clear()
+    before = bytes(matrix.buf)
+    # The first pixel is valid, the second one is past the matrix
+    session.handle_frame(encode(OP_SET_PIXEL, bytes((3, 255, 0, 0, 25, 0, 255, 0))))
+    assert replies == ["ERROR: Pixel out of range"]
+    assert bytes(matrix.buf) == before
+
+def test_rejected_melody_frame_adds_nothing(session, replies):
+    melody = sound.melody
+    melody.clear()
+    for _ in range(melody.size - 1):
+        melody.add(440, 10)
+    session.handle_frame(encode(OP_MELODY, bytes((1, 184, 0, 100, 1, 184, 0, 100))))
+    assert replies == ["ERROR: Melody full"]
+    assert melody.length == melody.size - 1
+    melody.clear()
+
+def test_bad_checksum():
+    frame = encode(OP_SET_PIXEL, bytes((0, 1, 2, 3)))
+    frame[-1] ^= 0xFF
+    with pytest.raises(ValueError, match="Bad checksum"):
+        binary_protocol.execute(frame)
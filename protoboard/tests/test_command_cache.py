@@ -0,0 +1,89 @@
+# Imports
+from connections.command_cache import CommandCache, ENTRY_OVERHEAD
+from connections.session import command_cache
+
+def test_hits_and_misses():
+    cache = CommandCache()
+    first = cache.compile("x = 1")
+    assert cache.compile("x = 1") is first
+    cache.compile("y = 2")
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+def test_runs_in_scope():
+    cache = CommandCache()
+    scope = {}
+    cache.run("x = 1", scope)
+    cache.run("x += 1", scope)
+    assert scope["x"] == 2
+
+def test_lru_order():
+    cache = CommandCache(max_entries=2)
+    cache.compile("a = 1")
+    cache.compile("b = 2")
+    # Using "a" again makes "b" the oldest entry
+    cache.compile("a = 1")
+    cache.compile("c = 3")
+    assert list(cache._entries) == ["a = 1", "c = 3"]
+    assert cache.evictions == 1
+
+def test_eviction_by_entry_count():
+    cache = CommandCache(max_entries=3)
+    for i in range(10):
+        cache.compile(f"x = {i}")
+    assert len(cache) == 3
+    assert cache.evictions == 7
+    assert list(cache._entries) == ["x = 7", "x = 8", "x = 9"]
+
+def test_eviction_by_bytes():
+    size = CommandCache.cost("x = 0")
+    cache = CommandCache(max_bytes=2 * size)
+    for i in range(4):
+        cache.compile(f"x = {i}")
+    assert len(cache) == 2
+    assert cache.stats()["bytes"] == 2 * size
+    assert cache.evictions == 2
+
+def test_oversized_command_is_not_cached():
+    cache = CommandCache(max_bytes=ENTRY_OVERHEAD + 10)
+    cache.compile("a = 1")
+    long_command = "x = " + "1" * 20
+    code = cache.compile(long_command)
+    scope = {}
+    exec(code, scope)
+    assert scope["x"] == int("1" * 20)
+    # Run but never cached, and nothing was evicted for it
+    assert list(cache._entries) == ["a = 1"]
+    assert cache.evictions == 0
+    cache.compile(long_command)
+    assert cache.misses == 3
+
+def test_off_compiles_every_command():
+    cache = CommandCache()
+    cache.compile("x = 1")
+    cache.off()
+    assert len(cache) == 0
+    cache.compile("x = 1")
+    cache.compile("x = 1")
+    assert (cache.hits, cache.misses, len(cache)) == (0, 3, 0)
+    cache.on()
+    cache.compile("x = 1")
+    cache.compile("x = 1")
+    assert (cache.hits, cache.misses, len(cache)) == (1, 4, 1)
+
+def test_cache_control_command(session, replies):
+    try:
+        session.handle_line("@cache off")
+        session.handle_line("x = 1")
+        session.handle_line("x = 1")
+        assert not command_cache.enabled
+        session.handle_line("@cache stats")
+        assert replies[-1].startswith("CACHE enabled=False entries=0")
+        session.handle_line("@cache on")
+        session.handle_line("@cache clear")
+        session.handle_line("x = 1")
+        session.handle_line("x = 1")
+        session.handle_line("@cache stats")
+        assert "hits=1 misses=1" in replies[-1]
+        assert replies[:3] == ["OK CACHE OFF", "OK", "OK"]
+    finally:
+        command_cache.on()
@@ -0,0 +1,47 @@
+# Imports
+from connections.framing import LineFramer, LINE, OVERFLOW, NONE
+
+# Feeds data in chunks of `chunk` bytes, returns the (kind, text) of
+# every message found
+def messages(framer, data, chunk):
+    found = []
+    for i in range(0, len(data), chunk):
+        part = data[i:i + chunk]
+        offset = 0
+        while offset < len(part):
+            offset = framer.feed(part, offset)
+            while True:
+                kind = framer.next()
+                if kind == NONE:
+                    break
+                found.append((kind, framer.text() if kind == LINE else None))
+    return found
+
+def test_lines():
+    framer = LineFramer(64)
+    assert messages(framer, b"a = 1\r\nb = 2\n\nc = 3\r\n", 5) == [
+        (LINE, "a = 1"), (LINE, "b = 2"), (LINE, "c = 3"),
+    ]
+
+def test_long_line_is_reported_once():
+    framer = LineFramer(8)
+    data = b"x" * 30 + b"\nok\n"
+    for chunk in (1, 3, 8, 64):
+        framer.reset()
+        assert messages(framer, data, chunk) == [(OVERFLOW, None), (LINE, "ok")]
+
+def test_every_long_line_is_reported():
+    framer = LineFramer(8)
+    data = b"y" * 20 + b"\n" + b"z" * 9 + b"\r\nend\n"
+    assert messages(framer, data, 4) == [(OVERFLOW, None), (OVERFLOW, None), (LINE, "end")]
+
+def test_one_error_reply_per_long_line(session, replies):
+    framer = LineFramer(8)
+    data = b"#" + b"x" * 29 + b"\nx = 1\n"
+    for i in range(0, len(data), 4):
+        part = data[i:i + 4]
+        offset = 0
+        while offset < len(part):
+            offset = framer.feed(part, offset)
+            framer.process(session)
+    assert replies == ["ERROR: Line too long", "OK"]
@@ -0,0 +1,113 @@
+# Recorded button traces replayed through the menu and a game with
+# inputs.replay(), as if they came from the buttons and the joystick.
+
+# Imports
+import importlib
+import random
+import sys
+import threading
+
+import pytest
+
+from hardware import oled_text
+from inputs import (
+    events, replay, press, release, NO_EVENT,
+    BUTTON_A, BUTTON_B, JOY_UP, JOY_DOWN, JOY_LEFT, JOY_RIGHT
+)
+from telemetry import heap
+
+# Trace of a tap on the joystick or a button
+def tap(source, delay_ms=0):
+    return [(delay_ms, press(source)), (0, release(source))]
+
+@pytest.fixture
+def menu():
+    menu = importlib.import_module("mainHC-05")
+    events.start()
+    events.clear()
+    yield menu
+    heap.stop()
+    heap.set_policy("default")
+
+# Hands the queued events to the menu
+def run_menu(menu, selected=0):
+    while True:
+        event = events.get()
+        if event == NO_EVENT:
+            return selected
+        selected = menu.menu_event(event, selected)
+
+def test_menu_navigation(menu):
+    replay(events, tap(JOY_DOWN) + tap(JOY_DOWN) + tap(JOY_UP))
+    selected = run_menu(menu)
+    assert menu.MENU_OPTIONS[selected]["name"] == "WiFi"
+    assert oled_text.lines[2] == "> WiFi"
+    replay(events, tap(JOY_UP) + tap(JOY_UP))
+    selected = run_menu(menu, selected)
+    # Wraps around to the last option
+    assert selected == len(menu.MENU_OPTIONS) - 1
+
+def test_menu_runs_snake_until_b(menu, capsys):
+    replay(events, tap(JOY_DOWN) + tap(JOY_DOWN))
+    selected = run_menu(menu)
+    assert oled_text.lines[2] == "> Jogo Snake"
+    # Played while the game runs: it starts after the 1 s transition
+    # screen of the menu
+    game_trace = tap(JOY_UP, 1500) + tap(JOY_LEFT, 300) + tap(BUTTON_B, 300)
+    player = threading.Thread(target=replay, args=(events, game_trace))
+    player.start()
+    events.inject(press(BUTTON_A))
+    selected = run_menu(menu, selected)
+    player.join()
+    out = capsys.readouterr().out
+    assert "Starting Snake" in out
+    assert "Snake: 0 updates" not in out
+    assert "🏁 Jogo finalizado" in out
+    # Back in the menu, on the same option, with the game unloaded
+    assert selected == 2
+    assert oled_text.lines[2] == "> Jogo Snake"
+    assert "games.snake_game" not in sys.modules
+    assert not hasattr(sys.modules["games"], "snake_game")
+
+# Steps the game through a trace: each delay becomes fixed steps, then
+# the event goes through the input queue to the game
+def play_trace(game, trace):
+    for delay_ms, event in trace:
+        for _ in range(delay_ms // game.step_ms):
+            game.step()
+        replay(events, [(0, event)])
+        while True:
+            event = events.get()
+            if event == NO_EVENT:
+                break
+            game._event(event)
+
+def test_snake_follows_the_trace():
+    from games import snake_game
+    from games.runtime import Game
+    from games.snake_game import Snake, cell_of
+
+    random.seed(3)
+    events.clear()
+    game = Game("Snake", snake_game.play, snake_game.SNAKE_FPS)
+    game.next_scene = game.first_scene
+    game._enter_next()
+    game.running = True
+    player = snake_game.play.player
+    player.dir = Snake.right
+    start = player.head
+    assert start == cell_of(8, 5)
+
+    step = game.step_ms
+    play_trace(game, [
+        (2 * step, press(JOY_UP)), (0, release(JOY_UP)),
+        (3 * step, press(JOY_LEFT)), (0, release(JOY_LEFT)),
+        # A U-turn is ignored
+        (1 * step, press(JOY_RIGHT)), (0, release(JOY_RIGHT)),
+        (1 * step, press(BUTTON_B)),
+    ])
+    assert player.state
+    assert player.head == cell_of(8, 2)
+    assert player.dir == Snake.left
+    assert not game.running
+    assert game.frame == 7
@@ -0,0 +1,38 @@
+# Imports
+import pytest
+
+from hardware import sound
+
+@pytest.fixture(autouse=True)
+def empty_melody():
+    sound.melody.clear()
+    yield
+    sound.cancel()
+    sound.melody.clear()
+
+def test_add_notes(session, replies):
+    session.handle_line("@melody add 262:200 0:50 294:200")
+    session.handle_line("@melody add 330:400")
+    assert replies == ["OK MELODY 3", "OK MELODY 4"]
+    melody = sound.melody
+    assert [melody.freqs[i] for i in range(4)] == [262, 0, 294, 330]
+    assert melody.duration_ms() == 850
+
+@pytest.mark.parametrize("bad", ["262", "abc:100", "262:x", ":100", "70000:100", "440:65536", "-1:100"])
+def test_bad_note_adds_nothing(session, replies, bad):
+    session.handle_line("@melody add 262:200")
+    session.handle_line(f"@melody add 294:200 {bad} 330:400")
+    assert replies == ["OK MELODY 1", f"ERROR: Bad note {bad}"]
+    assert sound.melody.length == 1
+
+def test_full_melody_adds_nothing(session, replies):
+    melody = sound.melody
+    for _ in range(melody.size - 1):
+        melody.add(440, 10)
+    session.handle_line("@melody add 262:200 294:200")
+    assert replies == ["ERROR: Melody full"]
+    assert melody.length == melody.size - 1
+
+def test_largest_note(session, replies):
+    session.handle_line("@melody add 65535:65535")
+    assert replies == ["OK MELODY 1"]
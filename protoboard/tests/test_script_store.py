@@ -0,0 +1,104 @@
+# Imports
+import os
+
+import pytest
+
+from connections import session as session_module
+from connections.script_store import ScriptStore, SCRIPT_DIR, UPLOAD_NAME, format_hash, script_hash
+
+SCRIPT = ["total = sum(args)", "runs = globals().get('runs', 0) + 1"]
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    store = ScriptStore()
+    monkeypatch.setattr(session_module, "script_store", store)
+    return store
+
+def crc_of(lines):
+    return format_hash(script_hash("".join(line + "\n" for line in lines).encode()))
+
+def upload(session, name, lines, crc=None):
+    session.handle_line(f"@script put {name} {crc or crc_of(lines)}")
+    for line in lines:
+        session.handle_line(line)
+    session.handle_line("@script end")
+
+def test_put_and_del(session, replies, store):
+    upload(session, "adder", SCRIPT)
+    assert replies[-1].startswith("OK SCRIPT adder ")
+    session.handle_line("@script del adder")
+    assert replies[-1] == "OK SCRIPT DEL adder"
+    assert store.stats()["scripts"] == 0
+
+def test_run_binds_args_and_reuses_the_code(session, replies, store):
+    upload(session, "adder", SCRIPT)
+    code = store.code["adder"]
+    session.handle_line("@run adder 1 2 3")
+    assert replies[-1] == "OK"
+    assert session.scope["args"] == [1, 2, 3]
+    assert session.scope["total"] == 6
+    session.handle_line("@run adder 40 2")
+    assert session.scope["total"] == 42
+    assert session.scope["runs"] == 2
+    # Compiled once, when stored, then taken from the RAM cache
+    assert store.code["adder"] is code
+    assert (store.hits, store.misses) == (2, 0)
+
+def test_run_after_the_cache_dropped_it(session, store):
+    upload(session, "adder", SCRIPT)
+    store.code.clear()
+    session.handle_line("@run adder 5")
+    session.handle_line("@run adder 6")
+    assert session.scope["total"] == 6
+    # Read from the flash once, then cached again
+    assert (store.hits, store.misses) == (1, 1)
+
+def test_has(session, replies):
+    upload(session, "adder", SCRIPT)
+    crc = crc_of(SCRIPT)
+    session.handle_line(f"@script has adder {crc}")
+    assert replies[-1] == "SCRIPT READY adder"
+    # The app changed the script: the board has an older version
+    changed = SCRIPT + ["total *= 2"]
+    session.handle_line(f"@script has adder {crc_of(changed)}")
+    assert replies[-1] == "SCRIPT MISSING adder"
+    upload(session, "adder", changed)
+    session.handle_line(f"@script has adder {crc_of(changed)}")
+    assert replies[-1] == "SCRIPT READY adder"
+    session.handle_line(f"@script has adder {crc}")
+    assert replies[-1] == "SCRIPT MISSING adder"
+
+def test_hash_mismatch_stores_nothing(session, replies, store):
+    upload(session, "adder", SCRIPT, crc="00000000")
+    assert replies[-1] == f"ERROR: Script hash mismatch ({crc_of(SCRIPT)})"
+    assert not os.path.exists(os.path.join(SCRIPT_DIR, UPLOAD_NAME))
+    assert not os.path.exists(os.path.join(SCRIPT_DIR, "adder.py"))
+    assert "adder" not in dict(store.entries())
+    session.handle_line("@run adder")
+    assert replies[-1] == "ERROR: No script adder"
+
+def test_least_recently_run_is_evicted(session, replies, monkeypatch):
+    # Room for two of these scripts
+    lines = ["value = %d" % (10 ** 30)]
+    size = len(lines[0]) + 1
+    store = ScriptStore(max_bytes=2 * size + 1)
+    monkeypatch.setattr(session_module, "script_store", store)
+    upload(session, "first", lines)
+    upload(session, "second", lines)
+    session.handle_line("@run first")
+    upload(session, "third", lines)
+    assert replies[-1] == f"OK SCRIPT third {size}"
+    assert sorted(name for name, _ in store.entries()) == ["first", "third"]
+    assert store.evictions == 1
+    assert not os.path.exists(os.path.join(SCRIPT_DIR, "second.py"))
+    session.handle_line("@run second")
+    assert replies[-1] == "ERROR: No script second"
+
+def test_del_unknown(session, replies):
+    session.handle_line("@script del nothing")
+    assert replies == ["ERROR: No script nothing"]
+
+def test_del_without_name(session, replies):
+    session.handle_line("@script del")
+    assert replies == ["ERROR: Usage: @script del <name>"]
@@ -0,0 +1,75 @@
+# Moves, growth and crashes of the snake in games/snake_game.py
+
+# Imports
+import pytest
+
+# Imported by the tests: the menu test checks the game is unloaded after
+# it ran, so it must not be loaded while collecting
+@pytest.fixture(autouse=True)
+def snake_module():
+    global snake_game, Snake, cell_of
+    from games import snake_game
+    from games.snake_game import Snake, cell_of
+
+# Snake grown to `length` segments along row y, from x to the right
+def straight_snake(x, y, length):
+    snake = Snake(x, y)
+    snake.dir = Snake.right
+    snake.grow = length - 1
+    for _ in range(length - 1):
+        snake.move()
+    assert snake.size() == length and snake.state
+    return snake
+
+def steer(snake, *dirs):
+    for d in dirs:
+        snake.dir = d
+        snake.move()
+
+def test_crash_keeps_the_size():
+    snake = straight_snake(5, 5, 5)
+    steer(snake, Snake.up, Snake.left)
+    # Down into (8, 5), a segment that is not the tail
+    snake.dir = Snake.down
+    assert snake.move() == -1
+    assert not snake.state
+    assert snake.size() == 5
+    assert snake.length == 5
+
+def test_following_the_tail_is_not_a_crash():
+    snake = straight_snake(5, 5, 2)
+    snake.grow = 2
+    steer(snake, Snake.down, Snake.left)
+    assert snake.size() == 4
+    # Up into (5, 5): the tail leaves it in the same move
+    snake.dir = Snake.up
+    assert snake.move() == cell_of(5, 5)
+    assert snake.state
+    assert snake.head == cell_of(5, 5)
+    assert snake.size() == 4
+
+def test_tail_of_a_growing_snake_is_a_crash():
+    snake = straight_snake(5, 5, 2)
+    snake.grow = 2
+    steer(snake, Snake.down, Snake.left)
+    snake.grow = 1
+    snake.dir = Snake.up
+    assert snake.move() == -1
+    assert not snake.state
+    assert snake.size() == 5
+
+def test_score_at_death(monkeypatch):
+    from games.runtime import Game
+    texts = []
+    monkeypatch.setattr(snake_game.oled, "text", lambda s, x, y, c=1: texts.append(s))
+    game = Game("Snake", snake_game.play, snake_game.SNAKE_FPS)
+    game.next_scene = game.first_scene
+    game._enter_next()
+    play = snake_game.play
+    play.food = -1
+    monkeypatch.setattr(play, "player", straight_snake(5, 5, 5))
+    steer(play.player, Snake.up, Snake.left)
+    play.player.dir = Snake.down
+    game.step()
+    assert game.scene is snake_game.game_over
+    assert "Score: 5" in texts
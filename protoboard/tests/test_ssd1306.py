@@ -0,0 +1,108 @@
+# Dirty window of lib/ssd1306.py on a fake SSD1306 that decodes the I2C
+# bus into its own display RAM (see benchmarks/bench_oled_i2c.py)
+
+# Imports
+from array import array
+import random
+
+import pytest
+
+from machine import I2C, Pin
+from lib.ssd1306 import SSD1306_I2C
+from benchmarks.bench_oled_i2c import FakeSSD1306, ADDR
+
+# Window setup sent before the pixels of every show()
+WINDOW_BYTES = 13
+FULL_FRAME = 128 * 8
+
+@pytest.fixture
+def oled():
+    i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400000)
+    display = FakeSSD1306()
+    i2c.attach(ADDR, display)
+    oled = SSD1306_I2C(128, 64, i2c)
+    oled.display = display
+    i2c.reset_stats()
+    return oled
+
+# Sends a frame, checks the display matches and returns its data bytes
+def show(oled):
+    oled.i2c.reset_stats()
+    oled.show()
+    assert oled.display.ram == oled.buffer
+    if not oled.frame_bytes:
+        return 0
+    assert oled.i2c.transactions == 1
+    assert oled.i2c.bytes == oled.frame_bytes
+    return oled.frame_bytes - WINDOW_BYTES
+
+def test_nothing_dirty_sends_nothing(oled):
+    assert show(oled) == 0
+    assert oled.i2c.transactions == 0
+
+def test_partial_window(oled):
+    # An 8x8 cell inside page 1 is 8 bytes instead of the 1024 of a frame
+    oled.fill_rect(16, 8, 8, 8, 1)
+    assert show(oled) == 8
+    oled.fill_rect(16, 8, 8, 8, 0)
+    assert show(oled) == 8
+
+def test_text_row(oled):
+    oled.text("Score: 12", 0, 24)
+    assert show(oled) == 9 * 8
+
+def test_window_wraps_to_the_next_page(oled):
+    # Columns 100..109 of pages 0..2: after column 109 the controller
+    # goes back to column 100 of the next page
+    oled.fill_rect(100, 4, 10, 20, 1)
+    oled.pixel(120, 60, 1)
+    oled.pixel(120, 60, 0)
+    assert show(oled) == 21 * 8
+    oled.fill_rect(101, 5, 3, 12, 0)
+    assert show(oled) == 3 * 3
+
+def test_two_regions_share_one_window(oled):
+    oled.pixel(2, 2, 1)
+    oled.pixel(10, 20, 1)
+    assert show(oled) == 9 * 3
+
+def test_full_refresh_fallback(oled):
+    oled.fill(1)
+    assert show(oled) == FULL_FRAME
+    oled.pixel(0, 0, 0)
+    oled.i2c.reset_stats()
+    oled.show(full=True)
+    assert oled.frame_bytes - WINDOW_BYTES == FULL_FRAME
+    assert oled.display.ram == oled.buffer
+    oled.partial = False
+    oled.pixel(5, 5, 0)
+    assert show(oled) == FULL_FRAME
+
+def test_random_windows(oled):
+    # Every window size, in bytes, is a different mix of copied parts
+    rng = random.Random(1)
+    for _ in range(300):
+        x, y = rng.randrange(128), rng.randrange(64)
+        w, h = rng.randrange(1, 129 - x), rng.randrange(1, 65 - y)
+        oled.fill_rect(x, y, w, h, rng.randrange(2))
+        pages = (y + h - 1) // 8 - y // 8 + 1
+        assert show(oled) == w * pages
+
+def test_double_buffer(oled):
+    i2c = oled.i2c
+    oled = SSD1306_I2C(128, 64, i2c, double_buffer=True)
+    oled.display = FakeSSD1306()
+    i2c.attach(ADDR, oled.display)
+    oled.fill(1)
+    oled.show()
+    oled.fill_rect(8, 8, 16, 16, 0)
+    oled.show()
+    oled.wait()
+    assert oled.display.ram == oled.buffer
+
+def test_ellipse_and_poly(oled):
+    oled.ellipse(64, 32, 10, 6, 1, True)
+    assert show(oled) == 21 * 2
+    # Its extent is not known to the driver: the whole screen is sent
+    oled.poly(10, 10, array("h", (0, 0, 20, 0, 10, 15)), 1, True)
+    assert show(oled) == FULL_FRAME
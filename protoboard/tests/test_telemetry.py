@@ -0,0 +1,87 @@
+# Imports
+import gc
+
+import pytest
+
+from telemetry import HeapTelemetry
+
+HEAP = 100000
+
+# Heap with live data and garbage, freed by collect()
+class FakeHeap:
+
+    def __init__(self, live):
+        self.live = live
+        self.garbage = 0
+        self.collections = 0
+
+    def mem_alloc(self):
+        return self.live + self.garbage
+
+    def mem_free(self):
+        return HEAP - self.mem_alloc()
+
+    def collect(self):
+        self.garbage = 0
+        self.collections += 1
+
+@pytest.fixture
+def fake_heap(monkeypatch):
+    fake = FakeHeap(0)
+    monkeypatch.setattr(gc, "mem_alloc", fake.mem_alloc)
+    monkeypatch.setattr(gc, "mem_free", fake.mem_free)
+    monkeypatch.setattr(gc, "collect", fake.collect)
+    monkeypatch.setattr(gc, "threshold", lambda amount=None: None)
+    return fake
+
+def test_idle_collects_after_half_the_free_heap(fake_heap):
+    fake_heap.live = 10000
+    telemetry = HeapTelemetry()
+    telemetry.set_policy("idle")
+    fake_heap.garbage = 40000
+    assert not telemetry.idle()
+    fake_heap.garbage = 45000
+    assert telemetry.idle()
+    assert fake_heap.collections == 1
+
+def test_live_data_alone_does_not_collect(fake_heap):
+    # Most of the heap is live: after one collection idle() must wait
+    # for new allocations instead of collecting on every call
+    fake_heap.live = 80000
+    fake_heap.garbage = 10000
+    telemetry = HeapTelemetry()
+    telemetry.set_policy("idle")
+    telemetry.collect()
+    for _ in range(10):
+        assert not telemetry.idle()
+    assert fake_heap.collections == 1
+    fake_heap.garbage = 10000
+    assert telemetry.idle()
+    assert fake_heap.collections == 2
+
+def test_automatic_collection_restarts_the_budget(fake_heap):
+    fake_heap.live = 10000
+    telemetry = HeapTelemetry()
+    telemetry.set_policy("idle")
+    fake_heap.garbage = 40000
+    telemetry.sample()
+    fake_heap.garbage = 0
+    telemetry.sample()
+    assert telemetry.auto_collections == 1
+    fake_heap.garbage = 40000
+    assert not telemetry.idle()
+
+def test_idle_waits_for_time(fake_heap):
+    telemetry = HeapTelemetry()
+    telemetry.set_policy("idle")
+    telemetry.pause_us = 5000
+    fake_heap.garbage = 90000
+    assert not telemetry.idle(2)
+    assert telemetry.idle(10)
+
+def test_other_policies_never_collect_at_idle(fake_heap):
+    telemetry = HeapTelemetry()
+    fake_heap.garbage = 90000
+    assert not telemetry.idle()
+    telemetry.set_policy("eager")
+    assert not telemetry.idle()
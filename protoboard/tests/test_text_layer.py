@@ -0,0 +1,82 @@
+# Text rows of lib/text_layer.py on an OLED driven through the fake
+# SSD1306 of the I2C benchmark
+
+# Imports
+import time
+
+import pytest
+
+from machine import I2C, Pin
+from lib.ssd1306 import SSD1306_I2C
+from lib.text_layer import TextLayer
+from benchmarks.bench_oled_i2c import FakeSSD1306, ADDR
+
+LINES = ["== MENU ==", "", "> WiFi", "", "", "", "Joy: Navegar", "A: Selecionar"]
+
+def new_oled():
+    i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400000)
+    display = FakeSSD1306()
+    i2c.attach(ADDR, display)
+    oled = SSD1306_I2C(128, 64, i2c)
+    oled.display = display
+    return oled
+
+@pytest.fixture
+def layer():
+    return TextLayer(new_oled())
+
+# Screen of a layer that only ever showed these lines
+def expected(lines):
+    layer = TextLayer(new_oled())
+    layer.show(lines)
+    return layer.oled.buffer
+
+def test_unchanged_lines_send_nothing(layer):
+    layer.show(LINES)
+    layer.show(LINES)
+    assert layer.oled.frame_bytes == 0
+
+def test_only_changed_rows_are_sent(layer):
+    layer.show(LINES)
+    lines = list(LINES)
+    lines[2] = "> Snake"
+    layer.show(lines)
+    assert layer.oled.buffer == expected(lines)
+    assert layer.oled.display.ram == layer.oled.buffer
+    # Row 2 only: the window setup and 7 characters
+    assert layer.oled.frame_bytes == 13 + 7 * 8
+
+def test_drawing_outside_the_layer(layer):
+    oled = layer.oled
+    layer.show(LINES)
+    # Something else draws a cell past the text of row 5, then the
+    # same lines are shown again
+    oled.fill_rect(100, 40, 8, 8, 1)
+    oled.show()
+    layer.show(LINES)
+    assert oled.buffer == expected(LINES)
+    assert oled.display.ram == oled.buffer
+
+def test_cleared_screen_is_drawn_again(layer):
+    oled = layer.oled
+    layer.show(LINES)
+    # A game clears the screen when it ends
+    oled.fill(0)
+    oled.show()
+    layer.show(LINES)
+    assert oled.buffer == expected(LINES)
+    assert oled.display.ram == oled.buffer
+
+def test_marquee_keeps_its_row(layer, monkeypatch):
+    layer.show(LINES)
+    layer.marquee(4, "a message longer than the screen")
+    layer.oled.show()
+    start = time.ticks_ms()
+    now = [start]
+    monkeypatch.setattr(time, "ticks_ms", lambda: now[0])
+    for step in range(1, 6):
+        now[0] = time.ticks_add(start, step * 1000)
+        assert layer.tick()
+    # The marquee's own drawing is not taken for someone else's
+    assert layer.lines[:4] == LINES[:4]
+    assert layer.scrolls[4] is not None
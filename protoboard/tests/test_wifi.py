@@ -0,0 +1,174 @@
+# The TCP server of connections/wifi.py on a loopback port, with several
+# clients connected at the same time. Server and clients run in the same
+# asyncio loop; button B (injected) stops the server at the end.
+
+# Imports
+import asyncio
+import socket
+
+import pytest
+
+from connections import wifi
+from inputs import events, press, BUTTON_B
+
+TIMEOUT_S = 5
+
+# An app connection
+class Client:
+
+    @classmethod
+    async def connect(cls, port):
+        client = cls()
+        for _ in range(100):
+            try:
+                client.reader, client.writer = await asyncio.open_connection("127.0.0.1", port)
+                return client
+            except OSError:
+                await asyncio.sleep(0.02)
+        raise RuntimeError("server did not start")
+
+    def send(self, line):
+        self.writer.write((line + "\n").encode())
+
+    async def reply(self):
+        line = await asyncio.wait_for(self.reader.readline(), TIMEOUT_S)
+        return line.decode().strip()
+
+    async def command(self, line):
+        self.send(line)
+        return await self.reply()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+# Sessions created by the server, closed ones are counted
+class RecordingSession(wifi.Session):
+    created = []
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.closed = 0
+        RecordingSession.created.append(self)
+
+    def close(self):
+        self.closed += 1
+        super().close()
+
+# Sessions of the data chunks put in the hardware queue, in order
+class RecordingQueue(wifi.HardwareQueue):
+    sessions = []
+
+    async def put(self, item):
+        if item[3] is not None:
+            RecordingQueue.sessions.append(item[0])
+        await super().put(item)
+
+async def wait_for(condition):
+    for _ in range(TIMEOUT_S * 100):
+        if condition():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+# Runs scenario(port) against a running server
+@pytest.fixture
+def with_server(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    monkeypatch.setattr(wifi, "TCP_PORT", port)
+    monkeypatch.setattr(wifi, "Session", RecordingSession)
+    monkeypatch.setattr(wifi, "HardwareQueue", RecordingQueue)
+    RecordingSession.created = []
+    RecordingQueue.sessions = []
+
+    async def main(scenario):
+        server = asyncio.create_task(wifi.serve("127.0.0.1"))
+        try:
+            await scenario(port)
+        finally:
+            events.inject(press(BUTTON_B))
+            await asyncio.wait_for(server, TIMEOUT_S)
+
+    return lambda scenario: asyncio.run(main(scenario))
+
+def test_clients_get_their_own_replies(with_server):
+    async def scenario(port):
+        first = await Client.connect(port)
+        second = await Client.connect(port)
+        # Both connections are open, their lines interleave
+        first.send("wifi_test_a = 1")
+        second.send("1 / 0")
+        first.send("undefined_name")
+        second.send("wifi_test_b = 2")
+        assert await first.reply() == "OK"
+        assert (await first.reply()).startswith("ERROR: ")
+        assert await second.reply() == "ERROR: division by zero"
+        assert await second.reply() == "OK"
+        assert wifi.clients == 2
+        await first.close()
+        await second.close()
+    with_server(scenario)
+
+def test_commands_run_one_at_a_time(with_server):
+    async def scenario(port):
+        clients = [await Client.connect(port), await Client.connect(port)]
+        assert await clients[0].command("wifi_test_n = 0") == "OK"
+        for _ in range(50):
+            for client in clients:
+                client.send("wifi_test_n += 1")
+        for client in clients:
+            for _ in range(50):
+                assert await client.reply() == "OK"
+        # No update was lost: the commands ran one after the other
+        assert await clients[1].command("assert wifi_test_n == 100") == "OK"
+        # and every chunk of both clients went through the hardware queue
+        assert len(RecordingSession.created) == 2
+        assert set(RecordingQueue.sessions) == set(RecordingSession.created)
+        for client in clients:
+            await client.close()
+    with_server(scenario)
+
+def test_client_past_the_limit_is_refused(with_server, monkeypatch):
+    monkeypatch.setattr(wifi, "MAX_CLIENTS", 1)
+
+    async def scenario(port):
+        first = await Client.connect(port)
+        assert await first.command("x = 1") == "OK"
+        second = await Client.connect(port)
+        # Closed by the server without a session
+        assert await asyncio.wait_for(second.reader.read(), TIMEOUT_S) == b""
+        await second.close()
+        assert len(RecordingSession.created) == 1
+        assert await first.command("x = 2") == "OK"
+        await first.close()
+    with_server(scenario)
+
+def test_disconnect_closes_the_session(with_server):
+    async def scenario(port):
+        client = await Client.connect(port)
+        assert await client.command("x = 1") == "OK"
+        session = RecordingSession.created[0]
+        assert not session.closed
+        await client.close()
+        # The (session, None, ...) marker reaches the worker
+        assert await wait_for(lambda: session.closed == 1)
+        assert wifi.clients == 0
+    with_server(scenario)
+
+def test_stopping_closes_connected_clients(with_server):
+    clients = []
+
+    async def scenario(port):
+        for _ in range(2):
+            client = await Client.connect(port)
+            assert await client.command("x = 1") == "OK"
+            clients.append(client)
+        # Both still connected when button B stops the server
+
+    with_server(scenario)
+    # Every session was closed by the worker before the server returned
+    assert [session.closed for session in RecordingSession.created] == [1, 1]
+    assert wifi.clients == 0
+    assert not wifi.client_tasks
@@ -5,6 +5,7 @@ import neopixel
 import time
 import math
 import random                 
+from micropython import const
 from ssd1306 import SSD1306_I2C 
 
 # ======================================================================
@@ -44,35 +45,101 @@ def init_matrix(pin, num_leds=25):
     np = neopixel.NeoPixel(Pin(pin), num_leds)
     return np
 
+# Posição física de cada pixel lógico (BitDogLab v7): as linhas 0, 2 e 4
+# da matriz são ligadas ao contrário. Mesma troca do 'swapMap' do
+# neoPixel.ts, mas como tabela de 25 bytes em vez de um dict por chamada.
+PIXEL_MAP = bytes((
+     4,  3,  2,  1,  0,
+     5,  6,  7,  8,  9,
+    14, 13, 12, 11, 10,
+    15, 16, 17, 18, 19,
+    24, 23, 22, 21, 20,
+))
+
 def map_numbers(num=25):
     """
     Mapeia os números dos pixels para o hardware específico (BitDogLab v7).
-    Em Python, 'dicionario.get(chave, padrao)' é o equivalente
-    ao 'swapMap[num] ?? num' do TypeScript.
+    Números fora da matriz são devolvidos sem mudança, como o
+    'swapMap[num] ?? num' do TypeScript.
     """
-    swap_map = {
-        0: 4, 4: 0,
-        1: 3, 3: 1,
-        10: 14, 14: 10,
-        11: 13, 13: 11,
-        20: 24, 24: 20,
-        21: 23, 23: 21
-    }
-    return swap_map.get(num, num)
+    if 0 <= num < len(PIXEL_MAP):
+        return PIXEL_MAP[num]
+    return num
+
+# Caracteres do formato "pos:r,g,b;pos:r,g,b;..."
+_DIGIT_0 = const(48)
+_DIGIT_9 = const(57)
+_COLON = const(58)
+_COMMA = const(44)
+_SEMICOLON = const(59)
+
+# Campos da instrução sendo lida (pos, r, g, b), reaproveitados a cada chamada
+_fields = bytearray(4)
+
+# Escreve uma cor direto no buffer do NeoPixel, sem criar tupla
+def _set_pixel(np, pos, r, g, b):
+    order = np.ORDER
+    o = pos * np.bpp
+    buf = np.buf
+    buf[o + order[0]] = r
+    buf[o + order[1]] = g
+    buf[o + order[2]] = b
 
 def controller_neopixel(np, string):
-    instructions = string.split(';')
-    for instruction in instructions:
-        if not instruction:
-            continue
-        try:
-            pos_str, cor_str = instruction.split(':')
-            pos = int(pos_str)
-            mapped_pos = map_numbers(pos)
-            r, g, b = map(int, cor_str.split(','))
-            np[mapped_pos] = (r, g, b)
-        except Exception as e:
-            print(f"Erro ao processar instrução '{instruction}': {e}")
+    """
+    Aplica instruções "pos:r,g,b" separadas por ';' (posições lógicas).
+    O texto é lido uma única vez, caractere por caractere. Instruções
+    inválidas são avisadas e ignoradas, as outras são aplicadas.
+    """
+    data = string.encode() if isinstance(string, str) else string
+    fields = _fields
+    n = len(data)
+    field = 0      # campo atual: 0 = pos, 1 = r, 2 = g, 3 = b
+    value = 0
+    digits = 0
+    error = None
+    start = 0      # início da instrução atual (para a mensagem de erro)
+    for i in range(n + 1):
+        c = data[i] if i < n else _SEMICOLON
+        if _DIGIT_0 <= c <= _DIGIT_9:
+            value = value * 10 + c - _DIGIT_0
+            digits += 1
+        elif c == _COLON or c == _COMMA or c == _SEMICOLON:
+            if error is None:
+                expected = _COLON if field == 0 else (_SEMICOLON if field == 3 else _COMMA)
+                if c != expected or not digits:
+                    error = "formato inválido"
+                elif value > 255 or (field == 0 and value >= len(PIXEL_MAP)):
+                    error = f"valor fora da faixa: {value}"
+                else:
+                    fields[field] = value
+                    field += 1
+            value = 0
+            digits = 0
+            if c == _SEMICOLON:
+                if error is None and field == 4:
+                    _set_pixel(np, PIXEL_MAP[fields[0]], fields[1], fields[2], fields[3])
+                elif i > start:
+                    instruction = str(data[start:i], "utf-8")
+                    print(f"Erro ao processar instrução '{instruction}': {error}")
+                field = 0
+                error = None
+                start = i + 1
+        elif c not in b" \t\r\n":
+            error = "formato inválido"
+    np.write()
+
+def controller_neopixel_frame(np, frame, offset=0):
+    """
+    Entrada binária: 25 × (r, g, b) em bytes, na ordem lógica dos pixels,
+    a partir de frame[offset]. Um quadro inteiro com um único write().
+    """
+    if len(frame) - offset < len(PIXEL_MAP) * 3:
+        raise ValueError("Quadro incompleto")
+    i = offset
+    for pos in PIXEL_MAP:
+        _set_pixel(np, pos, frame[i], frame[i + 1], frame[i + 2])
+        i += 3
     np.write()
 
 def clear_matrix(np):